@@ -1,6 +1,9 @@
+import argparse
 import asyncio
 import json
+import os
 import sys
+import time
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
 from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
 
@@ -52,8 +55,26 @@ async def fetch_rates():
         traceback.print_exc(file=sys.stderr)
         return []
 
+def is_fresh(path, max_age):
+    """檔案存在且未滿 max_age 秒"""
+    try:
+        return time.time() - os.path.getmtime(path) < max_age
+    except OSError:
+        return False
+
 def main():
     """主程式"""
+    parser = argparse.ArgumentParser(description="爬取台灣銀行匯率並寫入 rates.json")
+    parser.add_argument(
+        "--max-age", type=float, default=0,
+        help="rates.json 未滿這麼多秒時直接沿用,不重新爬取(預設 0:每次都爬取)"
+    )
+    args = parser.parse_args()
+    
+    if args.max_age > 0 and is_fresh("rates.json", args.max_age):
+        print(f"rates.json 未滿 {args.max_age:g} 秒,沿用既有資料")
+        sys.exit(0)
+    
     try:
         rates = asyncio.run(fetch_rates())
         
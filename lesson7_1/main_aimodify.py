@@ -4,21 +4,28 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 
-def get_rates():
-    """執行外部爬蟲腳本,產生 rates.json"""
+@st.cache_data(ttl=600, show_spinner=False)  # 10分鐘快取,所有 session 共用
+def fetch_rates_data(max_age=600):
+    """執行外部爬蟲腳本並讀取 rates.json(失敗時丟出例外,不會被快取)"""
+    # 執行爬蟲並捕獲輸出(rates.json 未滿 max_age 秒時腳本不會重新爬取)
+    subprocess.run(
+        ["python", "fetch_rates_cli.py", "--max-age", str(max_age)],
+        check=True,
+        capture_output=True,
+        text=True
+    )
+    
+    # 讀取生成的 JSON 檔案
+    with open("rates.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def get_rates(force=False):
+    """取得匯率資料(10分鐘內直接使用快取,force=True 時強制重新爬取)"""
     try:
-        # 執行爬蟲並捕獲輸出
-        result = subprocess.run(
-            ["python", "fetch_rates_cli.py"], 
-            check=True,
-            capture_output=True,
-            text=True
-        )
-        
-        # 讀取生成的 JSON 檔案
-        with open("rates.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data
+        if force:
+            fetch_rates_data.clear()
+            return fetch_rates_data(max_age=0)
+        return fetch_rates_data()
     except subprocess.CalledProcessError as e:
         # 顯示詳細錯誤訊息
         st.error(f"爬蟲執行失敗:")
@@ -48,9 +55,9 @@ def clean_data(data):
         filtered.append(item)
     return filtered
 
-def update_rates():
+def update_rates(force=False):
     """更新匯率資料"""
-    rates_data = get_rates()
+    rates_data = get_rates(force)
     if rates_data:
         st.session_state['rates'] = clean_data(rates_data)
         st.session_state['last_update'] = datetime.now()
@@ -122,7 +129,7 @@ with col1:
     st.divider()
     if st.button("🔄 手動更新匯率", use_container_width=True):
         with st.spinner('正在更新匯率...'):
-            if update_rates():
+            if update_rates(force=True):
                 st.success("✅ 已更新匯率!")
                 st.rerun()
             else:
@@ -64,20 +64,32 @@ async def fetch_exchange_rates():
     return pd.DataFrame(data)
 
 # --- 資料載入與快取管理 ---
+# 爬取結果以 st.cache_data 快取 10 分鐘，所有使用者 session 共用同一份，
+# 同時開啟的多個頁面也只會爬一次（失敗時丟出例外，不會被快取）
+@st.cache_data(ttl=600, show_spinner=False)
+def load_exchange_rates():
+    df = asyncio.run(fetch_exchange_rates())
+    if df is None:
+        raise RuntimeError("爬取資料失敗")
+    return df
+
 # 使用 Streamlit 的 session state 來儲存資料，避免每次互動都重爬
 if 'exchange_data' not in st.session_state:
     st.session_state.exchange_data = None
 if 'last_update' not in st.session_state:
     st.session_state.last_update = None
 
-async def update_data():
+def update_data(force=False):
     with st.spinner('正在從台灣銀行抓取最新匯率...'):
-        df = await fetch_exchange_rates()
-        if df is not None:
-            st.session_state.exchange_data = df
-            st.session_state.last_update = datetime.now()
-        else:
+        if force:
+            load_exchange_rates.clear()
+        try:
+            df = load_exchange_rates()
+        except Exception:
             st.error("爬取資料失敗，請檢查網路連線。")
+            return
+        st.session_state.exchange_data = df
+        st.session_state.last_update = datetime.now()
 
 # --- 主程式介面 ---
 def main():
@@ -85,11 +97,11 @@ def main():
 
     # 手動更新按鈕 (需求7)
     if st.button("🔄 手動更新匯率"):
-        asyncio.run(update_data())
+        update_data(force=True)
 
     # 檢查是否需要初次載入
     if st.session_state.exchange_data is None:
-        asyncio.run(update_data())
+        update_data()
 
     # --- 自動更新邏輯 (需求6) ---
     # 使用 st.fragment 讓這塊區域獨立運作，並設定 run_every 達到定時執行
@@ -108,7 +120,7 @@ def main():
         if st.session_state.last_update:
             delta = datetime.now() - st.session_state.last_update
             if delta.total_seconds() > 590: # 約 10 分鐘
-                asyncio.run(update_data())
+                update_data()
                 st.rerun()
 
     auto_refresh_check()
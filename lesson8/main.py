@@ -5,19 +5,72 @@
 """
 
 import asyncio
+import importlib
 import json
+import sys
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
-from threading import Thread
+from threading import Lock, Thread
 from datetime import datetime
 from typing import Optional, List, Dict
 
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
-from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
-
 
 # ============= 爬蟲模組 =============
 
+def load_crawler_modules():
+    """
+    載入 crawl4ai（含 Playwright，需要數秒）
+    
+    只在背景執行緒第一次爬取時呼叫，視窗不必等待它載入。
+    """
+    if "crawl4ai.extraction_strategy" in sys.modules:
+        return
+    for name in ("crawl4ai", "crawl4ai.extraction_strategy"):
+        started = time.perf_counter()
+        importlib.import_module(name)
+        print(f"✓ 載入 {name}（{time.perf_counter() - started:.2f} 秒）")
+
+
+# 台銀牌告匯率約每 10 分鐘才變動，期間內重複的查詢直接使用上次結果
+RATES_URL = 'https://rate.bot.com.tw/xrt?Lang=zh-TW'
+RATES_CACHE_TTL = 600.0
+
+_rates_cache = {"data": None, "fetched_at": 0.0, "hits": 0, "misses": 0}
+# 同時只進行一次爬取；等待中的請求取得同一份結果
+_rates_lock = Lock()
+
+
+def fetch_exchange_rates_cached(ttl: float = RATES_CACHE_TTL) -> Optional[List[Dict[str, str]]]:
+    """
+    取得匯率資訊（ttl 秒內的結果直接返回，不重新爬取）
+    
+    在背景執行緒中呼叫；同時有多個請求時只爬一次。
+    
+    Args:
+        ttl: 快取有效秒數，0 表示強制重新爬取
+    
+    Returns:
+        匯率資料列表，失敗時返回 None（失敗不快取）
+    """
+    with _rates_lock:
+        if _rates_cache["data"] is not None and time.monotonic() - _rates_cache["fetched_at"] < ttl:
+            _rates_cache["hits"] += 1
+            print(f"✓ 使用快取匯率（命中 {_rates_cache['hits']}、未命中 {_rates_cache['misses']}）")
+            return _rates_cache["data"]
+        
+        _rates_cache["misses"] += 1
+        loop = asyncio.new_event_loop()
+        try:
+            data = loop.run_until_complete(fetch_exchange_rates())
+        finally:
+            loop.close()
+        if data is not None:
+            _rates_cache["data"] = data
+            _rates_cache["fetched_at"] = time.monotonic()
+        return data
+
+
 async def fetch_exchange_rates() -> Optional[List[Dict[str, str]]]:
     """
     爬取台灣銀行匯率資訊
@@ -35,6 +88,10 @@ async def fetch_exchange_rates() -> Optional[List[Dict[str, str]]]:
         失敗時返回 None
     """
     try:
+        load_crawler_modules()
+        from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
+        from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
+        
         # 定義資料提取 schema
         schema = {
             "name": "匯率資訊",
@@ -69,8 +126,7 @@ async def fetch_exchange_rates() -> Optional[List[Dict[str, str]]]:
 
         # 執行爬蟲
         async with AsyncWebCrawler() as crawler:
-            url = 'https://rate.bot.com.tw/xrt?Lang=zh-TW'
-            result = await crawler.arun(url=url, config=run_config)
+            result = await crawler.arun(url=RATES_URL, config=run_config)
             data = json.loads(result.extracted_content)
             
             # 清理資料
@@ -279,10 +335,16 @@ class ExchangeRateApp(tk.Tk):
     def _manual_update(self):
         """手動更新匯率"""
         if not self.is_loading:
-            self._fetch_data_thread()
+            # 使用者明確要求更新：不使用快取
+            self._fetch_data_thread(ttl=0)
     
-    def _fetch_data_thread(self):
-        """在背景執行緒中爬取資料"""
+    def _fetch_data_thread(self, ttl: float = RATES_CACHE_TTL):
+        """
+        在背景執行緒中爬取資料
+        
+        Args:
+            ttl: 快取有效秒數，0 表示強制重新爬取
+        """
         if self.is_loading:
             return
         
@@ -290,17 +352,14 @@ class ExchangeRateApp(tk.Tk):
         self._show_loading()
         
         def run_async():
-            """在新的事件迴圈中執行非同步函數"""
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+            """在背景執行緒取得匯率（ttl 秒內的結果由快取返回）"""
             try:
-                data = loop.run_until_complete(fetch_exchange_rates())
+                data = fetch_exchange_rates_cached(ttl)
                 # 使用 after 確保在主執行緒中更新 UI
                 self.after(0, lambda: self._update_ui_with_data(data))
             except Exception as e:
                 self.after(0, lambda: self._show_error(f"爬蟲失敗: {str(e)}"))
             finally:
-                loop.close()
                 self.is_loading = False
         
         # 啟動背景執行緒
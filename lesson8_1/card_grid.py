@@ -0,0 +1,189 @@
+"""
+虛擬化的觀察清單
+
+觀察清單達到數百、上千支股票時，為每支股票建立一張卡片會讓元件數量
+與版面計算跟著清單線性成長。VirtualCardGrid 只維護「填滿可視區域」
+所需的少量 StockCard，捲動時把它們改綁到新進入畫面的股票代碼；
+畫面外的股票只是資料，不佔用任何元件。
+
+- 每張卡片以 Canvas window 固定大小放置，列高固定，捲動範圍由總列數計算
+- 捲動或視窗大小改變時重新計算可視範圍，仍在畫面內的股票保留原卡片
+- 卡片池只會成長到可視範圍需要的大小，與清單長度無關
+"""
+
+import math
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, List, Optional, Set
+
+from quote import Quote
+from stock_card import StockCard
+from tick_buffer import TickRing
+
+
+class VirtualCardGrid:
+    """只實體化可視卡片的股票卡片網格"""
+
+    def __init__(
+        self,
+        parent,
+        on_remove: Callable[[str], None],
+        get_data: Callable[[str], Optional[Quote]],
+        get_ticks: Callable[[str], Optional[TickRing]] = lambda code: None,
+        columns: int = 3,
+        row_height: int = 410,
+        overscan_rows: int = 1
+    ):
+        """
+        Args:
+            parent: 放置 Canvas 與捲軸的容器
+            on_remove: 卡片移除按鈕的回調，參數為股票代碼
+            get_data: 依股票代碼取得目前報價（沒有資料時返回 None）
+            get_ticks: 依股票代碼取得盤中報價緩衝區（畫走勢用）
+            columns: 每列的卡片數
+            row_height: 每列的高度（像素）
+            overscan_rows: 可視範圍上下多準備的列數，減少捲動時的空白
+        """
+        self.on_remove = on_remove
+        self.get_data = get_data
+        self.get_ticks = get_ticks
+        self.columns = columns
+        self.row_height = row_height
+        self.overscan_rows = overscan_rows
+
+        self.canvas = tk.Canvas(parent, highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self._on_scrollbar)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.pack(side="left", fill="both", expand=True, padx=5, pady=5)
+        self.scrollbar.pack(side="right", fill="y")
+
+        # 空狀態提示
+        self._empty_item = self.canvas.create_text(
+            20, 50,
+            text="📊 尚未加入任何股票\n\n請從左側清單選擇股票加入觀察",
+            font=('Arial', 12),
+            fill='gray',
+            anchor="nw"
+        )
+
+        self._codes: List[str] = []
+        # 卡片池：(卡片, Canvas window 項目)
+        self._pool: List[tuple] = []
+        # 目前可視的股票代碼 -> 卡片池索引
+        self._bound: Dict[str, int] = {}
+        self._render_pending = False
+
+        self.canvas.bind("<Configure>", lambda e: self._schedule_render())
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.bind_all(sequence, self._on_mousewheel, add="+")
+
+    # ==================== 對外介面 ====================
+
+    @property
+    def pool_size(self) -> int:
+        """目前實體化的卡片數"""
+        return len(self._pool)
+
+    @property
+    def visible_codes(self) -> Set[str]:
+        """目前綁定卡片（在可視範圍內）的股票代碼"""
+        return set(self._bound)
+
+    def set_codes(self, stock_codes: List[str]):
+        """
+        設定要顯示的股票代碼（已排序），只重新綁定可視範圍內的卡片
+
+        Args:
+            stock_codes: 股票代碼列表
+        """
+        self._codes = list(stock_codes)
+        rows = math.ceil(len(self._codes) / self.columns)
+        self.canvas.configure(scrollregion=(0, 0, 0, rows * self.row_height))
+        self.canvas.itemconfigure(self._empty_item, state="hidden" if self._codes else "normal")
+        self._render()
+
+    def refresh(self, stock_code: str):
+        """
+        更新單一股票的卡片（不在可視範圍內時不做任何事）
+
+        Args:
+            stock_code: 股票代碼
+        """
+        index = self._bound.get(stock_code)
+        if index is not None:
+            self._pool[index][0].update(self.get_data(stock_code), self.get_ticks(stock_code))
+
+    # ==================== 捲動與繪製 ====================
+
+    def _on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+        self._render()
+
+    def _on_mousewheel(self, event):
+        # 只處理游標在這個 Canvas（或其中的卡片）上的滾輪事件
+        widget = self.canvas.winfo_containing(event.x_root, event.y_root)
+        while widget is not None and widget is not self.canvas:
+            widget = widget.master
+        if widget is None:
+            return
+        if event.num == 4 or event.delta > 0:
+            self.canvas.yview_scroll(-1, "units")
+        else:
+            self.canvas.yview_scroll(1, "units")
+        self._render()
+
+    def _schedule_render(self):
+        """視窗大小改變時合併成一次繪製"""
+        if not self._render_pending:
+            self._render_pending = True
+            self.canvas.after_idle(self._render)
+
+    def _visible_range(self) -> range:
+        """可視範圍（含 overscan）內的股票索引"""
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.row_height)
+        first_row = max(0, int(top // self.row_height) - self.overscan_rows)
+        last_row = int((top + height) // self.row_height) + self.overscan_rows
+        start = first_row * self.columns
+        stop = min(len(self._codes), (last_row + 1) * self.columns)
+        return range(start, max(start, stop))
+
+    def _new_card(self) -> int:
+        card = StockCard(self.canvas, self.on_remove)
+        item = self.canvas.create_window(0, 0, window=card.frame, anchor="nw", state="hidden")
+        self._pool.append((card, item))
+        return len(self._pool) - 1
+
+    def _render(self):
+        """把卡片池綁定到目前可視範圍的股票並放到對應位置"""
+        self._render_pending = False
+        visible = self._visible_range()
+        visible_codes = {self._codes[i]: i for i in visible}
+
+        # 仍在畫面內的股票保留原卡片，其餘卡片可重新綁定
+        bound = {code: index for code, index in self._bound.items() if code in visible_codes}
+        used = set(bound.values())
+        free = [index for index in range(len(self._pool)) if index not in used]
+
+        card_width = max(1, self.canvas.winfo_width() // self.columns)
+        for code, position in visible_codes.items():
+            index = bound.get(code)
+            if index is None:
+                index = free.pop() if free else self._new_card()
+                bound[code] = index
+            card, item = self._pool[index]
+            card.bind_code(code)
+            card.update(self.get_data(code), self.get_ticks(code))
+            row, column = divmod(position, self.columns)
+            self.canvas.coords(item, column * card_width, row * self.row_height)
+            self.canvas.itemconfigure(
+                item,
+                width=card_width - 10,
+                height=self.row_height - 10,
+                state="normal"
+            )
+
+        # 用不到的卡片隱藏起來，留待之後重新綁定
+        for index in free:
+            self.canvas.itemconfigure(self._pool[index][1], state="hidden")
+        self._bound = bound
@@ -0,0 +1,82 @@
+#比較 full 與 lean 兩種渲染設定檔：每頁下載量與耗時
+import asyncio
+import sys
+import time
+from typing import Dict, List
+
+from crawl4ai import AsyncWebCrawler
+
+from concurrency import AdaptiveConcurrencyLimiter
+from main import build_run_config, fetch_single_stock, get_browser_config
+from render_profile import PageStats, get_render_profile, install_render_profile
+
+
+async def measure_profile(profile_name: str, stock_codes: List[str]) -> Dict:
+    """
+    以指定的渲染設定檔逐一爬取股票頁面，統計平均耗時與下載量
+
+    Args:
+        profile_name: 渲染設定檔名稱
+        stock_codes: 股票代碼列表
+
+    Returns:
+        統計結果字典
+    """
+    profile = get_render_profile(profile_name)
+    base_config = build_run_config(profile_name)
+    # 逐頁量測，避免頁面互相搶資源影響時間
+    limiter = AdaptiveConcurrencyLimiter(initial=1, min_limit=1, max_limit=1)
+
+    pages = []
+    async with AsyncWebCrawler(config=get_browser_config()) as crawler:
+        install_render_profile(crawler, profile)
+        for code in stock_codes:
+            stats = PageStats()
+            start = time.perf_counter()
+            data = await fetch_single_stock(crawler, code, base_config, limiter, stats=stats)
+            elapsed = time.perf_counter() - start
+            pages.append((code, data is not None, elapsed, stats))
+            print(f"  [{profile_name}] {code}: {elapsed:.2f}s, "
+                  f"{stats.bytes_received / 1024:.0f} KB, "
+                  f"請求 {stats.requests}，中止 {stats.blocked}")
+
+    ok_pages = [p for p in pages if p[1]]
+    n = len(ok_pages) or 1
+    return {
+        "profile": profile_name,
+        "success": len(ok_pages),
+        "total": len(pages),
+        "avg_seconds": sum(p[2] for p in ok_pages) / n,
+        "avg_bytes": sum(p[3].bytes_received for p in ok_pages) / n,
+        "avg_requests": sum(p[3].requests for p in ok_pages) / n,
+        "avg_blocked": sum(p[3].blocked for p in ok_pages) / n,
+    }
+
+
+async def main():
+    """主程式：比較 full 與 lean 設定檔"""
+    stock_codes = sys.argv[1:] or ["2330", "2317", "2454", "2412", "2308"]
+
+    print("量測 full 設定檔（目前行為）...")
+    full = await measure_profile("full", stock_codes)
+    print("量測 lean 設定檔...")
+    lean = await measure_profile("lean", stock_codes)
+
+    print("\n" + "=" * 60)
+    print(f"{'設定檔':<8}{'成功':>8}{'平均耗時(s)':>14}{'平均下載(KB)':>16}{'平均請求':>10}{'平均中止':>10}")
+    print("-" * 60)
+    for r in (full, lean):
+        print(f"{r['profile']:<8}{r['success']:>5}/{r['total']:<2}{r['avg_seconds']:>14.2f}"
+              f"{r['avg_bytes'] / 1024:>16.0f}{r['avg_requests']:>10.1f}{r['avg_blocked']:>10.1f}")
+    print("-" * 60)
+
+    saved_seconds = full["avg_seconds"] - lean["avg_seconds"]
+    saved_bytes = full["avg_bytes"] - lean["avg_bytes"]
+    print(f"每頁節省時間: {saved_seconds:.2f}s "
+          f"({saved_seconds / full['avg_seconds'] * 100 if full['avg_seconds'] else 0:.0f}%)")
+    print(f"每頁節省下載: {saved_bytes / 1024:.0f} KB "
+          f"({saved_bytes / full['avg_bytes'] * 100 if full['avg_bytes'] else 0:.0f}%)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
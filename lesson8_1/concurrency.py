@@ -0,0 +1,178 @@
+"""
+自適應並行控制（AIMD）
+
+取代固定的 asyncio.Semaphore(3)：
+- 延遲與錯誤率健康時，每完成「目前上限」筆請求就把上限加 1（加法增加）
+- 發生逾時或失敗時，把上限乘上 decrease_factor（乘法減少）
+- 上限永遠介於 min_limit 與 max_limit 之間，可透過 limit 屬性觀察
+
+用法:
+    limiter = AdaptiveConcurrencyLimiter(initial=3, min_limit=1, max_limit=16)
+
+    async with limiter.slot() as slot:
+        result = await crawler.arun(...)
+        if not result.success:
+            slot.fail()
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Optional, Tuple
+
+
+def default_max_limit() -> int:
+    """依 CPU 核心數決定預設的並行上限"""
+    return max(4, min(32, (os.cpu_count() or 4) * 2))
+
+
+class ConcurrencySlot:
+    """一次取得的並行名額，用來回報該次請求是否失敗"""
+
+    __slots__ = ("failed",)
+
+    def __init__(self):
+        self.failed = False
+
+    def fail(self):
+        """標記這次請求失敗（逾時、下載失敗或解析失敗）"""
+        self.failed = True
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD 並行上限控制器"""
+
+    def __init__(
+        self,
+        initial: int = 3,
+        min_limit: int = 1,
+        max_limit: Optional[int] = None,
+        target_latency: float = 10.0,
+        max_error_rate: float = 0.2,
+        decrease_factor: float = 0.5,
+        window: int = 20
+    ):
+        """
+        Args:
+            initial: 初始並行上限
+            min_limit: 並行上限下限（floor）
+            max_limit: 並行上限上限（ceiling），預設依 CPU 核心數
+            target_latency: 平均延遲（秒）低於此值才會繼續增加上限
+            max_error_rate: 近期錯誤率低於此值才會繼續增加上限
+            decrease_factor: 失敗時上限乘上的比例
+            window: 計算平均延遲與錯誤率的最近請求筆數
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit or default_max_limit())
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+        self.decrease_factor = decrease_factor
+
+        self._limit = min(max(initial, self.min_limit), self.max_limit)
+        self._in_flight = 0
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self._successes_since_change = 0
+        self._completed_since_decrease = self._limit
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def limit(self) -> int:
+        """目前的並行上限"""
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        """目前正在執行的請求數量"""
+        return self._in_flight
+
+    @property
+    def error_rate(self) -> float:
+        """最近 window 筆請求的錯誤率"""
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    @property
+    def average_latency(self) -> float:
+        """最近 window 筆成功請求的平均延遲（秒）"""
+        latencies = [latency for latency, ok in self._samples if ok]
+        return sum(latencies) / len(latencies) if latencies else 0.0
+
+    def _get_condition(self) -> asyncio.Condition:
+        # 延遲建立，確保綁定到實際使用的事件迴圈
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self):
+        """等待直到正在執行的數量低於目前上限"""
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self._in_flight < self._limit)
+            self._in_flight += 1
+
+    async def release(self, latency: Optional[float], ok: bool):
+        """
+        歸還名額並依結果調整上限
+
+        Args:
+            latency: 這次請求花費的秒數，None 表示不列入統計（例如被取消）
+            ok: 這次請求是否成功
+        """
+        condition = self._get_condition()
+        async with condition:
+            self._in_flight -= 1
+            if latency is not None:
+                self._record(latency, ok)
+            condition.notify_all()
+
+    def _record(self, latency: float, ok: bool):
+        """記錄一筆結果並執行 AIMD 調整"""
+        self._samples.append((latency, ok))
+        self._completed_since_decrease += 1
+
+        if not ok or latency > self.target_latency * 2:
+            # 同一批在途請求的失敗只降一次，避免連續失敗把上限直接壓到底
+            if self._completed_since_decrease >= self._limit:
+                self._limit = max(self.min_limit, int(self._limit * self.decrease_factor))
+                self._completed_since_decrease = 0
+            self._successes_since_change = 0
+            return
+
+        healthy = (
+            self.error_rate <= self.max_error_rate
+            and self.average_latency <= self.target_latency
+        )
+        if not healthy:
+            return
+
+        self._successes_since_change += 1
+        if self._successes_since_change >= self._limit and self._limit < self.max_limit:
+            self._limit += 1
+            self._successes_since_change = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        取得一個並行名額；區塊內拋出例外或呼叫 slot.fail() 都視為失敗
+
+        Yields:
+            ConcurrencySlot 實例
+        """
+        await self.acquire()
+        slot = ConcurrencySlot()
+        start = time.monotonic()
+        latency = None
+        try:
+            yield slot
+            latency = time.monotonic() - start
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            slot.fail()
+            latency = time.monotonic() - start
+            raise
+        finally:
+            await self.release(latency, not slot.failed)
@@ -0,0 +1,208 @@
+"""
+爬取結果快取（依 URL 類別設定 TTL）
+
+所有爬蟲都使用 CacheMode.BYPASS，間隔幾秒的兩次更新（手動＋自動、兩個視窗）
+都會各自連網、各自開頁面。CrawlCache 以「URL + Schema 指紋」為鍵快取擷取結果：
+
+- TTL 依 URL 類別決定：台銀牌告匯率 10 分鐘；wantgoo 報價交易時段 10 秒、休市 10 分鐘
+- 同一個鍵同時有多個請求時只會真的爬一次，其餘請求等待同一個結果（in-flight 合併）；
+  合併使用 concurrent.futures.Future，不同執行緒／事件迴圈的請求也能共用
+- 超過 max_entries 時淘汰最久未使用的項目（LRU）
+- stats 記錄命中、未命中、合併與淘汰次數
+
+失敗（例外或 None）不會被快取，下一次請求會重新爬取。
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple, Union
+
+from market_session import ACTIVE_PHASES, MarketCalendar
+
+
+# TTL：固定秒數，或每次計算的函式
+Ttl = Union[float, Callable[[], float]]
+
+
+def session_ttl(active: float, closed: float, calendar: Optional[MarketCalendar] = None) -> Callable[[], float]:
+    """
+    依台股交易時段決定 TTL
+
+    Args:
+        active: 盤前試撮與一般交易時段的 TTL（秒）
+        closed: 其他時段的 TTL（秒）
+        calendar: 交易行事曆，預設在第一次使用時從休市日檔案載入
+
+    Returns:
+        回傳目前 TTL 的函式
+    """
+    loaded = [calendar]
+
+    def ttl() -> float:
+        if loaded[0] is None:
+            loaded[0] = MarketCalendar.load()
+        return active if loaded[0].phase() in ACTIVE_PHASES else closed
+
+    return ttl
+
+
+# (URL 正規表示式, TTL)，依序比對第一個符合的規則
+DEFAULT_TTL_RULES: Sequence[Tuple[str, Ttl]] = (
+    (r"^https?://rate\.bot\.com\.tw/xrt", 600.0),
+    # 交易時段的 TTL 要短於 RefreshScheduler 最短的更新週期（15 秒 ±15%），
+    # 否則排程到期的更新會拿到舊結果
+    (r"^https?://www\.wantgoo\.com/", session_ttl(10.0, 600.0)),
+)
+DEFAULT_TTL = 30.0
+
+
+def schema_fingerprint(schema: Optional[Dict]) -> str:
+    """Schema 內容的指紋（Schema 改變時快取自然失效）"""
+    if schema is None:
+        return ""
+    text = json.dumps(schema, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class _FetchCancelled(Exception):
+    """負責爬取的請求被取消（通知等待同一個鍵的其他請求重新爬取）"""
+
+
+class CacheStats:
+    """快取統計"""
+
+    __slots__ = ("hits", "misses", "coalesced", "evictions")
+
+    def __init__(self):
+        self.hits = 0        # 直接由快取返回
+        self.misses = 0      # 實際執行爬取
+        self.coalesced = 0   # 等待同一鍵進行中的爬取
+        self.evictions = 0   # LRU 淘汰
+
+    def summary(self) -> str:
+        """統計摘要文字"""
+        requests = self.hits + self.misses + self.coalesced
+        saved = self.hits + self.coalesced
+        rate = saved / requests * 100 if requests else 0.0
+        return (f"快取命中 {self.hits}、合併 {self.coalesced}、未命中 {self.misses}"
+                f"（省下 {rate:.0f}% 爬取），淘汰 {self.evictions}")
+
+
+class CrawlCache:
+    """以 URL + Schema 指紋為鍵、TTL + LRU 的爬取結果快取（可跨執行緒使用）"""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_rules: Sequence[Tuple[str, Ttl]] = DEFAULT_TTL_RULES,
+        default_ttl: Ttl = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            max_entries: 最多保留的項目數
+            ttl_rules: (URL 正規表示式, TTL) 規則
+            default_ttl: 沒有規則符合時的 TTL
+            clock: 取得目前時間（秒）的函式
+        """
+        self.max_entries = max_entries
+        self.ttl_rules = [(re.compile(pattern), ttl) for pattern, ttl in ttl_rules]
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.stats = CacheStats()
+
+        # 鍵 -> (到期時間, 結果)，依使用順序排列（最近使用的在後）
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def ttl_for(self, url: str) -> float:
+        """取得 URL 的 TTL（秒）"""
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                break
+        else:
+            ttl = self.default_ttl
+        return ttl() if callable(ttl) else ttl
+
+    async def get_or_fetch(
+        self,
+        url: str,
+        fetch: Callable[[], Awaitable[Any]],
+        schema: Optional[Dict] = None
+    ) -> Any:
+        """
+        有未過期的結果時直接返回，否則執行 fetch()（同一鍵同時只執行一次）
+
+        Args:
+            url: 爬取的 URL
+            fetch: 實際爬取的函式，返回 None 表示失敗（不快取）
+            schema: 擷取 Schema（不同 Schema 的結果分開快取）
+
+        Returns:
+            fetch() 的結果
+        """
+        key = (url, schema_fingerprint(schema))
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if entry[0] > self.clock():
+                        self._entries.move_to_end(key)
+                        self.stats.hits += 1
+                        return entry[1]
+                    del self._entries[key]
+
+                pending = self._inflight.get(key)
+                if pending is None:
+                    self.stats.misses += 1
+                    self._inflight[key] = future = Future()
+                    break
+                self.stats.coalesced += 1
+
+            # shield：等待者被取消時不能連帶取消共用的 Future（其他等待者還在等）
+            try:
+                return await asyncio.shield(asyncio.wrap_future(pending))
+            except _FetchCancelled:
+                # 負責爬取的請求被取消，改由這個請求重新爬取
+                continue
+
+        try:
+            value = await fetch()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            if not future.done():
+                # 取消只影響負責爬取的請求本身，等待者收到 _FetchCancelled 後重新爬取
+                future.set_exception(_FetchCancelled() if isinstance(e, asyncio.CancelledError) else e)
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            if value is not None:
+                self._entries[key] = (self.clock() + self.ttl_for(url), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats.evictions += 1
+        if not future.done():
+            future.set_result(value)
+        return value
+
+    def invalidate(self, url: Optional[str] = None):
+        """移除某個 URL（不分 Schema）的快取，None 表示全部清除"""
+        with self._lock:
+            if url is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == url]:
+                    del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
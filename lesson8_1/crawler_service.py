@@ -0,0 +1,250 @@
+"""
+常駐爬蟲服務
+
+在一條背景執行緒中維持一個長駐的 asyncio 事件迴圈與一個已啟動的
+AsyncWebCrawler（Chromium），GUI 每次更新只需提交工作即可，
+不必每次重新建立事件迴圈與啟動瀏覽器。
+
+crawl4ai 只在背景執行緒啟動瀏覽器時才 import，建立服務物件不會拖慢 GUI 啟動。
+
+用法:
+    service = CrawlerService(browser_config_factory=lambda: BrowserConfig(headless=True))
+    service.start()
+    future = service.submit(lambda crawler: fetch_multiple_stocks(codes, crawler=crawler))
+    ...
+    service.shutdown()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from crawl4ai import AsyncWebCrawler, BrowserConfig
+
+
+# 預熱用的空白頁面（crawl4ai 支援 raw: 前綴直接載入 HTML）
+WARMUP_URL = "raw:<html><body></body></html>"
+
+
+class CrawlerService:
+    """在背景執行緒中常駐的爬蟲服務"""
+
+    def __init__(
+        self,
+        browser_config: Optional[BrowserConfig] = None,
+        warm_pages: int = 3,
+        source_factory: Optional[Callable[[AsyncWebCrawler], Any]] = None,
+        browser_config_factory: Optional[Callable[[], BrowserConfig]] = None
+    ):
+        """
+        初始化爬蟲服務（尚未啟動）
+
+        Args:
+            browser_config: 瀏覽器設定，預設為 headless Chromium
+            warm_pages: 啟動時預先開啟的頁面數量（通常等於並行上限）
+            source_factory: 瀏覽器啟動後用來建立常駐報價來源的函式，
+                建立的來源會存在 self.source，並在 shutdown 時一併關閉
+            browser_config_factory: 未提供 browser_config 時，於背景執行緒中
+                建立瀏覽器設定的函式（避免在呼叫端 import crawl4ai）
+        """
+        self.browser_config = browser_config
+        self.browser_config_factory = browser_config_factory
+        self.warm_pages = warm_pages
+        self.source_factory = source_factory
+        self.source = None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._crawler: Optional[AsyncWebCrawler] = None
+        self._startup: Optional[Future] = None
+        self._lock = threading.Lock()
+        # shutdown 進行中（瀏覽器關閉需要幾秒）；期間提交的工作先暫存，關閉完成後重新啟動再執行
+        self._stopping = False
+        self._deferred: List[Tuple[Callable[[AsyncWebCrawler], Awaitable[Any]], Future]] = []
+        self._restart = False
+
+    @property
+    def is_running(self) -> bool:
+        """服務的事件迴圈是否仍在執行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """啟動背景事件迴圈，並非同步地啟動瀏覽器（不會阻塞呼叫端）"""
+        with self._lock:
+            if self._stopping:
+                # shutdown 進行中：關閉完成後再重新啟動
+                self._restart = True
+                return
+            self._start_locked()
+
+    def _start_locked(self):
+        """啟動背景事件迴圈（呼叫端需持有 _lock）"""
+        if self.is_running:
+            return
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            name="CrawlerService",
+            daemon=True
+        )
+        self._thread.start()
+
+        # 瀏覽器啟動也在背景迴圈中進行，提交的工作會等待它完成
+        self._startup = asyncio.run_coroutine_threadsafe(self._start_crawler(), self._loop)
+
+    def _run_loop(self):
+        """背景執行緒主體：執行事件迴圈直到 shutdown"""
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _start_crawler(self) -> AsyncWebCrawler:
+        """啟動瀏覽器並預先開啟頁面與 context"""
+        from crawl4ai import AsyncWebCrawler, BrowserConfig, CacheMode, CrawlerRunConfig
+
+        if self.browser_config is None:
+            if self.browser_config_factory is not None:
+                self.browser_config = self.browser_config_factory()
+            else:
+                self.browser_config = BrowserConfig(headless=True)
+
+        crawler = AsyncWebCrawler(config=self.browser_config)
+        await crawler.start()
+        self._crawler = crawler
+
+        # 預熱：以與正式爬取相同的設定開幾個空白頁，讓 context 先建立起來
+        warmup_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS, verbose=False)
+        warmups = [
+            crawler.arun(url=WARMUP_URL, config=warmup_config)
+            for _ in range(max(1, self.warm_pages))
+        ]
+        await asyncio.gather(*warmups, return_exceptions=True)
+
+        if self.source_factory is not None:
+            self.source = self.source_factory(crawler)
+
+        print("✓ 爬蟲服務已啟動（瀏覽器預熱完成）")
+        return crawler
+
+    def submit(self, job: Callable[[AsyncWebCrawler], Awaitable[Any]]) -> Future:
+        """
+        提交一個爬蟲工作到背景迴圈
+        
+        shutdown 進行中時不會阻塞呼叫端：工作先暫存，關閉完成後重新啟動服務再執行，
+        避免拿到正在關閉的瀏覽器，或排進即將停止的迴圈而永遠不會完成。
+
+        Args:
+            job: 接收已啟動 crawler、回傳 coroutine 的函式
+
+        Returns:
+            concurrent.futures.Future，可用 add_done_callback 取得結果
+        """
+        with self._lock:
+            if self._stopping:
+                future = Future()
+                self._deferred.append((job, future))
+                return future
+            self._start_locked()
+            return self._schedule_locked(job)
+
+    def _schedule_locked(self, job: Callable[[AsyncWebCrawler], Awaitable[Any]]) -> Future:
+        """把工作排進背景迴圈（呼叫端需持有 _lock，服務已啟動）"""
+        startup = self._startup
+
+        async def _run():
+            # 等待瀏覽器啟動完成（已完成時會立即返回）
+            crawler = await asyncio.wrap_future(startup)
+            return await job(crawler)
+
+        return asyncio.run_coroutine_threadsafe(_run(), self._loop)
+
+    def shutdown(self, timeout: float = 10.0, restart_deferred: bool = True):
+        """
+        關閉瀏覽器並停止背景迴圈
+
+        Args:
+            timeout: 等待瀏覽器關閉與執行緒結束的秒數
+            restart_deferred: 關閉期間有新提交的工作時，關閉完成後重新啟動服務執行；
+                False 時取消這些工作（例如關閉視窗）
+        """
+        with self._lock:
+            if not restart_deferred:
+                # 另一條執行緒的 shutdown 完成後也不要再重新啟動
+                self._restart = False
+                self._cancel_deferred_locked()
+            if not self.is_running:
+                return
+            stopping = self._stopping
+            self._stopping = True
+            loop = self._loop
+            thread = self._thread
+        if stopping:
+            # 另一條執行緒正在關閉：要求不重新啟動時等它關閉完成
+            if not restart_deferred:
+                thread.join(timeout)
+            return
+
+        async def _close():
+            # 取消尚在執行的爬蟲工作，再關閉瀏覽器
+            current = asyncio.current_task()
+            pending = [t for t in asyncio.all_tasks() if t is not current]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            if self.source is not None:
+                await self.source.close()
+                self.source = None
+            if self._crawler is not None:
+                await self._crawler.close()
+                self._crawler = None
+
+        # 關閉期間不持有 _lock，submit() 不會被阻塞（改為暫存工作）
+        try:
+            asyncio.run_coroutine_threadsafe(_close(), loop).result(timeout)
+        except Exception as e:
+            print(f"✗ 關閉爬蟲服務時發生錯誤: {e}")
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+
+        with self._lock:
+            self._stopping = False
+            self._thread = None
+            self._loop = None
+            self._startup = None
+            if not restart_deferred:
+                self._restart = False
+                self._cancel_deferred_locked()
+            deferred, self._deferred = self._deferred, []
+            restart, self._restart = self._restart or bool(deferred), False
+            if restart:
+                print(f"🔄 關閉期間有新的爬蟲工作（{len(deferred)} 個），重新啟動爬蟲服務")
+                self._start_locked()
+                for job, future in deferred:
+                    _chain_future(self._schedule_locked(job), future)
+
+    def _cancel_deferred_locked(self):
+        """取消暫存的工作（呼叫端需持有 _lock）"""
+        deferred, self._deferred = self._deferred, []
+        for _, future in deferred:
+            future.cancel()
+
+
+def _chain_future(source: Future, target: Future):
+    """source 完成時把結果（或例外、取消）轉交給 target"""
+    def copy(done: Future):
+        if done.cancelled():
+            target.cancel()
+        elif done.exception() is not None:
+            target.set_exception(done.exception())
+        else:
+            target.set_result(done.result())
+
+    source.add_done_callback(copy)
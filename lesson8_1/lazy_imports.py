@@ -0,0 +1,140 @@
+"""
+延後載入重量級相依套件
+
+crawl4ai 會連帶載入 Playwright 與大量相依套件，若在模組最上方 import，
+GUI 視窗要等好幾秒才會出現。BackgroundImporter 在背景執行緒依序 import
+指定的模組並記錄各自的耗時，完成後通知呼叫端啟用爬蟲功能。
+
+profile_imports() 以 `python -X importtime` 在子行程中量測，
+依模組列出累計 import 時間，執行本檔即可看到：
+
+    python lazy_imports.py crawl4ai twstock aiohttp
+"""
+
+import importlib
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# 爬蟲功能需要的重量級模組
+CRAWLER_MODULES = ("aiohttp", "crawl4ai", "crawl4ai.extraction_strategy")
+
+
+class BackgroundImporter:
+    """在背景執行緒 import 模組並記錄耗時"""
+
+    def __init__(
+        self,
+        modules: Sequence[str] = CRAWLER_MODULES,
+        on_done: Optional[Callable[["BackgroundImporter"], None]] = None
+    ):
+        """
+        Args:
+            modules: 要載入的模組名稱（依序載入）
+            on_done: 全部載入（或失敗）後以 importer 本身呼叫，
+                     在背景執行緒中執行，GUI 端應透過佇列轉交給主執行緒
+        """
+        self.modules = list(modules)
+        self.on_done = on_done
+        # 模組名稱 -> 載入秒數
+        self.timings: Dict[str, float] = {}
+        self.error: Optional[BaseException] = None
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        """是否已全部成功載入"""
+        return self._done.is_set() and self.error is None
+
+    def start(self) -> "BackgroundImporter":
+        """開始背景載入（重複呼叫無作用）"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="BackgroundImporter", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待載入完成
+
+        Args:
+            timeout: 最多等待秒數，None 表示一直等待
+
+        Returns:
+            是否已全部成功載入
+        """
+        self._done.wait(timeout)
+        return self.ready
+
+    def _run(self):
+        try:
+            for name in self.modules:
+                started = time.perf_counter()
+                importlib.import_module(name)
+                self.timings[name] = time.perf_counter() - started
+        except BaseException as e:
+            self.error = e
+        finally:
+            self._done.set()
+            if self.on_done is not None:
+                self.on_done(self)
+
+    def summary(self) -> str:
+        """各模組載入耗時的摘要文字"""
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in self.timings.items()]
+        if self.error is not None:
+            parts.append(f"失敗: {self.error}")
+        return "、".join(parts)
+
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_imports(modules: Sequence[str], top: int = 25) -> List[Tuple[str, float, float]]:
+    """
+    以 `python -X importtime` 量測在全新行程中 import 指定模組的耗時
+
+    Args:
+        modules: 要量測的模組名稱
+        top: 只回傳累計耗時最長的前幾個模組
+
+    Returns:
+        (模組名稱, 自身耗時 ms, 累計耗時 ms) 列表，依累計耗時由大到小排序
+    """
+    script = "; ".join(f"import {name}" for name in modules)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True
+    )
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            rows.append((name, int(self_us) / 1000, int(cumulative_us) / 1000))
+    if completed.returncode != 0 and not rows:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "import 失敗")
+
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows[:top]
+
+
+if __name__ == "__main__":
+    targets = sys.argv[1:] or ["crawl4ai", "twstock", "aiohttp"]
+    for target in targets:
+        try:
+            rows = profile_imports([target])
+        except RuntimeError as e:
+            print(f"✗ {target}: {e}")
+            continue
+        print(f"\n{target}（依累計 import 時間排序）")
+        print(f"{'模組':<48}{'自身(ms)':>10}{'累計(ms)':>10}")
+        for name, self_ms, cumulative_ms in rows:
+            print(f"{name:<48}{self_ms:>10.1f}{cumulative_ms:>10.1f}")
@@ -1,9 +1,15 @@
 #lesson8_1_3.py改成 確認所有資料下載完成才抓取資料
+from __future__ import annotations
+
 import asyncio
 import json
-from typing import Dict, List, Optional
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, BrowserConfig, CacheMode
-from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from concurrency import AdaptiveConcurrencyLimiter
+
+# crawl4ai（含 Playwright）載入很慢，只在用到它的函式內才 import
+if TYPE_CHECKING:
+    from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
 
 
 def get_stock_schema() -> Dict:
@@ -80,7 +86,7 @@ async def fetch_stock_info(
     crawler: AsyncWebCrawler, 
     stock_code: str, 
     base_config: CrawlerRunConfig,
-    semaphore: asyncio.Semaphore
+    limiter: AdaptiveConcurrencyLimiter
 ) -> Optional[Dict]:
     """
     抓取單一股票資訊
@@ -89,12 +95,14 @@ async def fetch_stock_info(
         crawler: AsyncWebCrawler 實例
         stock_code: 股票代碼
         base_config: 基礎爬蟲執行設定
-        semaphore: 用於限制並行數量的信號量
+        limiter: 自適應並行控制器（依延遲與失敗率調整並行數量）
     
     Returns:
         股票資訊字典，失敗時返回 None
     """
-    async with semaphore:  # 限制並行數量
+    from crawl4ai import CrawlerRunConfig
+    
+    async with limiter.slot() as slot:  # 限制並行數量
         url = f'https://www.wantgoo.com/stock/{stock_code}/technical-chart'
         
         try:
@@ -121,10 +129,12 @@ async def fetch_stock_info(
                 }
             else:
                 print(f"✗ 股票 {stock_code} 下載失敗")
+                slot.fail()
                 return None
                 
         except Exception as e:
             print(f"✗ 股票 {stock_code} 發生錯誤: {e}")
+            slot.fail()
             return None
 
 
@@ -132,6 +142,9 @@ async def main():
     """主程式：並行爬取多個股票資訊"""
     stock_codes = ["2330", "2317", "2454", "2412", "2308"]
     
+    from crawl4ai import AsyncWebCrawler, BrowserConfig, CacheMode, CrawlerRunConfig
+    from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
+    
     # 建立 Schema 和配置
     stock_schema = get_stock_schema()
     extraction_strategy = JsonCssExtractionStrategy(schema=stock_schema)
@@ -147,15 +160,15 @@ async def main():
     )
     
     # 限制同時爬取的數量（避免對目標網站造成過大負擔）
-    # 降低並行數量，給每個請求更多時間等待動態內容載入
-    semaphore = asyncio.Semaphore(3)
+    # 從 3 開始，延遲與錯誤率正常時逐步增加，逾時或失敗時減半
+    limiter = AdaptiveConcurrencyLimiter(initial=3, min_limit=1)
     
     print("開始爬取股票資訊，等待動態內容載入完成...\n")
     
     # 使用單一 crawler 實例並行爬取所有股票
     async with AsyncWebCrawler(config=browser_config) as crawler:
         tasks = [
-            fetch_stock_info(crawler, code, base_crawler_run_config, semaphore)
+            fetch_stock_info(crawler, code, base_crawler_run_config, limiter)
             for code in stock_codes
         ]
         
@@ -178,6 +191,7 @@ async def main():
                 print("-" * 50)
         
         print(f"\n總計: 成功 {len(successful_results)}/{len(stock_codes)} 筆")
+        print(f"結束時並行上限: {limiter.limit}")
 
 
 if __name__ == "__main__":
@@ -14,28 +14,104 @@
 import asyncio
 import threading
 import time
-import queue
 from tkinter import Tk, Frame, Button, Label, Entry, VERTICAL, RIGHT, Y, BOTH, LEFT, StringVar, END
 from tkinter import font as tkfont
 from tkinter import ttk
 
+from market_session import ACTION_CLOSING_FETCH, ACTION_POLL, ACTION_PREWARM, SessionGate
+from quote import Quote
+from refresh_scheduler import RefreshScheduler
+from render_scheduler import RenderScheduler
+from stock_search import StockSearchIndex, TreeviewSearch
+from ui_wakeup import NotifyingQueue
+from universe_snapshot import ChunkedTreeFill, read_snapshot
+from universe_snapshot import refresh_in_background as refresh_universe_in_background
+
+# 等待背景 asyncio 迴圈就緒的上限（秒）
+BG_START_TIMEOUT = 5.0
+
+# Quote.color_class -> 卡片上的漲跌顏色
+CHANGE_COLORS = {'up': 'red', 'down': 'green', 'flat': 'black'}
+
+
+class UpdateCommandChannel:
+    """
+    背景 asyncio 迴圈中的更新指令通道（方法只能在該迴圈內呼叫，
+    其他執行緒請用 loop.call_soon_threadsafe(channel.submit, ...)）
+
+    - 部分更新（例如剛加入的股票）：合併成一個待處理集合，重複的代碼只抓一次
+    - 全部更新（手動／自動）：新的全部更新會取消仍在執行的上一次，不必排隊等待
+    """
+
+    def __init__(self, fetch_many, publish):
+        self._fetch_many = fetch_many
+        self._publish = publish
+        self._pending = set()
+        self._wakeup = asyncio.Event()
+        self._full_task = None
+        self._closing = False
+        # 統計：被合併的重複代碼、被取消的全部更新
+        self.merged = 0
+        self.cancelled = 0
+
+    def submit(self, symbols, full=False):
+        if full:
+            if self._full_task is not None and not self._full_task.done():
+                self._full_task.cancel()
+                self.cancelled += 1
+            # 全部更新已涵蓋的代碼不必再單獨抓取
+            self._pending.difference_update(symbols)
+            self._full_task = asyncio.ensure_future(self._run(symbols))
+            return
+        for symbol in symbols:
+            if symbol in self._pending:
+                self.merged += 1
+            self._pending.add(symbol)
+        self._wakeup.set()
+
+    async def _run(self, symbols):
+        results = await self._fetch_many(symbols)
+        self._publish(results)
+
+    async def serve(self):
+        # 處理部分更新，直到 close()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self._closing:
+                break
+            symbols, self._pending = self._pending, set()
+            if symbols:
+                try:
+                    await self._run(sorted(symbols))
+                except Exception:
+                    pass
+        if self._full_task is not None:
+            self._full_task.cancel()
+
+    def close(self):
+        self._closing = True
+        self._wakeup.set()
+
 
 class StockMonitorApp:
     def __init__(self, root):
         self.root = root
         self.root.title("股票監控 - lesson8_1_4")
-        self.update_interval = 60_000  # ms, tkinter.after 使用
+        # 自動更新：每支股票各自到期（依優先等級 15~120 秒），每次 tick 只送出到期的股票
+        self.refresh_scheduler = RefreshScheduler()
+        # 休市時只在收盤後抓一次，開盤前預熱背景執行緒
+        self.session_gate = SessionGate()
+        self.closing_fetch_pending = False
+        self.auto_after_id = None
 
         # Data structures
-        # 優先嘗試從 twstock 套件載入完整證券代碼清單，若失敗則使用範例硬編碼清單
-        try:
-            import twstock
-
-            # twstock.codes is a dict of code -> StockCodeInfo
-            self.available_stocks = [(code, info.name) for code, info in twstock.codes.items()]
-            # sort by code for stable ordering
-            self.available_stocks.sort(key=lambda x: x[0])
-        except Exception:
+        # 優先從 mmap 快照載入完整證券代碼清單（twstock 代碼表變動時於背景重建），
+        # 尚無快照時先使用範例硬編碼清單
+        snapshot = read_snapshot()
+        if snapshot is not None:
+            self.available_stocks = [(e.code, e.name) for e in snapshot[1]]
+        else:
             self.available_stocks = [
                 ("2330", "TSMC"),
                 ("2317", "Hon Hai"),
@@ -44,11 +120,16 @@ class StockMonitorApp:
             ]
 
         self.watchlist = []  # list of codes
-        # command queue -> background worker, result_queue -> main UI
-        self.cmd_queue = queue.Queue()
-        self.result_queue = queue.Queue()
+        # code -> card widget references, code -> latest quote
+        self.cards = {}
+        self.latest_quotes = {}
+        # command channel -> background asyncio loop, result_queue -> main UI
+        self.result_queue = NotifyingQueue()
         self.bg_thread = None
-        self.bg_stop_event = threading.Event()
+        self.bg_loop = None
+        self.bg_channel = None
+        self.bg_ready = threading.Event()
+        self.bg_error = None
 
         # 優先設定一個支援中文的預設字型，減少亂碼問題
         try:
@@ -67,8 +148,16 @@ class StockMonitorApp:
         # Build UI
         self._build_ui()
 
-        # Start polling queue
-        self._poll_queue()
+        # 報價更新先標記為 dirty，每幀（33 ms）最多重繪一次
+        self.render_scheduler = RenderScheduler(self.root, self._render_cards)
+
+        # 背景執行緒放入結果時以虛擬事件喚醒主迴圈（不定時輪詢）
+        self.result_queue.attach(self.root, self._process_results)
+
+        # twstock 代碼表有變動時在背景重建快照，完成後透過 result_queue 換上新清單
+        refresh_universe_in_background(
+            lambda entries: self.result_queue.put({"_cmd": "universe", "data": entries})
+        )
 
         # Auto-update flag
         self.auto_update = False
@@ -95,9 +184,10 @@ class StockMonitorApp:
         self.list_font = tkfont.nametofont("TkFixedFont").copy()
         self.list_font.configure(size=10)
         self.listbox = ttk.Treeview(listbox_frame, columns=("name",), show='tree', height=8)
-        for code, name in self.available_stocks:
-            self.listbox.insert('', 'end', iid=code, text=f"{code} - {name}")
         self.listbox.pack(fill='both', expand=True, side=LEFT)
+        self.list_search = None
+        self._list_fill = None
+        self._fill_stock_list()
 
         Button(left_frame, text="加入觀察", command=self._add_selected).pack(pady=4)
 
@@ -113,24 +203,44 @@ class StockMonitorApp:
         Button(ctrl_frame, text="手動更新", command=self.manual_update).pack(side=LEFT, padx=4, pady=4)
         self.auto_btn = Button(ctrl_frame, text="啟動自動", command=self.toggle_auto)
         self.auto_btn.pack(side=LEFT, padx=4)
+        # 交易時段（休市時顯示下次開盤時間）
+        self.session_label = Label(ctrl_frame, text="", fg='gray')
+        self.session_label.pack(side=LEFT, padx=8)
 
         self.cards_frame = Frame(right_frame)
         self.cards_frame.pack(fill=BOTH, expand=True, padx=6, pady=6)
 
+    def _fill_stock_list(self, old_codes=()):
+        # 分批插入（after_idle），視窗可以先顯示；填完後才建立搜尋索引
+        if self._list_fill is not None:
+            self._list_fill.cancel()
+        old_codes = [code for code in old_codes if self.listbox.exists(code)]
+        if old_codes:
+            self.listbox.delete(*old_codes)
+        self.list_search = None
+
+        def on_filled():
+            self.list_search = TreeviewSearch(self.listbox, StockSearchIndex(self.available_stocks))
+            if self.search_var.get().strip():
+                self.list_search.apply(self.search_var.get())
+
+        self._list_fill = ChunkedTreeFill(
+            self.listbox,
+            [(code, {"text": f"{code} - {name}"}) for code, name in self.available_stocks],
+            on_done=on_filled,
+        )
+        self._list_fill.start()
+
+    def _show_universe(self, entries):
+        old_codes = [code for code, _ in self.available_stocks]
+        self.available_stocks = [(e.code, e.name) for e in entries]
+        self.code_name_map = {code: name for code, name in self.available_stocks}
+        self._fill_stock_list(old_codes)
+
     def _filter_list(self):
-        q = self.search_var.get().strip().lower()
-        # filter treeview contents
-        for code, name in self.available_stocks:
-            item_text = f"{code} - {name}"
-            visible = (not q) or (q in code) or (q in name.lower())
-            if visible:
-                if not self.listbox.exists(code):
-                    self.listbox.insert('', 'end', iid=code, text=item_text)
-                else:
-                    self.listbox.item(code, text=item_text)
-            else:
-                if self.listbox.exists(code):
-                    self.listbox.delete(code)
+        # 去抖動後以索引篩選（detach/move 既有項目，不刪除重建）
+        if self.list_search is not None:
+            self.list_search.schedule(self.search_var.get())
 
     def _add_selected(self):
         sel = self.listbox.selection()
@@ -140,10 +250,10 @@ class StockMonitorApp:
         if code in self.watchlist:
             return
         self.watchlist.append(code)
+        self.refresh_scheduler.add([code])
         self._create_card(code)
         # immediately request an update for the newly added code
-        self._ensure_bg_thread()
-        self.cmd_queue.put({"_cmd": "update_now", "symbols": [code]})
+        self._send_update([code])
 
     def _add_by_code(self):
         text = getattr(self, 'code_entry', None)
@@ -160,10 +270,10 @@ class StockMonitorApp:
             return
         # 若 available_stocks 有名稱，則可使用，但不強制存在
         self.watchlist.append(code)
+        self.refresh_scheduler.add([code])
         self._create_card(code)
         # 立即抓取新加入股票的價格
-        self._ensure_bg_thread()
-        self.cmd_queue.put({"_cmd": "update_now", "symbols": [code]})
+        self._send_update([code])
 
     def _create_card(self, code):
         frame = Frame(self.cards_frame, bd=1, relief='solid', padx=8, pady=8, bg='#ffffff')
@@ -188,8 +298,8 @@ class StockMonitorApp:
         remove_btn = Button(frame, text="移除", command=lambda: self._remove_card(code, frame))
         remove_btn.pack(anchor='e')
 
-        # store reference
-        frame._meta = {
+        # store reference (keyed by code for the renderer)
+        frame._meta = self.cards[code] = {
             "code": code,
             "price_label": price_label,
             "change_label": change_label,
@@ -202,14 +312,16 @@ class StockMonitorApp:
     def _remove_card(self, code, frame):
         if code in self.watchlist:
             self.watchlist.remove(code)
+        self.cards.pop(code, None)
+        self.render_scheduler.discard(code)
+        self.refresh_scheduler.remove(code)
         frame.destroy()
 
     def manual_update(self):
         if not self.watchlist:
             return
-        self._ensure_bg_thread()
-        # enqueue a single-run update request
-        self.cmd_queue.put({"_cmd": "update_now", "symbols": list(self.watchlist)})
+        # full refresh: replaces (cancels) a full refresh that is still running
+        self._send_update(self.watchlist, full=True)
 
     def toggle_auto(self):
         self.auto_update = not self.auto_update
@@ -218,75 +330,80 @@ class StockMonitorApp:
             self._ensure_bg_thread()
             # schedule periodic trigger
             self._schedule_auto()
+        elif self.auto_after_id is not None:
+            self.root.after_cancel(self.auto_after_id)
+            self.auto_after_id = None
 
     def _schedule_auto(self):
+        self.auto_after_id = None
         if not self.auto_update:
             return
-        # instruct bg thread to run an update
-        if self.watchlist:
-            self.cmd_queue.put({"_cmd": "update_now", "symbols": list(self.watchlist)})
-        # schedule next
-        self.root.after(self.update_interval, self._schedule_auto)
+        action, wait = self.session_gate.decide()
+        if action != ACTION_POLL:
+            if action == ACTION_CLOSING_FETCH and self.watchlist:
+                # one fetch for the closing quotes, then serve them until the next session
+                # (the gate retries later unless _apply_results reports it fetched)
+                self.closing_fetch_pending = True
+                self._send_update(self.watchlist, full=True)
+            elif action == ACTION_PREWARM:
+                self._ensure_bg_thread()
+            self.session_label.config(text=self.session_gate.status_text())
+            # re-check at least every 30 min (long after() drifts across system sleep)
+            self.auto_after_id = self.root.after(int(min(max(wait, 0.5), 1800.0) * 1000), self._schedule_auto)
+            return
+        self.session_label.config(text=self.session_gate.status_text())
+        # only the symbols that are due (partial update, merged with pending ones in bg)
+        due = self.refresh_scheduler.pop_due()
+        if due:
+            self._send_update(due)
+        # wake up when the next symbol is due (0.5 ~ 60 s)
+        wait = self.refresh_scheduler.seconds_until_next()
+        wait = 60.0 if wait is None else min(max(wait, 0.5), 60.0)
+        self.auto_after_id = self.root.after(int(wait * 1000), self._schedule_auto)
 
     def _ensure_bg_thread(self):
-        if self.bg_thread and self.bg_thread.is_alive():
+        # returns False when the background loop could not be started
+        if not (self.bg_thread and self.bg_thread.is_alive()):
+            self.bg_ready.clear()
+            self.bg_error = None
+            self.bg_thread = threading.Thread(target=self._bg_worker, daemon=True)
+            self.bg_thread.start()
+        # 建立事件迴圈只需要幾毫秒；背景執行緒失敗時也會設定 bg_ready，不會一直等下去
+        if not self.bg_ready.wait(BG_START_TIMEOUT):
+            print(f"background loop not ready after {BG_START_TIMEOUT:.0f}s")
+            return False
+        if self.bg_error is not None:
+            print(f"background loop failed: {self.bg_error}")
+            return False
+        return True
+
+    def _send_update(self, symbols, full=False):
+        if not self._ensure_bg_thread():
             return
-        self.bg_stop_event.clear()
-        self.bg_thread = threading.Thread(target=self._bg_worker, daemon=True)
-        self.bg_thread.start()
-
-    # ---------- formatting helpers ----------
-    def _fmt_number(self, val, ndigits=2):
-        try:
-            f = float(val)
-        except Exception:
-            return str(val)
-        if ndigits == 0:
-            return f"{int(round(f)):,}"
-        fmt = f"{{:,.{ndigits}f}}"
-        return fmt.format(f)
-
-    def _fmt_volume(self, val):
-        try:
-            v = int(float(val))
-        except Exception:
-            return str(val)
-        return f"{v:,}"
-
-    def _color_for_change(self, change_val):
-        try:
-            c = float(change_val)
-        except Exception:
-            return 'black'
-        if c > 0:
-            return 'red'
-        if c < 0:
-            return 'green'
-        return 'black'
+        self.bg_loop.call_soon_threadsafe(self.bg_channel.submit, list(symbols), full)
 
     def _bg_worker(self):
-        # background thread runs an asyncio loop and listens to the queue for update commands
-        asyncio.run(self._bg_async_main())
+        # background thread runs an asyncio loop that serves update commands
+        try:
+            asyncio.run(self._bg_async_main())
+        except Exception as e:
+            self.bg_error = e
+        finally:
+            # wake _ensure_bg_thread even if the loop died before it was ready
+            if not self.bg_ready.is_set():
+                if self.bg_error is None:
+                    self.bg_error = RuntimeError("background loop exited")
+                self.bg_ready.set()
 
     async def _bg_async_main(self):
-        while not self.bg_stop_event.is_set():
-            try:
-                # non-blocking get: if no command, sleep briefly
-                try:
-                    cmd = self.cmd_queue.get_nowait()
-                except queue.Empty:
-                    await asyncio.sleep(0.1)
-                    continue
-
-                if isinstance(cmd, dict) and cmd.get("_cmd") == "update_now":
-                    symbols = cmd.get("symbols", [])
-                    results = await self.fetch_multiple_stocks(symbols)
-                    # put results back for main thread to process
-                    self.result_queue.put({"_cmd": "results", "data": results})
-                else:
-                    await asyncio.sleep(0.1)
-            except Exception:
-                await asyncio.sleep(0.5)
+        # 指令由 Tk 執行緒以 call_soon_threadsafe 送進這個迴圈，沒有指令時不會喚醒
+        self.bg_loop = asyncio.get_running_loop()
+        self.bg_channel = UpdateCommandChannel(
+            self.fetch_multiple_stocks,
+            lambda results: self.result_queue.put({"_cmd": "results", "data": results}),
+        )
+        self.bg_ready.set()
+        await self.bg_channel.serve()
 
     async def fetch_stock_info(self, symbol: str):
         """
@@ -306,18 +423,19 @@ class StockMonitorApp:
         high = round(max(price, open_p) + (hash(symbol + 'h') % 3), 2)
         low = round(min(price, open_p) - (hash(symbol + 'l') % 3), 2)
         volume = (hash(symbol) % 1000) * 100
-        return {
-            "code": symbol,
-            "price": f"{price}",
-            "change": f"{change}",
-            "percent": f"{percent}%",
-            "open": f"{open_p}",
-            "high": f"{high}",
-            "low": f"{low}",
-            "volume": f"{volume}",
-            "prev_close": f"{prev_close}",
-            "time": now,
-        }
+        # 直接建立 Quote（數值欄位＋預先算好的顯示文字），繪製時不再解析字串
+        return Quote(
+            symbol,
+            price=price,
+            change=change,
+            change_pct=percent,
+            open=open_p,
+            high=high,
+            low=low,
+            prev_close=prev_close,
+            volume=volume,
+            update_time=now,
+        )
 
     async def fetch_multiple_stocks(self, symbols):
         """並行抓取多支股票（使用 asyncio.gather）"""
@@ -329,69 +447,53 @@ class StockMonitorApp:
         for item in res:
             if isinstance(item, Exception):
                 continue
-            out[item["code"]] = item
+            out[item.symbol] = item
         return out
 
-    def _poll_queue(self):
-        # poll for results placed into queue by background worker
-        try:
-            while True:
-                item = self.result_queue.get_nowait()
-                if isinstance(item, dict) and item.get("_cmd") == "results":
-                    self._apply_results(item.get("data", {}))
-                # ignore other internal messages
-        except queue.Empty:
-            pass
-        finally:
-            self.root.after(200, self._poll_queue)
+    def _process_results(self, items):
+        # handle one batch of messages placed into queue by background worker
+        for item in items:
+            if isinstance(item, dict) and item.get("_cmd") == "results":
+                self._apply_results(item.get("data", {}))
+            elif isinstance(item, dict) and item.get("_cmd") == "universe":
+                self._show_universe(item.get("data", []))
+            # ignore other internal messages
 
     def _apply_results(self, data: dict):
-        # Update UI cards with new data
-        for child in list(self.cards_frame.winfo_children()):
-            meta = getattr(child, "_meta", None)
-            if not meta:
-                continue
-            code = meta["code"]
-            info = data.get(code)
-            if not info:
+        # 只記錄最新資料並標記為 dirty，由 render_scheduler 依畫面預算批次重繪
+        self.latest_quotes.update(data)
+        if data and self.closing_fetch_pending:
+            self.closing_fetch_pending = False
+            self.session_gate.mark_closing_fetched()
+        self.render_scheduler.mark_dirty_many(code for code in data if code in self.cards)
+        # 波動大的股票縮短更新週期
+        for code, quote in data.items():
+            self.refresh_scheduler.record_quote(code, quote.change_pct)
+
+    def _render_cards(self, codes):
+        # Update UI cards with new data (cards looked up by code, no widget scan)
+        # 顯示文字與漲跌顏色類別已在 Quote 建立時算好，這裡只做 config
+        for code in codes:
+            meta = self.cards.get(code)
+            quote = self.latest_quotes.get(code)
+            if not meta or not quote:
                 continue
-            # price / change / percent with formatting and color
-            price_text = self._fmt_number(info.get('price', ''), ndigits=2)
-            meta["price_label"].config(text=f"價格: {price_text}")
-            # change color
-            change_val = info.get('change', '')
-            change_text = self._fmt_number(change_val, ndigits=2)
-            change_color = self._color_for_change(change_val)
-            if meta.get("change_label"):
-                meta["change_label"].config(text=f"漲跌: {change_text}", fg=change_color)
-            # percent (may be like '1.23%')
-            pct = info.get('percent', '')
-            try:
-                if isinstance(pct, str) and pct.endswith('%'):
-                    pct_num = float(pct.rstrip('%'))
-                    pct_text = f"{pct_num:.2f}%"
-                else:
-                    pct_text = str(pct)
-            except Exception:
-                pct_text = str(pct)
-            if meta.get("percent_label"):
-                meta["percent_label"].config(text=f"漲幅: {pct_text}", fg=change_color)
-            # details: open, high, low
-            o = self._fmt_number(info.get('open', ''), ndigits=2)
-            h = self._fmt_number(info.get('high', ''), ndigits=2)
-            l = self._fmt_number(info.get('low', ''), ndigits=2)
-            if meta.get("detail_label"):
-                meta["detail_label"].config(text=f"開: {o}  最高: {h}  最低: {l}")
-            # extra: volume, prev_close
-            vol = self._fmt_volume(info.get('volume', ''))
-            prev = self._fmt_number(info.get('prev_close', ''), ndigits=2)
-            if meta.get("extra_label"):
-                meta["extra_label"].config(text=f"成交量: {vol}  前收: {prev}")
-            if meta.get("info_label"):
-                meta["info_label"].config(text=f"更新時間: {info.get('time')}")
+            change_color = CHANGE_COLORS[quote.color_class]
+            meta["price_label"].config(text=f"價格: {quote.price_text}")
+            meta["change_label"].config(text=f"漲跌: {quote.change_text}", fg=change_color)
+            meta["percent_label"].config(text=f"漲幅: {quote.change_pct_text}", fg=change_color)
+            meta["detail_label"].config(
+                text=f"開: {quote.open_text}  最高: {quote.high_text}  最低: {quote.low_text}"
+            )
+            meta["extra_label"].config(text=f"成交量: {quote.volume_text}  前收: {quote.prev_close_text}")
+            meta["info_label"].config(text=f"更新時間: {quote.update_time}")
 
     def stop(self):
-        self.bg_stop_event.set()
+        # 不再送出事件：關閉中的背景迴圈不會再呼叫 Tcl
+        self.result_queue.detach()
+        if self.bg_thread and self.bg_thread.is_alive() and self.bg_channel is not None:
+            self.bg_loop.call_soon_threadsafe(self.bg_channel.close)
+        print(self.render_scheduler.stats.summary())
 
 
 def main():
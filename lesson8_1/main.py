@@ -7,17 +7,54 @@
 Author: Created on 2025-12-20
 """
 
+from __future__ import annotations
+
 import asyncio
 import json
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-from typing import Dict, List, Optional, Set
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Set, Tuple
 from datetime import datetime
-import threading
 import queue
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, BrowserConfig, CacheMode
-from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
-import twstock
+import threading
+import time
+
+from card_grid import VirtualCardGrid
+from concurrency import AdaptiveConcurrencyLimiter
+from crawl_cache import CrawlCache
+from crawler_service import CrawlerService
+from lazy_imports import BackgroundImporter
+from market_session import ACTION_AWAIT_CLOSE, ACTION_CLOSING_FETCH, ACTION_POLL, ACTION_PREWARM, SessionGate
+from quote import Quote
+from quote_history import QuoteHistory
+from quote_publisher import QuoteChangeDetector, QuotePublisher
+from render_profile import PageStats, current_page_stats, get_render_profile, install_render_profile
+from refresh_scheduler import RefreshScheduler
+from render_scheduler import RenderScheduler
+from schema_js import (
+    build_readiness_js,
+    compile_extraction_js,
+    current_inpage_extraction,
+    install_inpage_extraction,
+)
+from sharding import ShardedCrawler
+from stock_search import StockSearchIndex, TreeviewSearch
+from tab_pool import TabPool
+from tick_buffer import TickStore
+from ui_wakeup import NotifyingQueue
+from universe_snapshot import (
+    ChunkedTreeFill,
+    UniverseEntry,
+    read_snapshot,
+    refresh_in_background as refresh_universe_in_background,
+)
+from watchlist_snapshot import SnapshotWriter, build_payload, read_snapshot as read_watchlist_snapshot
+
+# crawl4ai（含 Playwright）與 aiohttp 載入很慢，只在實際使用時才 import，
+# GUI 啟動時由 BackgroundImporter 在背景先載入
+if TYPE_CHECKING:
+    import aiohttp
+    from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
 
 
 # ==================== 爬蟲模組 ====================
@@ -26,6 +63,8 @@ def get_stock_schema() -> Dict:
     """
     取得股票資訊的 CSS 提取 Schema
     
+    欄位預設都是頁面就緒的必要條件，設定 "required": False 的欄位不會延遲擷取。
+    
     Returns:
         股票資訊的 Schema 定義
     """
@@ -86,17 +125,33 @@ def get_stock_schema() -> Dict:
             {
                 "name": "前一日收盤價",
                 "selector": "div.quotes-info #quotesUl span[c-model='previousClose']",
-                "type": "text"
+                "type": "text",
+                # 選填欄位：不列入頁面就緒條件
+                "required": False
             }
         ]
     }
 
 
+# 個股技術線圖頁面
+STOCK_PAGE_URL = 'https://www.wantgoo.com/stock/{code}/technical-chart'
+
+# 頁面就緒等待上限（毫秒）
+STOCK_READY_TIMEOUT_MS = 14000
+
+# 由 Schema 必要欄位產生的就緒判斷（MutationObserver，無輪詢）
+STOCK_READY_JS = build_readiness_js(get_stock_schema(), timeout_ms=STOCK_READY_TIMEOUT_MS)
+
+# 由 Schema 編譯的頁內擷取函式（直接回傳物件，不經 HTML 解析與 JSON 字串）
+STOCK_EXTRACT_JS = compile_extraction_js(get_stock_schema())
+
+
 async def fetch_single_stock(
     crawler: AsyncWebCrawler,
     stock_code: str,
     base_config: CrawlerRunConfig,
-    semaphore: asyncio.Semaphore
+    limiter: AdaptiveConcurrencyLimiter,
+    stats: Optional[PageStats] = None
 ) -> Optional[Dict]:
     """
     抓取單一股票資訊
@@ -105,13 +160,21 @@ async def fetch_single_stock(
         crawler: AsyncWebCrawler 實例
         stock_code: 股票代碼
         base_config: 基礎爬蟲執行設定
-        semaphore: 用於限制並行數量的信號量
+        limiter: 自適應並行控制器（依延遲與失敗率調整並行數量）
+        stats: 用來收集這個頁面請求數與下載量的統計物件（需先安裝渲染設定檔）
     
     Returns:
         股票資訊字典，失敗時返回 None
     """
-    async with semaphore:
-        url = f'https://www.wantgoo.com/stock/{stock_code}/technical-chart'
+    from crawl4ai import CrawlerRunConfig
+    
+    async with limiter.slot() as slot:
+        started = time.perf_counter()
+        url = STOCK_PAGE_URL.format(code=stock_code)
+        stats_token = current_page_stats.set(stats)
+        # 未設定 extraction_strategy 時，改由頁內編譯好的 JavaScript 直接回傳物件
+        inpage_job = {"script": STOCK_EXTRACT_JS} if base_config.extraction_strategy is None else None
+        inpage_token = current_inpage_extraction.set(inpage_job)
         
         try:
             # 針對每個股票創建帶有等待條件的配置
@@ -119,102 +182,597 @@ async def fetch_single_stock(
                 cache_mode=base_config.cache_mode,
                 extraction_strategy=base_config.extraction_strategy,
                 scan_full_page=base_config.scan_full_page,
+                wait_until=base_config.wait_until,
                 verbose=base_config.verbose,
-                # 等待關鍵元素載入完成
-                wait_for="js:() => document.querySelector('div.quotes-info div.deal') && document.querySelector('span.astock-code[c-model=\"id\"]') && document.querySelector('#quotesUl span[c-model=\"volume\"]')",
-                wait_for_timeout=15000,
+                # 等待 Schema 必要欄位都有內容（MutationObserver 事件驅動）
+                wait_for=STOCK_READY_JS,
+                wait_for_timeout=STOCK_READY_TIMEOUT_MS + 1000,
                 page_timeout=30000
             )
             
             result = await crawler.arun(url=url, config=config)
             
-            if result.success and result.extracted_content:
+            if not result.success:
+                print(f"✗ 股票 {stock_code} 下載失敗")
+                slot.fail()
+                return None
+            
+            if inpage_job is not None:
+                data = inpage_job.get("result")
+                if data is None:
+                    print(f"✗ 股票 {stock_code} 頁內擷取失敗: {inpage_job.get('error', '未執行')}")
+            else:
                 try:
-                    data = json.loads(result.extracted_content)
-                    if data and len(data) > 0:
-                        stock_data = data[0]
-                        stock_data['stock_code'] = stock_code
-                        stock_data['update_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        return stock_data
+                    data = json.loads(result.extracted_content or '[]')
                 except json.JSONDecodeError:
                     print(f"✗ 股票 {stock_code} JSON 解析失敗")
-                    return None
-            else:
-                print(f"✗ 股票 {stock_code} 下載失敗")
-                return None
+                    data = None
+            
+            stock_data = _first_record(data, stock_code, started)
+            if stock_data is None:
+                slot.fail()
+            return stock_data
                 
         except Exception as e:
             print(f"✗ 股票 {stock_code} 發生錯誤: {e}")
+            slot.fail()
             return None
+        finally:
+            current_inpage_extraction.reset(inpage_token)
+            current_page_stats.reset(stats_token)
 
 
-async def fetch_multiple_stocks(stock_codes: List[str]) -> List[Dict]:
+async def fetch_stock_in_tab(
+    tab_pool: TabPool,
+    stock_code: str,
+    limiter: AdaptiveConcurrencyLimiter
+) -> Optional[Dict]:
     """
-    批次並行爬取多支股票資訊
+    在分頁池中租用一個已載入的分頁抓取單一股票資訊
     
     Args:
-        stock_codes: 股票代碼列表
+        tab_pool: 個股頁分頁池
+        stock_code: 股票代碼
+        limiter: 自適應並行控制器
     
     Returns:
-        成功爬取的股票資訊列表
+        股票資訊字典，失敗時返回 None
+    """
+    async with limiter.slot() as slot:
+        started = time.perf_counter()
+        try:
+            data = await tab_pool.fetch(stock_code)
+        except Exception as e:
+            print(f"✗ 股票 {stock_code} 發生錯誤: {e}")
+            slot.fail()
+            return None
+        
+        stock_data = _first_record(data, stock_code, started)
+        if stock_data is None:
+            print(f"✗ 股票 {stock_code} 報價區塊未就緒")
+            slot.fail()
+        return stock_data
+
+
+def _first_record(data: Optional[List[Dict]], stock_code: str, started: float) -> Optional[Dict]:
+    """取擷取結果的第一筆，並補上股票代碼、更新時間與頁面耗時（毫秒）"""
+    if not data:
+        return None
+    stock_data = data[0]
+    stock_data['stock_code'] = stock_code
+    stock_data['update_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    stock_data['fetch_ms'] = int((time.perf_counter() - started) * 1000)
+    return stock_data
+
+
+# wantgoo 報價資料端點
+# 注意：端點路徑與下方的鍵名都是依頁面 c-model / c-model-dazzle 綁定名稱推測的，
+# 尚未以實際回應驗證。猜錯時 HttpQuoteSource 返回 None，FallbackQuoteSource 改用瀏覽器，
+# 每支股票每 retry_after 秒只多花一次失敗的請求；驗證後再修正這兩個常數。
+WANTGOO_QUOTE_API = 'https://www.wantgoo.com/investrue/{code}/realtimeprice'
+
+# Schema 欄位 -> 報價 JSON 中可能的鍵名（推測值，見上方說明）
+WANTGOO_QUOTE_FIELDS = {
+    "日期時間": ("tradeTime", "time"),
+    "股票號碼": ("id",),
+    "股票名稱": ("name",),
+    "即時價格": ("deal", "close", "price"),
+    "漲跌": ("change",),
+    "漲跌百分比": ("changeRate",),
+    "開盤價": ("open",),
+    "最高價": ("high",),
+    "成交量(張)": ("volume",),
+    "最低價": ("low",),
+    "前一日收盤價": ("previousClose",),
+}
+
+
+def get_browser_config() -> BrowserConfig:
+    """
+    取得爬蟲使用的瀏覽器設定
+    
+    Returns:
+        BrowserConfig 實例
+    """
+    from crawl4ai import BrowserConfig
+    
+    return BrowserConfig(headless=True)
+
+
+class QuoteSource:
+    """
+    報價來源介面
+    
+    子類別實作 fetch()，回傳與 get_stock_schema() 欄位相同的股票資訊字典。
+    """
+    
+    name = "base"
+    
+    async def fetch(self, stock_code: str) -> Optional[Dict]:
+        """
+        取得單一股票報價
+        
+        Args:
+            stock_code: 股票代碼
+        
+        Returns:
+            股票資訊字典，失敗時返回 None
+        """
+        raise NotImplementedError
+    
+    @property
+    def concurrency_limit(self) -> Optional[int]:
+        """目前的並行上限（不受並行控制的來源返回 None）"""
+        return None
+    
+    async def close(self):
+        """釋放來源持有的資源"""
+
+
+class HttpQuoteSource(QuoteSource):
+    """
+    直接呼叫報價資料端點的來源（不需瀏覽器，使用連線池）
+    
+    WANTGOO_QUOTE_API 與 WANTGOO_QUOTE_FIELDS 尚未以實際回應驗證，
+    必須搭配 FallbackQuoteSource 使用，不能單獨作為報價來源。
+    """
+    
+    name = "http"
+    
+    def __init__(self, max_connections: int = 20, timeout: float = 10.0):
+        """
+        Args:
+            max_connections: 連線池大小（同時也是並行請求上限）
+            timeout: 單一請求逾時秒數
+        """
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """延遲建立 ClientSession（必須在事件迴圈中建立）"""
+        import aiohttp
+        
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    keepalive_timeout=60
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                                  '(KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+                    'Accept': 'application/json, text/plain, */*',
+                    'X-Requested-With': 'XMLHttpRequest',
+                }
+            )
+        return self._session
+    
+    async def fetch(self, stock_code: str) -> Optional[Dict]:
+        import aiohttp
+        
+        url = WANTGOO_QUOTE_API.format(code=stock_code)
+        referer = STOCK_PAGE_URL.format(code=stock_code)
+        started = time.perf_counter()
+        
+        try:
+            async with self._get_session().get(url, headers={'Referer': referer}) as resp:
+                if resp.status != 200:
+                    return None
+                payload = await resp.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return None
+        
+        stock_data = map_quote_payload(payload, stock_code)
+        if stock_data is not None:
+            stock_data['fetch_ms'] = int((time.perf_counter() - started) * 1000)
+        return stock_data
+    
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+def _format_quote_value(field_name: str, value) -> str:
+    """將 JSON 數值轉成與頁面文字相同格式的字串"""
+    if value is None:
+        return ''
+    if field_name == "日期時間" and isinstance(value, (int, float)):
+        # 毫秒時間戳
+        return datetime.fromtimestamp(value / 1000).strftime('%Y/%m/%d %H:%M:%S')
+    if field_name == "漲跌百分比" and isinstance(value, (int, float)):
+        return f"{value:.2f}%"
+    if field_name == "成交量(張)" and isinstance(value, (int, float)):
+        return f"{int(value):,}"
+    return str(value)
+
+
+def map_quote_payload(payload, stock_code: str) -> Optional[Dict]:
+    """
+    將報價 JSON 對應到 get_stock_schema() 的欄位
+    
+    Args:
+        payload: 端點回傳的 JSON（物件，或只有一筆物件的陣列）
+        stock_code: 股票代碼
+    
+    Returns:
+        股票資訊字典；缺少即時價格時返回 None
+    """
+    if isinstance(payload, list):
+        payload = payload[0] if payload else None
+    if not isinstance(payload, dict):
+        return None
+    
+    stock_data = {}
+    for field_name, keys in WANTGOO_QUOTE_FIELDS.items():
+        value = next((payload[k] for k in keys if payload.get(k) is not None), None)
+        stock_data[field_name] = _format_quote_value(field_name, value)
+    
+    if not stock_data["即時價格"]:
+        return None
+    if not stock_data["股票號碼"]:
+        stock_data["股票號碼"] = stock_code
+    
+    stock_data['stock_code'] = stock_code
+    stock_data['update_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return stock_data
+
+
+def build_run_config(profile: str = "lean", extraction: str = "css") -> CrawlerRunConfig:
+    """
+    依渲染設定檔建立股票頁面的基礎爬蟲執行設定
+    
+    Args:
+        profile: 渲染設定檔名稱
+        extraction: "css" 由 JsonCssExtractionStrategy 解析 HTML；
+            "js" 在頁面內執行編譯後的擷取函式（crawler 需先 install_inpage_extraction）
+    
+    Returns:
+        CrawlerRunConfig 實例
     """
-    stock_schema = get_stock_schema()
-    extraction_strategy = JsonCssExtractionStrategy(schema=stock_schema)
+    if extraction not in ("css", "js"):
+        raise ValueError(f"未知的擷取模式: {extraction}")
     
-    browser_config = BrowserConfig(headless=True)
+    from crawl4ai import CacheMode, CrawlerRunConfig
+    from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
     
-    base_crawler_run_config = CrawlerRunConfig(
+    render_profile = get_render_profile(profile)
+    return CrawlerRunConfig(
         cache_mode=CacheMode.BYPASS,
-        extraction_strategy=extraction_strategy,
-        scan_full_page=True,
+        extraction_strategy=(
+            JsonCssExtractionStrategy(schema=get_stock_schema()) if extraction == "css" else None
+        ),
+        scan_full_page=render_profile.scan_full_page,
+        wait_until=render_profile.wait_until,
         verbose=False
     )
+
+
+class BrowserQuoteSource(QuoteSource):
+    """以 Chromium 渲染 technical-chart 頁面並依 Schema 擷取的來源"""
     
-    # 限制同時爬取數量
-    semaphore = asyncio.Semaphore(3)
+    name = "browser"
     
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        tasks = [
-            fetch_single_stock(crawler, code, base_crawler_run_config, semaphore)
-            for code in stock_codes
-        ]
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+    def __init__(
+        self,
+        crawler: AsyncWebCrawler,
+        min_concurrency: int = 1,
+        max_concurrency: Optional[int] = None,
+        profile: str = "lean",
+        extraction: str = "js",
+        use_tab_pool: bool = True,
+        tab_max_uses: int = 50
+    ):
+        """
+        Args:
+            crawler: 已啟動的 AsyncWebCrawler
+            min_concurrency: 同時開啟頁面數量的下限
+            max_concurrency: 同時開啟頁面數量的上限，預設依 CPU 核心數
+            profile: 渲染設定檔名稱（"lean" 只載入必要資源，"full" 為完整載入）
+            extraction: 擷取模式（"js" 頁內擷取，"css" 由 Python 解析 HTML）
+            use_tab_pool: 是否重複使用已載入的分頁並以站內導覽切換股票
+            tab_max_uses: 每個分頁使用幾次後換新
+        """
+        self.crawler = crawler
+        self.profile = get_render_profile(profile)
+        install_render_profile(crawler, self.profile)
+        install_inpage_extraction(crawler)
+        self.base_config = build_run_config(self.profile.name, extraction)
+        # 依頁面延遲與失敗率自動調整同時爬取數量
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial=3,
+            min_limit=min_concurrency,
+            max_limit=max_concurrency
+        )
         
-        # 過濾成功的結果
-        successful_results = []
-        for result in results:
-            if isinstance(result, Exception):
-                print(f"發生異常: {result}")
-            elif result is not None:
-                successful_results.append(result)
+        # 分頁數量與並行上限一致：實際同時使用的分頁由 limiter 控制
+        self.tab_pool = None
+        if use_tab_pool:
+            self.tab_pool = TabPool(
+                crawler,
+                get_stock_schema(),
+                url_template=STOCK_PAGE_URL,
+                code_selector="span.astock-code[c-model='id']",
+                quote_selector="div.quotes-info",
+                size=self.limiter.max_limit,
+                warm=self.limiter.limit,
+                max_uses=tab_max_uses,
+                profile=self.profile,
+                ready_timeout_ms=STOCK_READY_TIMEOUT_MS
+            )
+    
+    @property
+    def concurrency_limit(self) -> Optional[int]:
+        return self.limiter.limit
+    
+    async def fetch(self, stock_code: str) -> Optional[Dict]:
+        if self.tab_pool is not None:
+            return await fetch_stock_in_tab(self.tab_pool, stock_code, self.limiter)
+        return await fetch_single_stock(self.crawler, stock_code, self.base_config, self.limiter)
+    
+    async def close(self):
+        if self.tab_pool is not None:
+            await self.tab_pool.close()
+
+
+class FallbackQuoteSource(QuoteSource):
+    """
+    優先使用快速來源，失敗時逐檔改用備援來源
+    
+    快速來源失敗過的股票會在 retry_after 秒內直接走備援來源，
+    避免每次更新都先浪費一次請求。
+    """
+    
+    name = "fallback"
+    
+    def __init__(self, primary: QuoteSource, fallback: QuoteSource, retry_after: float = 600.0):
+        """
+        Args:
+            primary: 快速來源（例如 HttpQuoteSource）
+            fallback: 備援來源（例如 BrowserQuoteSource）
+            retry_after: 快速來源失敗後，多少秒後再重新嘗試
+        """
+        self.primary = primary
+        self.fallback = fallback
+        self.retry_after = retry_after
+        self._primary_failed_at: Dict[str, float] = {}
+    
+    async def fetch(self, stock_code: str) -> Optional[Dict]:
+        failed_at = self._primary_failed_at.get(stock_code)
+        if failed_at is None or time.monotonic() - failed_at > self.retry_after:
+            stock_data = await self.primary.fetch(stock_code)
+            if stock_data is not None:
+                self._primary_failed_at.pop(stock_code, None)
+                return stock_data
+            self._primary_failed_at[stock_code] = time.monotonic()
+        
+        return await self.fallback.fetch(stock_code)
+    
+    @property
+    def concurrency_limit(self) -> Optional[int]:
+        return self.fallback.concurrency_limit
+    
+    async def close(self):
+        await self.primary.close()
+        await self.fallback.close()
+
+
+# 所有報價來源共用的爬取結果快取（瀏覽器重啟、手動與自動更新之間都保留）
+CRAWL_CACHE = CrawlCache()
+
+
+class CachedQuoteSource(QuoteSource):
+    """
+    以 CrawlCache 包裝另一個報價來源
+    
+    鍵為股票頁面 URL + get_stock_schema() 指紋；交易時段內 10 秒、休市時 10 分鐘內
+    重複的請求直接返回上次結果，同時進行的同一支股票請求只爬一次。
+    不是這次實際爬到的結果會加上 'from_cache': True（另一份字典），
+    QuotePublisher 不會把它當成「觀察到報價未變動」。
+    """
+    
+    name = "cached"
+    
+    def __init__(self, source: QuoteSource, cache: CrawlCache = CRAWL_CACHE):
+        """
+        Args:
+            source: 實際爬取的報價來源
+            cache: 爬取結果快取
+        """
+        self.source = source
+        self.cache = cache
+        self._schema = get_stock_schema()
+    
+    async def fetch(self, stock_code: str) -> Optional[Dict]:
+        fetched = False
+        
+        async def fetch_now() -> Optional[Dict]:
+            nonlocal fetched
+            fetched = True
+            return await self.source.fetch(stock_code)
+        
+        stock_data = await self.cache.get_or_fetch(
+            STOCK_PAGE_URL.format(code=stock_code),
+            fetch_now,
+            schema=self._schema
+        )
+        if stock_data is not None and not fetched:
+            stock_data = dict(stock_data, from_cache=True)
+        return stock_data
+    
+    @property
+    def concurrency_limit(self) -> Optional[int]:
+        return self.source.concurrency_limit
+    
+    async def close(self):
+        await self.source.close()
+
+
+def build_quote_source(crawler: AsyncWebCrawler) -> QuoteSource:
+    """
+    建立預設報價來源：HTTP 端點優先，瀏覽器渲染為備援，外層加上爬取結果快取
+    
+    Args:
+        crawler: 已啟動的 AsyncWebCrawler
+    
+    Returns:
+        QuoteSource 實例
+    """
+    return CachedQuoteSource(FallbackQuoteSource(HttpQuoteSource(), BrowserQuoteSource(crawler)))
+
+
+async def stream_stocks(
+    stock_codes: List[str],
+    crawler: Optional[AsyncWebCrawler] = None,
+    source: Optional[QuoteSource] = None
+) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+    """
+    並行爬取多支股票，依「完成順序」逐筆產出結果
+    
+    Args:
+        stock_codes: 股票代碼列表
+        crawler: 已啟動的 AsyncWebCrawler（例如 CrawlerService 提供的常駐瀏覽器），
+            未提供時會自行啟動並在結束後關閉瀏覽器
+        source: 報價來源，未提供時以 build_quote_source(crawler) 建立並在結束後關閉
+    
+    Yields:
+        (股票代碼, 股票資訊字典)，失敗的股票資訊為 None
+    """
+    if source is None:
+        if crawler is None:
+            from crawl4ai import AsyncWebCrawler
+            
+            async with AsyncWebCrawler(config=get_browser_config()) as own_crawler:
+                async for item in stream_stocks(stock_codes, crawler=own_crawler):
+                    yield item
+            return
         
-        return successful_results
+        own_source = build_quote_source(crawler)
+        try:
+            async for item in stream_stocks(stock_codes, source=own_source):
+                yield item
+        finally:
+            await own_source.close()
+        return
+    
+    async def fetch_one(code: str) -> Tuple[str, Optional[Dict]]:
+        try:
+            return code, await source.fetch(code)
+        except Exception as e:
+            print(f"發生異常: {e}")
+            return code, None
+    
+    tasks = [asyncio.ensure_future(fetch_one(code)) for code in stock_codes]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # 呼叫端提前停止迭代時，取消尚未完成的爬取
+        for task in tasks:
+            task.cancel()
+
+
+async def fetch_multiple_stocks(
+    stock_codes: List[str],
+    crawler: Optional[AsyncWebCrawler] = None,
+    source: Optional[QuoteSource] = None
+) -> List[Dict]:
+    """
+    批次並行爬取多支股票資訊（等待全部完成後一次返回）
+    
+    Args:
+        stock_codes: 股票代碼列表
+        crawler: 已啟動的 AsyncWebCrawler，未提供時會自行啟動
+        source: 報價來源，未提供時以 build_quote_source(crawler) 建立
+    
+    Returns:
+        成功爬取的股票資訊列表
+    """
+    return [
+        stock_data
+        async for _, stock_data in stream_stocks(stock_codes, crawler=crawler, source=source)
+        if stock_data is not None
+    ]
 
 
-def run_crawler_in_thread(stock_codes: List[str], result_queue: queue.Queue):
+def submit_crawler_job(
+    service: CrawlerService,
+    stock_codes: List[str],
+    result_queue: queue.Queue,
+    detector: Optional[QuoteChangeDetector] = None
+):
     """
-    在背景執行緒中執行爬蟲任務
+    將爬蟲任務提交給常駐爬蟲服務，每完成一支有變動的股票就把結果放入佇列
+    
+    佇列訊息格式見 QuotePublisher。
     
     Args:
+        service: 常駐爬蟲服務
         stock_codes: 要爬取的股票代碼列表
         result_queue: 用於傳遞結果的佇列
+        detector: 報價變動偵測器，未變動的股票不會逐筆發布
     """
-    try:
-        # 在執行緒中建立新的事件迴圈
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        results = loop.run_until_complete(fetch_multiple_stocks(stock_codes))
-        result_queue.put(('success', results))
-        
-        loop.close()
-    except Exception as e:
-        result_queue.put(('error', str(e)))
+    publisher = QuotePublisher(result_queue, len(stock_codes), detector)
+    
+    async def job(crawler: AsyncWebCrawler):
+        async for stock_code, stock_data in stream_stocks(
+            stock_codes, crawler=crawler, source=service.source
+        ):
+            publisher.publish(stock_code, stock_data)
+    
+    def on_done(future):
+        if future.cancelled():
+            # 例如休市時關閉瀏覽器取消了進行中的工作：仍要通知 GUI 結束更新狀態
+            publisher.fail("更新已取消")
+            return
+        error = future.exception()
+        if error is not None:
+            publisher.fail(str(error))
+        else:
+            publisher.finish()
+    
+    future = service.submit(job)
+    future.add_done_callback(on_done)
 
 
 # ==================== GUI 主程式 ====================
 
+# 觀察清單達到此數量時改用多行程分片爬取（自動更新的每一批也分片）
+SHARD_THRESHOLD = 60
+
+# 觀察清單每列的卡片數
+CARD_COLUMNS = 3
+
+# 自動更新：每批最多幾支、兩次檢查排程的最短／最長間隔（秒）
+AUTO_UPDATE_BATCH = 20
+AUTO_UPDATE_MIN_WAIT = 0.5
+AUTO_UPDATE_MAX_WAIT = 60.0
+# 休市期間兩次檢查交易時段的最長間隔（秒）
+SESSION_RECHECK_MAX_WAIT = 30 * 60.0
+
+
 class StockMonitorApp:
     """股票監控應用程式主類別"""
     
@@ -233,27 +791,70 @@ class StockMonitorApp:
         self.watchlist: Set[str] = set()
         
         # 股票資料快取
-        self.stock_data_cache: Dict[str, Dict] = {}
+        self.stock_data_cache: Dict[str, Quote] = {}
+        # 每支股票固定容量的盤中報價（卡片走勢圖）
+        self.tick_store = TickStore()
         
         # 自動更新相關
         self.auto_update_enabled = False
         self.update_timer_id = None
         self.is_updating = False
+        self.update_batch_size = 0
+        
+        # 爬蟲結果佇列（放入訊息時以虛擬事件喚醒主迴圈，不定時輪詢）
+        self.result_queue = NotifyingQueue()
         
-        # 爬蟲結果佇列
-        self.result_queue = queue.Queue()
+        # 常駐爬蟲服務（整個應用程式共用一個背景迴圈與瀏覽器）；
+        # 等背景載入 crawl4ai 完成後才啟動
+        self.crawler_ready = False
+        self.crawler_service = CrawlerService(
+            browser_config_factory=get_browser_config,
+            source_factory=build_quote_source
+        )
+        
+        # 大型觀察清單使用的多行程分片爬蟲（第一次使用時才啟動工作行程）
+        self.sharded_crawler = ShardedCrawler()
+        
+        # 報價變動偵測（只有變動的股票才會送到畫面）
+        self.change_detector = QuoteChangeDetector()
+        
+        # 每次抓到的報價都寫入本地歷史（SQLite WAL，背景執行緒寫入）
+        self.quote_history = QuoteHistory().start()
+        
+        # 自動更新的逐支股票排程；休市時由 session_gate 暫停更新
+        self.refresh_scheduler = RefreshScheduler()
+        self.session_gate = SessionGate()
+        # 目前的更新是收盤資料（完成時回報 session_gate，失敗則稍後重試）
+        self.closing_fetch_running = False
+        
+        # 觀察清單與報價的快照（下次啟動時先顯示上次的資料）
+        self.snapshot_writer = SnapshotWriter()
+        self.restored_from_snapshot = False
         
         # 建立 UI
         self.setup_ui()
         
+        # 報價更新先標記為 dirty，每幀（33 ms）最多重繪一次
+        self.render_scheduler = RenderScheduler(self.root, self.render_stock_cards)
+        
+        # 先還原上次的觀察清單，卡片立即有內容
+        self.restore_snapshot()
+        
         # 載入台灣股票清單
         self.load_tw_stocks()
         
         # 綁定視窗關閉事件
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
-        # 開始檢查佇列
-        self.check_queue()
+        # 佇列有訊息時才處理
+        self.result_queue.attach(self.root, self.on_queue_messages)
+        
+        # 在背景載入爬蟲模組，視窗先顯示；載入完成後才啟用更新功能
+        self.update_btn.config(state=tk.DISABLED)
+        self.status_label.config(text="⏳ 載入爬蟲模組...")
+        self.crawler_importer = BackgroundImporter(
+            on_done=lambda importer: self.result_queue.put(('imports', importer))
+        ).start()
     
     def setup_ui(self):
         """建立使用者介面"""
@@ -290,7 +891,7 @@ class StockMonitorApp:
         self.auto_update_var = tk.BooleanVar(value=False)
         auto_update_check = ttk.Checkbutton(
             toolbar,
-            text="自動更新 (每分鐘)",
+            text="自動更新 (分散排程)",
             variable=self.auto_update_var,
             command=self.toggle_auto_update
         )
@@ -458,57 +1059,88 @@ class StockMonitorApp:
             font=('Arial', 12, 'bold')
         ).pack(pady=5)
         
-        # 滾動區域
-        canvas = tk.Canvas(right_frame)
-        scrollbar = ttk.Scrollbar(right_frame, orient="vertical", command=canvas.yview)
-        self.stocks_container = ttk.Frame(canvas)
-        
-        self.stocks_container.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+        # 虛擬化的卡片區：只為可視範圍內的股票建立卡片
+        self.card_grid = VirtualCardGrid(
+            right_frame,
+            on_remove=self.remove_from_watchlist,
+            get_data=self.stock_data_cache.get,
+            get_ticks=self.tick_store.get,
+            columns=CARD_COLUMNS
         )
+    
+    def load_tw_stocks(self):
+        """
+        載入台灣股票清單
         
-        canvas.create_window((0, 0), window=self.stocks_container, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+        先讀取 mmap 快照並分批填入 Treeview，視窗不必等待 twstock；
+        twstock 代碼表有變動（或還沒有快照）時在背景重建，完成後透過佇列換上新清單。
+        """
+        # TODO: Phase 4.1 - 整合 twstock
+        self.stock_search = None
+        self.all_stocks = []
+        self._stock_fill = None
         
-        canvas.pack(side="left", fill="both", expand=True, padx=5, pady=5)
-        scrollbar.pack(side="right", fill="y")
+        snapshot = read_snapshot()
+        if snapshot is not None:
+            self.show_stock_universe(snapshot[1])
+        else:
+            self.stock_count_label.config(text="⏳ 正在建立股票清單...")
         
-        # 空狀態提示
-        self.empty_label = ttk.Label(
-            self.stocks_container,
-            text="📊 尚未加入任何股票\n\n請從左側清單選擇股票加入觀察",
-            font=('Arial', 12),
-            foreground='gray'
+        refresh_universe_in_background(
+            lambda entries: self.result_queue.put(('universe', entries)),
+            on_failed=lambda message: self.result_queue.put(('universe_error', message))
         )
-        self.empty_label.pack(pady=50)
     
-    def load_tw_stocks(self):
-        """載入台灣股票清單"""
-        # TODO: Phase 4.1 - 整合 twstock
-        try:
-            # 取得所有上市公司代碼
-            self.all_stocks = []
-            
-            # twstock.codes 包含所有股票代碼資訊
-            for code, info in twstock.codes.items():
-                if info.type == '股票':  # 只顯示股票類型
-                    self.all_stocks.append((code, info.name))
-            
-            # 依代碼排序
-            self.all_stocks.sort(key=lambda x: x[0])
-            
-            # 顯示在 Treeview 中
-            for code, name in self.all_stocks:
-                self.stock_tree.insert('', tk.END, values=(code, name))
-            
-            # 更新統計資訊
+    def on_universe_error(self, message: str):
+        """
+        股票清單重建失敗：已有快照時沿用，沒有任何清單時顯示錯誤
+        
+        Args:
+            message: 錯誤訊息
+        """
+        if self.all_stocks:
+            return
+        self.stock_count_label.config(text="✗ 股票清單載入失敗")
+        messagebox.showerror("錯誤", f"載入股票清單失敗: {message}")
+    
+    def show_stock_universe(self, entries: List[UniverseEntry]):
+        """
+        以證券清單（取代目前內容）分批填入左側 Treeview
+        
+        Args:
+            entries: 依代碼排序的證券清單
+        """
+        if self._stock_fill is not None:
+            self._stock_fill.cancel()
+        
+        # 移除舊項目（包含搜尋時被 detach 的項目）
+        old_codes = [code for code, _ in self.all_stocks if self.stock_tree.exists(code)]
+        if old_codes:
+            self.stock_tree.delete(*old_codes)
+        self.stock_search = None
+        
+        # 只顯示股票類型
+        self.all_stocks = [(e.code, e.name) for e in entries if e.type == '股票']
+        
+        def on_filled():
+            # 建立搜尋索引，並套用填入期間輸入的搜尋文字
+            self.stock_search = TreeviewSearch(
+                self.stock_tree,
+                StockSearchIndex(self.all_stocks),
+                on_filtered=self.on_search_filtered
+            )
             self.update_stock_count(len(self.all_stocks))
-            
+            if self.search_var.get().strip():
+                self.stock_search.apply(self.search_var.get())
             print(f"✓ 載入 {len(self.all_stocks)} 支台灣股票")
-            
-        except Exception as e:
-            messagebox.showerror("錯誤", f"載入股票清單失敗: {e}")
+        
+        # 顯示在 Treeview 中（iid 使用股票代碼，搜尋時以 detach/move 篩選）
+        self._stock_fill = ChunkedTreeFill(
+            self.stock_tree,
+            [(code, {'values': (code, name)}) for code, name in self.all_stocks],
+            on_done=on_filled
+        )
+        self._stock_fill.start()
     
     def update_stock_count(self, count: int, total: int = None):
         """更新股票數量統計"""
@@ -519,26 +1151,16 @@ class StockMonitorApp:
         self.stock_count_label.config(text=text)
     
     def on_search(self, *args):
-        """搜尋框文字變更時觸發"""
-        # TODO: Phase 4.3 - 實作搜尋功能
-        search_text = self.search_var.get().lower()
-        
-        # 清空 Treeview
-        for item in self.stock_tree.get_children():
-            self.stock_tree.delete(item)
-        
-        # 過濾並顯示符合的股票
-        matched_count = 0
-        for code, name in self.all_stocks:
-            if search_text in code.lower() or search_text in name.lower():
-                self.stock_tree.insert('', tk.END, values=(code, name))
-                matched_count += 1
-        
-        # 更新統計資訊
-        if search_text:
-            self.update_stock_count(matched_count, total=len(self.all_stocks))
+        """搜尋框文字變更時觸發（去抖動後以索引篩選）"""
+        if self.stock_search is not None:
+            self.stock_search.schedule(self.search_var.get())
+    
+    def on_search_filtered(self, matched_count: int, total: int):
+        """搜尋篩選完成後更新統計資訊"""
+        if self.search_var.get().strip():
+            self.update_stock_count(matched_count, total=total)
         else:
-            self.update_stock_count(len(self.all_stocks))
+            self.update_stock_count(total)
     
     def on_stock_double_click(self, event):
         """雙擊股票項目時加入觀察清單"""
@@ -562,6 +1184,8 @@ class StockMonitorApp:
             return
         
         self.watchlist.add(stock_code)
+        self.refresh_scheduler.add([stock_code])
+        self.save_snapshot()
         messagebox.showinfo("成功", f"已加入股票 {stock_code} 到觀察清單")
         
         # 更新顯示
@@ -571,216 +1195,53 @@ class StockMonitorApp:
         """從觀察清單移除股票"""
         if stock_code in self.watchlist:
             self.watchlist.remove(stock_code)
+            self.change_detector.forget(stock_code)
+            self.render_scheduler.discard(stock_code)
+            self.refresh_scheduler.remove(stock_code)
             if stock_code in self.stock_data_cache:
                 del self.stock_data_cache[stock_code]
+            self.tick_store.discard(stock_code)
+            self.save_snapshot()
             self.update_watchlist_display()
     
-    def update_watchlist_display(self):
-        """更新右側觀察清單顯示"""
-        # TODO: Phase 5 - 實作資料顯示
-        # 清空現有顯示
-        for widget in self.stocks_container.winfo_children():
-            widget.destroy()
+    def restore_snapshot(self):
+        """從上次的快照還原觀察清單與報價（標記為舊資料），爬蟲就緒後在背景更新"""
+        snapshot = read_watchlist_snapshot()
+        if snapshot is None:
+            return
+        saved_at, stock_codes, quotes = snapshot
+        self.watchlist.update(stock_codes)
+        self.stock_data_cache.update(quotes)
+        self.refresh_scheduler.add(stock_codes, recent=False)
+        self.restored_from_snapshot = bool(stock_codes)
+        self.update_watchlist_display()
         
-        if not self.watchlist:
-            # 顯示空狀態
-            self.empty_label = ttk.Label(
-                self.stocks_container,
-                text="📊 尚未加入任何股票\n\n請從左側清單選擇股票加入觀察",
-                font=('Arial', 14),
-                foreground='gray'
-            )
-            self.empty_label.pack(pady=50)
-        else:
-            # 使用三欄布局顯示股票卡片
-            sorted_stocks = sorted(self.watchlist)
-            current_row_frame = None
-            
-            for idx, stock_code in enumerate(sorted_stocks):
-                col = idx % 3  # 0, 1, 或 2（左、中、右欄）
-                
-                # 為每一列創建 Frame
-                if col == 0:
-                    current_row_frame = ttk.Frame(self.stocks_container)
-                    current_row_frame.pack(fill=tk.X, padx=5, pady=5)
-                
-                self.create_stock_card(stock_code, current_row_frame, col)
+        saved_text = datetime.fromtimestamp(saved_at).strftime('%Y-%m-%d %H:%M:%S')
+        self.last_update_label.config(text=f"最後更新: {saved_text}（快照）")
+        print(f"♻️ 從快照還原 {len(stock_codes)} 支股票（{saved_text} 儲存）")
+    
+    def save_snapshot(self):
+        """在背景寫入觀察清單與報價快照（連續呼叫時只寫最新的一份）"""
+        self.snapshot_writer.save(build_payload(self.watchlist, self.stock_data_cache))
     
-    def create_stock_card(self, stock_code: str, parent_frame: ttk.Frame, column: int):
+    def update_watchlist_display(self):
         """
-        建立股票資訊卡片
+        更新右側觀察清單顯示
         
-        Args:
-            stock_code: 股票代碼
-            parent_frame: 父容器
-            column: 欄位編號（0 或 1）
-        """
-        # 主卡片容器
-        card_frame = ttk.LabelFrame(
-            parent_frame,
-            text=f"  股票 {stock_code}  ",
-            padding=15
-        )
-        card_frame.grid(row=0, column=column, sticky="nsew", padx=5, pady=5)
-        parent_frame.columnconfigure(column, weight=1)
-        
-        # 取得快取資料
-        stock_data = self.stock_data_cache.get(stock_code)
-        
-        if stock_data:
-            # 內容容器
-            content_frame = ttk.Frame(card_frame)
-            content_frame.pack(fill=tk.BOTH, expand=True)
-            
-            # === 標題區（股票代碼與名稱） ===
-            header_frame = ttk.Frame(content_frame)
-            header_frame.pack(fill=tk.X, pady=(0, 10))
-            
-            ttk.Label(
-                header_frame,
-                text=f"{stock_data.get('股票號碼', 'N/A')}",
-                font=('Arial', 20, 'bold')
-            ).pack(side=tk.LEFT)
-            
-            ttk.Label(
-                header_frame,
-                text=f"{stock_data.get('股票名稱', 'N/A')}",
-                font=('Arial', 18)
-            ).pack(side=tk.LEFT, padx=(10, 0))
-            
-            # === 即時價格區（大字體顯示） ===
-            price_frame = ttk.Frame(content_frame)
-            price_frame.pack(fill=tk.X, pady=(0, 10))
-            
-            price_text = stock_data.get('即時價格', 'N/A')
-            price_label = tk.Label(
-                price_frame,
-                text=price_text,
-                font=('Arial', 36, 'bold'),
-                fg='black'
-            )
-            price_label.pack(side=tk.LEFT)
-            
-            # 漲跌顯示（帶顏色）
-            change = stock_data.get('漲跌', 'N/A')
-            change_rate = stock_data.get('漲跌百分比', 'N/A')
-            
-            # 判斷漲跌顏色
-            color = 'black'
-            if change != 'N/A' and change:
-                try:
-                    change_value = float(change.replace(',', ''))
-                    if change_value > 0:
-                        color = '#d32f2f'  # 紅色（漲）
-                        change = f"▲ {change}"
-                    elif change_value < 0:
-                        color = '#388e3c'  # 綠色（跌）
-                        change = f"▼ {change}"
-                except:
-                    pass
-            
-            change_frame = ttk.Frame(price_frame)
-            change_frame.pack(side=tk.LEFT, padx=(15, 0))
-            
-            tk.Label(
-                change_frame,
-                text=change,
-                font=('Arial', 20, 'bold'),
-                fg=color
-            ).pack()
-            
-            tk.Label(
-                change_frame,
-                text=change_rate,
-                font=('Arial', 17),
-                fg=color
-            ).pack()
-            
-            # === 詳細資訊區（兩欄佈局） ===
-            info_frame = ttk.Frame(content_frame)
-            info_frame.pack(fill=tk.X, pady=(5, 10))
-            
-            # 左欄
-            left_col = ttk.Frame(info_frame)
-            left_col.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            
-            self._add_info_row(left_col, "開盤", stock_data.get('開盤價', 'N/A'))
-            self._add_info_row(left_col, "最高", stock_data.get('最高價', 'N/A'))
-            self._add_info_row(left_col, "最低", stock_data.get('最低價', 'N/A'))
-            
-            # 右欄
-            right_col = ttk.Frame(info_frame)
-            right_col.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(20, 0))
-            
-            self._add_info_row(right_col, "成交量", stock_data.get('成交量(張)', 'N/A'))
-            self._add_info_row(right_col, "昨收", stock_data.get('前一日收盤價', 'N/A'))
-            self._add_info_row(right_col, "更新", stock_data.get('update_time', 'N/A'), size=11)
-            
-        else:
-            # 等待資料
-            ttk.Label(
-                card_frame,
-                text="⏳ 等待更新資料...",
-                font=('Arial', 16),
-                foreground='gray'
-            ).pack(pady=20)
-        
-        # === 移除按鈕區 ===
-        btn_frame = ttk.Frame(card_frame)
-        btn_frame.pack(fill=tk.X, pady=(10, 0))
-        
-        # 使用 tk.Button 以便自訂顏色
-        remove_btn = tk.Button(
-            btn_frame,
-            text="✕ 移除",
-            command=lambda: self.remove_from_watchlist(stock_code),
-            font=('Arial', 13, 'bold'),
-            bg='#f44336',
-            fg='#FFFF00',  # 黃色文字
-            activebackground='#d32f2f',
-            activeforeground='#FFFF00',
-            relief=tk.FLAT,
-            cursor='hand2',
-            padx=20,
-            pady=8
-        )
-        remove_btn.pack(side=tk.RIGHT)
-        
-        # 滑鼠懸停效果
-        def on_enter(e):
-            remove_btn.config(bg='#d32f2f')
-        
-        def on_leave(e):
-            remove_btn.config(bg='#f44336')
-        
-        remove_btn.bind("<Enter>", on_enter)
-        remove_btn.bind("<Leave>", on_leave)
+        卡片區是虛擬化的：只有可視範圍內的股票綁定卡片，
+        其餘股票只保留在 stock_data_cache，捲動到時才綁定。
+        """
+        self.card_grid.set_codes(sorted(self.watchlist))
     
-    def _add_info_row(self, parent, label: str, value: str, size: int = 14):
+    def render_stock_cards(self, stock_codes: Set[str]):
         """
-        添加資訊列
+        重繪一幀內累積的股票卡片（由 RenderScheduler 呼叫，不在畫面上的股票會略過）
         
         Args:
-            parent: 父容器
-            label: 標籤文字
-            value: 數值
-            size: 字體大小
+            stock_codes: 需要重繪的股票代碼
         """
-        row = ttk.Frame(parent)
-        row.pack(fill=tk.X, pady=3)
-        
-        ttk.Label(
-            row,
-            text=f"{label}:",
-            font=('Arial', size),
-            foreground='#666'
-        ).pack(side=tk.LEFT)
-        
-        ttk.Label(
-            row,
-            text=value,
-            font=('Arial', size, 'bold')
-        ).pack(side=tk.LEFT, padx=(5, 0))
+        for stock_code in stock_codes:
+            self.card_grid.refresh(stock_code)
     
     def manual_update(self):
         """手動更新股票資料"""
@@ -793,66 +1254,161 @@ class StockMonitorApp:
             messagebox.showinfo("提示", "正在更新中，請稍候...")
             return
         
+        if not self.crawler_ready:
+            messagebox.showinfo("提示", "爬蟲模組載入中，請稍候...")
+            return
+        
         self.start_update()
     
-    def start_update(self):
-        """開始更新股票資料"""
+    def start_update(self, stock_codes: Optional[List[str]] = None):
+        """
+        開始更新股票資料
+        
+        Args:
+            stock_codes: 要更新的股票代碼，預設為整個觀察清單
+        """
+        if stock_codes is None:
+            stock_codes = list(self.watchlist)
         self.is_updating = True
+        self.update_batch_size = len(stock_codes)
         self.update_btn.config(state=tk.DISABLED)
-        self.status_label.config(text=f"🔄 更新中... (0/{len(self.watchlist)})")
-        
-        # 在背景執行緒中執行爬蟲
-        stock_codes = list(self.watchlist)
-        thread = threading.Thread(
-            target=run_crawler_in_thread,
-            args=(stock_codes, self.result_queue),
-            daemon=True
-        )
-        thread.start()
+        self.status_label.config(text=f"🔄 更新中... (0/{len(stock_codes)})")
+        
+        # 提交給常駐爬蟲服務執行；觀察清單很大時分散到多個工作行程
+        # （依觀察清單大小判斷，自動更新每次只送出一小批到期的股票）
+        if self.use_shards():
+            self.sharded_crawler.submit(stock_codes, self.result_queue, self.change_detector)
+        else:
+            submit_crawler_job(
+                self.crawler_service, stock_codes, self.result_queue, self.change_detector
+            )
     
-    def check_queue(self):
-        """檢查爬蟲結果佇列"""
-        try:
-            while True:
-                msg_type, data = self.result_queue.get_nowait()
-                
-                if msg_type == 'success':
-                    self.on_update_complete(data)
-                elif msg_type == 'error':
-                    self.on_update_error(data)
-                    
-        except queue.Empty:
-            pass
+    def use_shards(self) -> bool:
+        """觀察清單是否大到要用多行程分片爬取"""
+        return len(self.watchlist) >= SHARD_THRESHOLD
+    
+    def on_queue_messages(self, messages: List[Tuple[str, object]]):
+        """
+        處理爬蟲結果佇列中的一批訊息（由 NotifyingQueue 的事件觸發）
         
-        # 每 100ms 檢查一次
-        self.root.after(100, self.check_queue)
+        Args:
+            messages: (訊息類型, 資料) 列表
+        """
+        for msg_type, data in messages:
+            if msg_type == 'stock':
+                self.on_stock_update(*data)
+            elif msg_type == 'progress':
+                self.status_label.config(text=f"🔄 更新中... ({data[0]}/{data[1]})")
+            elif msg_type == 'success':
+                self.on_update_complete(data)
+            elif msg_type == 'error':
+                self.on_update_error(data)
+            elif msg_type == 'universe':
+                self.show_stock_universe(data)
+            elif msg_type == 'universe_error':
+                self.on_universe_error(data)
+            elif msg_type == 'imports':
+                self.on_crawler_imported(data)
     
-    def on_update_complete(self, results: List[Dict]):
-        """更新完成回調"""
-        # 更新快取
-        for stock_data in results:
-            stock_code = stock_data.get('stock_code')
-            if stock_code:
-                self.stock_data_cache[stock_code] = stock_data
+    def on_crawler_imported(self, importer: BackgroundImporter):
+        """
+        爬蟲模組背景載入完成：啟動常駐爬蟲服務並啟用更新功能
         
-        # 更新顯示
-        self.update_watchlist_display()
+        Args:
+            importer: 完成載入的 BackgroundImporter
+        """
+        if importer.error is not None:
+            self.status_label.config(text="✗ 爬蟲模組載入失敗")
+            print(f"✗ 爬蟲模組載入失敗: {importer.error}")
+            return
+        
+        print(f"✓ 爬蟲模組載入完成（{importer.summary()}）")
+        self.crawler_ready = True
+        self.crawler_service.start()
+        self.update_btn.config(state=tk.NORMAL)
+        self.status_label.config(text="就緒")
+        
+        # 從快照還原的舊資料：立即在背景更新一次
+        if self.restored_from_snapshot:
+            self.restored_from_snapshot = False
+            if self.watchlist and not self.is_updating:
+                self.start_update()
+        
+        # 等待期間已勾選自動更新時開始排程
+        self.kick_auto_update()
+    
+    def on_stock_update(self, stock_code: str, quote: Quote, done: int, total: int):
+        """
+        單支股票爬取完成回調（依完成順序逐筆觸發）
+        
+        Args:
+            stock_code: 股票代碼
+            quote: 有變動的報價（已解析）
+            done: 本次更新已完成的數量（含未變動與失敗的股票）
+            total: 本次更新的總數量
+        """
+        self.status_label.config(text=f"🔄 更新中... ({done}/{total})")
+        
+        # 已被移除的股票不再顯示
+        if stock_code not in self.watchlist:
+            return
+        
+        self.stock_data_cache[stock_code] = quote
+        self.quote_history.append(quote)
+        self.tick_store.append(quote)
+        self.render_scheduler.mark_dirty(stock_code)
+        self.refresh_scheduler.record_quote(stock_code, quote.change_pct)
+    
+    def on_update_complete(self, summary: Tuple[List[Quote], Dict[str, str]]):
+        """
+        更新完成回調（有變動的卡片已在 on_stock_update 中逐筆更新）
+        
+        Args:
+            summary: (有變動的報價列表, {未變動股票代碼: 自何時起未變動})
+        """
+        results, unchanged = summary
+        
+        if self.closing_fetch_running:
+            self.closing_fetch_running = False
+            if results or unchanged:
+                self.session_gate.mark_closing_fetched()
+        
+        # 未變動的股票只標記時間；標記相同時不必更新卡片
+        for stock_code, since in unchanged.items():
+            self.refresh_scheduler.record_quote(stock_code, unchanged=True)
+            quote = self.stock_data_cache.get(stock_code)
+            if quote is not None and quote.unchanged_since != since:
+                quote.unchanged_since = since
+                self.render_scheduler.mark_dirty(stock_code)
         
         # 更新狀態
         self.is_updating = False
         self.update_btn.config(state=tk.NORMAL)
         current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        self.status_label.config(text=f"✓ 更新完成")
+        status_text = "✓ 更新完成"
+        limit = getattr(self.crawler_service.source, 'concurrency_limit', None)
+        if limit is not None:
+            status_text += f"（頁面並行上限 {limit}）"
+        self.status_label.config(text=status_text)
         self.last_update_label.config(text=f"最後更新: {current_time}")
         
-        print(f"✓ 成功更新 {len(results)}/{len(self.watchlist)} 支股票")
+        print(f"✓ 成功更新 {len(results) + len(unchanged)}/{self.update_batch_size} 支股票"
+              f"（{len(unchanged)} 支未變動）")
+        print(f"🖼️ {self.render_scheduler.stats.summary()}")
+        print(f"🗃️ {CRAWL_CACHE.stats.summary()}")
+        self.save_snapshot()
+        
+        # 接著檢查下一批到期的股票
+        self.kick_auto_update()
     
     def on_update_error(self, error_msg: str):
         """更新錯誤回調"""
         self.is_updating = False
+        self.closing_fetch_running = False
         self.update_btn.config(state=tk.NORMAL)
         self.status_label.config(text=f"✗ 更新失敗")
         messagebox.showerror("錯誤", f"更新股票資料時發生錯誤:\n{error_msg}")
+        self.kick_auto_update()
     
     def toggle_auto_update(self):
         """切換自動更新狀態"""
@@ -860,28 +1416,109 @@ class StockMonitorApp:
         self.auto_update_enabled = self.auto_update_var.get()
         
         if self.auto_update_enabled:
-            print("✓ 啟用自動更新（每 60 秒）")
-            self.schedule_auto_update()
+            print("✓ 啟用自動更新（依各股票的優先等級分散排程）")
+            self.kick_auto_update()
         else:
             print("✗ 停用自動更新")
             if self.update_timer_id:
                 self.root.after_cancel(self.update_timer_id)
                 self.update_timer_id = None
     
+    def kick_auto_update(self):
+        """立即重新檢查自動更新排程（取代目前的計時器）"""
+        if not self.auto_update_enabled:
+            return
+        if self.update_timer_id:
+            self.root.after_cancel(self.update_timer_id)
+        self.update_timer_id = self.root.after_idle(self.schedule_auto_update)
+    
     def schedule_auto_update(self):
-        """排程自動更新"""
-        if self.auto_update_enabled and self.watchlist and not self.is_updating:
+        """
+        排程自動更新
+        
+        每支股票有各自的到期時間（RefreshScheduler），每次只更新已到期的一小批，
+        計時器設在下一支股票到期的時間點，讓爬蟲負載平均分散而不是每分鐘一次尖峰。
+        """
+        self.update_timer_id = None
+        if not self.auto_update_enabled:
+            return
+        if self.is_updating or not self.crawler_ready:
+            # 更新完成（或爬蟲就緒）時會再呼叫 kick_auto_update
+            return
+        
+        action, wait = self.session_gate.decide()
+        if action != ACTION_POLL:
+            self.idle_until_session(action, wait)
+            return
+        
+        self.refresh_scheduler.set_visible(self.card_grid.visible_codes)
+        # 分片時每個工作行程各分到一批
+        limit = AUTO_UPDATE_BATCH * self.sharded_crawler.workers if self.use_shards() else AUTO_UPDATE_BATCH
+        due_codes = self.refresh_scheduler.pop_due(limit=limit)
+        if due_codes:
+            self.start_update(due_codes)
+            return
+        
+        wait = self.refresh_scheduler.seconds_until_next()
+        if wait is not None:
+            delay_ms = int(min(max(wait, AUTO_UPDATE_MIN_WAIT), AUTO_UPDATE_MAX_WAIT) * 1000)
+            self.update_timer_id = self.root.after(delay_ms, self.schedule_auto_update)
+    
+    def idle_until_session(self, action: str, wait: float):
+        """
+        休市期間的自動更新：收盤後抓一次收盤資料，之後沿用快取，開盤前預熱瀏覽器
+        
+        Args:
+            action: SessionGate.decide() 返回的動作
+            wait: 距離下一次需要檢查的秒數
+        """
+        status = self.session_gate.status_text()
+        if action == ACTION_CLOSING_FETCH and self.watchlist:
+            print(f"🔔 {status}：抓取一次收盤資料")
+            self.closing_fetch_running = True
             self.start_update()
+            return
         
-        # 每 60 秒執行一次
-        if self.auto_update_enabled:
-            self.update_timer_id = self.root.after(60000, self.schedule_auto_update)
+        if action == ACTION_PREWARM:
+            print("🔥 即將開盤，預熱瀏覽器")
+            self.crawler_service.start()
+            if self.use_shards():
+                self.sharded_crawler.start()
+        elif action == ACTION_AWAIT_CLOSE:
+            # 收盤資料還沒抓到（剛收盤或上次失敗），保留瀏覽器
+            pass
+        else:
+            # 收盤資料已取得，休市期間釋放瀏覽器與分片工作行程（關閉需要幾秒，不在主執行緒等待）
+            if self.crawler_service.is_running:
+                print("💤 休市中，關閉瀏覽器直到開盤前")
+                threading.Thread(target=self.crawler_service.shutdown, name="CrawlerShutdown", daemon=True).start()
+            if self.sharded_crawler.is_running:
+                print("💤 休市中，關閉分片工作行程直到開盤前")
+                threading.Thread(target=self.sharded_crawler.shutdown, name="ShardShutdown", daemon=True).start()
+        
+        self.status_label.config(text=f"💤 {status}，顯示收盤資料")
+        # 長時間的 after() 會受系統休眠影響，最多每 30 分鐘重新檢查一次
+        delay_ms = int(min(max(wait, AUTO_UPDATE_MIN_WAIT), SESSION_RECHECK_MAX_WAIT) * 1000)
+        self.update_timer_id = self.root.after(delay_ms, self.schedule_auto_update)
     
     def on_closing(self):
         """視窗關閉事件處理"""
         if self.update_timer_id:
             self.root.after_cancel(self.update_timer_id)
         
+        # 寫入最後的觀察清單快照
+        self.save_snapshot()
+        self.snapshot_writer.flush()
+        
+        # 不再接收爬蟲結果，再關閉常駐瀏覽器、背景迴圈與分片工作行程
+        self.result_queue.detach()
+        self.crawler_service.shutdown(restart_deferred=False)
+        self.sharded_crawler.shutdown()
+        
+        # 寫入尚未落地的報價歷史
+        self.quote_history.close()
+        print(f"🗄️ {self.quote_history.summary()}")
+        
         self.root.destroy()
 
 
@@ -0,0 +1,257 @@
+"""
+台股（TWSE）交易時段與休市日
+
+wantgoo 的報價時間（time.last-time#lastQuoteTime）只有在交易時段才會變動，
+夜間、週末與國定假日持續每分鐘爬取只是浪費瀏覽器資源。
+
+- MarketCalendar：依本地休市日檔案（twse_holidays.json）與週末判斷交易日，
+  並把時間點分類為 盤前試撮／一般交易／盤後零股／休市
+- SessionGate：自動更新每次排程前先詢問該做什麼——
+  交易時段照常更新；收盤後只抓一次收盤資料，之後沿用快取直到下一個交易日；
+  開盤前一小段時間預熱瀏覽器
+
+休市日檔案格式（日期 -> 名稱），每年依證交所公告的「市場休市日期」更新：
+
+    {"holidays": {"2026-01-01": "中華民國開國紀念日", ...}}
+"""
+
+import json
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+# 台灣沒有日光節約時間，固定 UTC+8（不需要 tzdata）
+TAIPEI = timezone(timedelta(hours=8), "Asia/Taipei")
+
+HOLIDAY_PATH = Path(__file__).with_name("twse_holidays.json")
+
+# ==================== 交易時段 ====================
+
+PHASE_PRE_OPEN = "pre_open"   # 盤前試撮 08:30 ~ 09:00
+PHASE_REGULAR = "regular"     # 一般交易 09:00 ~ 13:30
+PHASE_ODD_LOT = "odd_lot"     # 盤後零股 13:40 ~ 14:30
+PHASE_CLOSED = "closed"
+
+# (時段, 開始, 結束)，依時間先後排列
+SESSIONS = (
+    (PHASE_PRE_OPEN, time(8, 30), time(9, 0)),
+    (PHASE_REGULAR, time(9, 0), time(13, 30)),
+    (PHASE_ODD_LOT, time(13, 40), time(14, 30)),
+)
+
+PHASE_LABELS = {
+    PHASE_PRE_OPEN: "盤前試撮",
+    PHASE_REGULAR: "交易中",
+    PHASE_ODD_LOT: "盤後零股",
+    PHASE_CLOSED: "休市",
+}
+
+# 報價會變動、需要持續更新的時段
+ACTIVE_PHASES = (PHASE_PRE_OPEN, PHASE_REGULAR)
+
+SESSION_OPEN = SESSIONS[0][1]
+REGULAR_CLOSE = SESSIONS[1][2]
+
+
+class MarketCalendar:
+    """交易日與交易時段判斷"""
+
+    def __init__(self, holidays: Optional[Dict[date, str]] = None):
+        """
+        Args:
+            holidays: 休市日 -> 名稱（週末不必列出）
+        """
+        self.holidays = dict(holidays or {})
+
+    @classmethod
+    def load(cls, path: Path = HOLIDAY_PATH) -> "MarketCalendar":
+        """
+        從休市日檔案建立行事曆；檔案不存在或格式錯誤時只排除週末
+
+        Args:
+            path: 休市日 JSON 檔路徑
+
+        Returns:
+            MarketCalendar 實例
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                raw = json.load(f)["holidays"]
+            holidays = {date.fromisoformat(day): name for day, name in raw.items()}
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            print(f"⚠️ 無法讀取休市日檔案 {path}（{e}），只排除週末")
+            holidays = {}
+        return cls(holidays)
+
+    def is_trading_day(self, day: date) -> bool:
+        """是否為交易日（非週末、非休市日）"""
+        return day.weekday() < 5 and day not in self.holidays
+
+    def phase(self, now: Optional[datetime] = None) -> str:
+        """
+        取得目前所在的交易時段
+
+        Args:
+            now: 時間點，預設為現在（未帶時區時視為台北時間）
+
+        Returns:
+            PHASE_* 常數之一
+        """
+        now = to_taipei(now)
+        if self.is_trading_day(now.date()):
+            clock = now.time()
+            for phase, start, end in SESSIONS:
+                if start <= clock < end:
+                    return phase
+        return PHASE_CLOSED
+
+    def next_open(self, now: Optional[datetime] = None) -> datetime:
+        """
+        下一個交易日盤前試撮開始的時間（現在正好在當日開盤前時為今天）
+
+        Args:
+            now: 時間點，預設為現在
+
+        Returns:
+            台北時間的 datetime
+        """
+        now = to_taipei(now)
+        day = now.date()
+        if now.time() >= SESSION_OPEN:
+            day += timedelta(days=1)
+        # 最長的連假（春節）也不會超過兩週
+        for _ in range(30):
+            if self.is_trading_day(day):
+                return datetime.combine(day, SESSION_OPEN, TAIPEI)
+            day += timedelta(days=1)
+        raise ValueError(f"{now.date()} 之後 30 天內沒有交易日，請檢查休市日檔案")
+
+    def last_close(self, now: Optional[datetime] = None) -> Optional[datetime]:
+        """
+        最近一次（已經過去的）一般交易收盤時間
+
+        Args:
+            now: 時間點，預設為現在
+
+        Returns:
+            台北時間的 datetime，30 天內都沒有交易日時返回 None
+        """
+        now = to_taipei(now)
+        day = now.date()
+        if now.time() < REGULAR_CLOSE:
+            day -= timedelta(days=1)
+        for _ in range(30):
+            if self.is_trading_day(day):
+                return datetime.combine(day, REGULAR_CLOSE, TAIPEI)
+            day -= timedelta(days=1)
+        return None
+
+
+def to_taipei(now: Optional[datetime] = None) -> datetime:
+    """轉成台北時間（None 表示現在；未帶時區的時間視為台北時間）"""
+    if now is None:
+        return datetime.now(TAIPEI)
+    if now.tzinfo is None:
+        return now.replace(tzinfo=TAIPEI)
+    return now.astimezone(TAIPEI)
+
+
+# ==================== 自動更新閘門 ====================
+
+ACTION_POLL = "poll"                    # 交易時段：照常依排程更新
+ACTION_CLOSING_FETCH = "closing_fetch"  # 收盤後：整個清單抓一次收盤資料
+ACTION_AWAIT_CLOSE = "await_close"      # 剛收盤或收盤資料尚未取得：保留瀏覽器等待
+ACTION_PREWARM = "prewarm"              # 開盤前：預先啟動瀏覽器
+ACTION_IDLE = "idle"                    # 休市：沿用快取，什麼都不做
+
+
+class SessionGate:
+    """依交易時段決定自動更新這一次要做什麼"""
+
+    def __init__(
+        self,
+        calendar: Optional[MarketCalendar] = None,
+        prewarm_lead: timedelta = timedelta(minutes=5),
+        close_delay: timedelta = timedelta(minutes=2),
+        closing_retry: timedelta = timedelta(minutes=5)
+    ):
+        """
+        Args:
+            calendar: 交易行事曆，預設從休市日檔案載入
+            prewarm_lead: 盤前試撮開始前多久預熱瀏覽器
+            close_delay: 收盤後多久抓收盤資料（等網站更新收盤價）
+            closing_retry: 收盤資料沒有成功取得時，多久後再試一次
+        """
+        self.calendar = calendar if calendar is not None else MarketCalendar.load()
+        self.prewarm_lead = prewarm_lead
+        self.close_delay = close_delay
+        self.closing_retry = closing_retry
+        # 已成功抓到收盤資料／已預熱的交易日
+        self._closing_fetched: Optional[date] = None
+        self._prewarmed: Optional[date] = None
+        # 最近一次返回 CLOSING_FETCH 的交易日與時間（等待 mark_closing_fetched()）
+        self._closing_pending: Optional[date] = None
+        self._closing_attempted_at: Optional[datetime] = None
+
+    def decide(self, now: Optional[datetime] = None) -> Tuple[str, Optional[float]]:
+        """
+        決定這一次排程的動作
+
+        PREWARM 每個交易日只返回一次；CLOSING_FETCH 在呼叫端以 mark_closing_fetched()
+        回報成功之前，每隔 closing_retry 返回一次，期間返回 AWAIT_CLOSE。
+
+        Args:
+            now: 時間點，預設為現在
+
+        Returns:
+            (ACTION_* 常數, 距離下一次需要檢查的秒數)；
+            ACTION_POLL 時秒數為 None，由呼叫端的更新排程決定
+        """
+        now = to_taipei(now)
+        if self.calendar.phase(now) in ACTIVE_PHASES:
+            return ACTION_POLL, None
+
+        next_open = self.calendar.next_open(now)
+        prewarm_at = next_open - self.prewarm_lead
+
+        # 收盤後（含程式在休市期間才啟動）抓一次最近一個交易日的收盤資料
+        last_close = self.calendar.last_close(now)
+        if last_close is not None:
+            if now < last_close + self.close_delay:
+                # 剛收盤，等網站更新收盤價（瀏覽器還要用來抓收盤資料）
+                wait = (last_close + self.close_delay - now).total_seconds()
+                return ACTION_AWAIT_CLOSE, wait
+            closing_day = last_close.date()
+            if self._closing_fetched != closing_day and now < prewarm_at:
+                retry_at = None
+                if self._closing_pending == closing_day and self._closing_attempted_at is not None:
+                    retry_at = self._closing_attempted_at + self.closing_retry
+                if retry_at is None or now >= retry_at:
+                    self._closing_pending = closing_day
+                    self._closing_attempted_at = now
+                    return ACTION_CLOSING_FETCH, self.closing_retry.total_seconds()
+                return ACTION_AWAIT_CLOSE, (retry_at - now).total_seconds()
+
+        if now >= prewarm_at:
+            wait = (next_open - now).total_seconds()
+            if self._prewarmed != next_open.date():
+                self._prewarmed = next_open.date()
+                return ACTION_PREWARM, wait
+            return ACTION_IDLE, wait
+        return ACTION_IDLE, (prewarm_at - now).total_seconds()
+
+    def mark_closing_fetched(self):
+        """回報最近一次 CLOSING_FETCH 已成功取得收盤資料"""
+        if self._closing_pending is not None:
+            self._closing_fetched = self._closing_pending
+
+    def status_text(self, now: Optional[datetime] = None) -> str:
+        """目前時段的狀態文字（例如「休市（下次開盤 10/19 08:30）」）"""
+        now = to_taipei(now)
+        phase = self.calendar.phase(now)
+        label = PHASE_LABELS[phase]
+        if phase in ACTIVE_PHASES:
+            return label
+        next_open = self.calendar.next_open(now)
+        return f"{label}（下次開盤 {next_open:%m/%d %H:%M}）"
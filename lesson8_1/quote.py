@@ -0,0 +1,192 @@
+"""
+解析後的報價
+
+爬蟲回傳的是中文鍵名的字串字典（'即時價格'、'漲跌百分比'、'成交量(張)'...），
+以前每次繪製卡片都要重新 float()／去逗號／判斷漲跌。Quote 在爬蟲回傳時
+（QuotePublisher.publish）只解析一次：
+
+- 數值欄位存成 float／int（__slots__，沒有每筆一個 dict）
+- 漲跌方向、顏色類別與所有顯示文字在建立時一併算好，
+  之後的變動偵測、繪製與歷史寫入都直接使用
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from market_session import TAIPEI
+
+
+# 漲跌方向（1 漲、-1 跌、0 平）-> 顏色類別，顯示端再對應成實際顏色
+DIRECTION_CLASSES = {1: 'up', -1: 'down', 0: 'flat'}
+_ARROWS = {1: '▲ ', -1: '▼ ', 0: ''}
+
+MISSING = 'N/A'
+
+# 日期時間欄位可能的格式（只有時間時視為當日）
+_TIMESTAMP_FORMATS = ("%Y/%m/%d %H:%M:%S", "%Y/%m/%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M")
+_TIME_FORMATS = ("%H:%M:%S", "%H:%M")
+
+
+# ==================== 字串解析 ====================
+
+def parse_float(text) -> Optional[float]:
+    """把 '1,234.5'、'+2.35%' 之類的字串轉成 float，無法解析時返回 None"""
+    if text is None:
+        return None
+    try:
+        return float(str(text).replace(',', '').replace('%', '').strip())
+    except ValueError:
+        return None
+
+
+def parse_int(text) -> Optional[int]:
+    """把 '12,345' 之類的字串轉成 int，無法解析時返回 None"""
+    value = parse_float(text)
+    return None if value is None else int(value)
+
+
+def parse_timestamp(text, fallback: Optional[float] = None) -> Optional[int]:
+    """
+    解析報價時間（頁面上的「日期時間」文字，或 API 的 Unix 毫秒／秒數）
+
+    Args:
+        text: 日期時間
+        fallback: 無法解析時使用的 Unix 秒數
+
+    Returns:
+        Unix 秒數
+    """
+    value = str(text or '').strip()
+    if value.isdigit():
+        number = int(value)
+        return number // 1000 if number > 10**11 else number
+    for fmt in _TIMESTAMP_FORMATS:
+        try:
+            return int(datetime.strptime(value, fmt).replace(tzinfo=TAIPEI).timestamp())
+        except ValueError:
+            pass
+    for fmt in _TIME_FORMATS:
+        try:
+            clock = datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+        today = datetime.now(TAIPEI).date()
+        return int(datetime.combine(today, clock, TAIPEI).timestamp())
+    return None if fallback is None else int(fallback)
+
+
+def _number_text(value: Optional[float]) -> str:
+    return MISSING if value is None else f"{value:,.2f}"
+
+
+# ==================== Quote ====================
+
+class Quote:
+    """一支股票的一筆報價（數值只解析一次，顯示文字預先算好）"""
+
+    __slots__ = (
+        # 報價數值
+        'symbol', 'name', 'ts', 'price', 'change', 'change_pct',
+        'open', 'high', 'low', 'prev_close', 'volume',
+        # 爬取資訊
+        'update_time', 'fetch_ms', 'unchanged_since', 'stale',
+        # 衍生值
+        'direction', 'price_text', 'change_text', 'change_pct_text',
+        'open_text', 'high_text', 'low_text', 'prev_close_text', 'volume_text',
+    )
+
+    def __init__(
+        self,
+        symbol: str,
+        name: str = '',
+        ts: Optional[int] = None,
+        price: Optional[float] = None,
+        change: Optional[float] = None,
+        change_pct: Optional[float] = None,
+        open: Optional[float] = None,
+        high: Optional[float] = None,
+        low: Optional[float] = None,
+        prev_close: Optional[float] = None,
+        volume: Optional[int] = None,
+        update_time: str = '',
+        fetch_ms: Optional[int] = None
+    ):
+        """
+        Args:
+            symbol: 股票代碼
+            name: 股票名稱
+            ts: 報價時間（Unix 秒數），無法解析時為 None
+            price ~ prev_close: 價格欄位
+            volume: 成交量（張）
+            update_time: 爬取時間文字（YYYY-mm-dd HH:MM:SS）
+            fetch_ms: 頁面耗時（毫秒）
+        """
+        self.symbol = symbol
+        self.name = name
+        self.ts = ts
+        self.price = price
+        self.change = change
+        self.change_pct = change_pct
+        self.open = open
+        self.high = high
+        self.low = low
+        self.prev_close = prev_close
+        self.volume = volume
+        self.update_time = update_time
+        self.fetch_ms = fetch_ms
+        # 報價自何時起未變動（HH:MM:SS），由 GUI 在更新完成時設定
+        self.unchanged_since: Optional[str] = None
+        # 從快照還原、尚未重新爬取的舊資料
+        self.stale = False
+
+        change = change or 0.0
+        self.direction = (change > 0) - (change < 0)
+        self.price_text = _number_text(price)
+        self.change_text = MISSING if self.change is None else f"{_ARROWS[self.direction]}{abs(change):,.2f}"
+        self.change_pct_text = MISSING if change_pct is None else f"{change_pct:.2f}%"
+        self.open_text = _number_text(open)
+        self.high_text = _number_text(high)
+        self.low_text = _number_text(low)
+        self.prev_close_text = _number_text(prev_close)
+        self.volume_text = MISSING if volume is None else f"{volume:,}"
+
+    @classmethod
+    def from_scraped(cls, stock_code: str, stock_data: Dict) -> "Quote":
+        """
+        由爬蟲回傳的字串字典建立（中文鍵名見 get_stock_schema()）
+
+        Args:
+            stock_code: 股票代碼
+            stock_data: 爬取結果
+
+        Returns:
+            Quote 實例
+        """
+        return cls(
+            symbol=stock_code,
+            name=stock_data.get('股票名稱') or '',
+            ts=parse_timestamp(stock_data.get('日期時間')),
+            price=parse_float(stock_data.get('即時價格')),
+            change=parse_float(stock_data.get('漲跌')),
+            change_pct=parse_float(stock_data.get('漲跌百分比')),
+            open=parse_float(stock_data.get('開盤價')),
+            high=parse_float(stock_data.get('最高價')),
+            low=parse_float(stock_data.get('最低價')),
+            prev_close=parse_float(stock_data.get('前一日收盤價')),
+            volume=parse_int(stock_data.get('成交量(張)')),
+            update_time=stock_data.get('update_time', ''),
+            fetch_ms=stock_data.get('fetch_ms'),
+        )
+
+    @property
+    def color_class(self) -> str:
+        """漲跌顏色類別：'up'、'down' 或 'flat'"""
+        return DIRECTION_CLASSES[self.direction]
+
+    def values(self) -> Tuple:
+        """報價內容（不含報價時間、爬取時間等沒有成交也會前進的欄位），用來判斷是否變動"""
+        return (self.name, self.price, self.change, self.change_pct,
+                self.open, self.high, self.low, self.prev_close, self.volume)
+
+    def __repr__(self) -> str:
+        return f"Quote({self.symbol} {self.price_text} {self.change_text} {self.change_pct_text})"
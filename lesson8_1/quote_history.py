@@ -0,0 +1,355 @@
+"""
+盤中報價歷史（時間序列）儲存
+
+stock_data_cache 只保留每支股票最新一筆、以中文鍵名存放的字串，程式結束就消失。
+QuoteHistory 把每次爬取的結果（已解析的 quote.Quote）寫入本地時間序列：
+
+- 寫入：SQLite（WAL 模式），主鍵 (symbol, ts)，同一筆報價重複抓到時只保留一筆；
+  寫入在專屬的背景執行緒批次進行，Tk 執行緒只把資料放進有上限的佇列；
+  資料庫暫時被鎖住等錯誤只影響該批次（稍後重試），寫入執行緒會持續執行
+- 壓縮：已結束的交易日定期搬到每日一個的 Parquet 檔（需要 pyarrow，
+  沒安裝時資料留在 SQLite），SQLite 只保留當日資料，檔案與記憶體都不會無限成長
+- 查詢：query(symbol, start, end) 依主鍵做範圍查詢，並合併 Parquet 中的歷史資料
+
+用法:
+    history = QuoteHistory()
+    history.start()
+    history.append(quote)                     # 任何執行緒、不阻塞
+    rows = history.query("2330", start, end)  # List[QuoteRow]
+    history.close()
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from market_session import TAIPEI, to_taipei
+from quote import Quote
+
+
+HISTORY_PATH = Path(__file__).with_name("quote_history.db")
+ARCHIVE_DIR = Path(__file__).with_name("quote_history")
+
+# 批次寫入失敗時的重試次數與間隔（秒，每次加倍），超過次數後丟棄該批次
+WRITE_RETRIES = 5
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+
+class QuoteRow(NamedTuple):
+    """一筆具型別的報價（ts／fetched_at 為 Unix 秒數）"""
+    symbol: str
+    ts: int
+    price: Optional[float]
+    change: Optional[float]
+    change_pct: Optional[float]
+    open: Optional[float]
+    high: Optional[float]
+    low: Optional[float]
+    prev_close: Optional[float]
+    volume: Optional[int]     # 成交量（張）
+    fetched_at: int
+
+
+COLUMNS = QuoteRow._fields
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS quotes (
+    symbol TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    price REAL,
+    change REAL,
+    change_pct REAL,
+    open REAL,
+    high REAL,
+    low REAL,
+    prev_close REAL,
+    volume INTEGER,
+    fetched_at INTEGER NOT NULL,
+    PRIMARY KEY (symbol, ts)
+) WITHOUT ROWID
+"""
+
+_INSERT = f"INSERT OR IGNORE INTO quotes ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+# ==================== 欄位轉換 ====================
+
+def to_row(quote: Quote, fetched_at: Optional[float] = None) -> QuoteRow:
+    """
+    把 Quote 轉成 QuoteRow（報價時間無法解析時以爬取時間代替）
+
+    Args:
+        quote: 報價
+        fetched_at: 爬取時間（Unix 秒數），預設為現在
+
+    Returns:
+        QuoteRow
+    """
+    fetched_at = int(time.time() if fetched_at is None else fetched_at)
+    return QuoteRow(
+        symbol=quote.symbol,
+        ts=fetched_at if quote.ts is None else quote.ts,
+        price=quote.price,
+        change=quote.change,
+        change_pct=quote.change_pct,
+        open=quote.open,
+        high=quote.high,
+        low=quote.low,
+        prev_close=quote.prev_close,
+        volume=quote.volume,
+        fetched_at=fetched_at,
+    )
+
+
+# ==================== 儲存 ====================
+
+class QuoteHistory:
+    """SQLite（WAL）+ Parquet 的報價歷史，寫入在背景執行緒進行"""
+
+    def __init__(
+        self,
+        path: Path = HISTORY_PATH,
+        archive_dir: Path = ARCHIVE_DIR,
+        max_pending: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        compact_interval: float = 600.0
+    ):
+        """
+        Args:
+            path: SQLite 資料庫路徑
+            archive_dir: 每日 Parquet 檔的目錄
+            max_pending: 佇列中最多等待寫入的筆數，超過時丟棄（避免記憶體無限成長）
+            batch_size: 每個交易最多寫入的筆數
+            flush_interval: 佇列有資料時，最多等待幾秒就寫入
+            compact_interval: 檢查是否有已結束交易日需要搬到 Parquet 的間隔（秒）
+        """
+        self.path = Path(path)
+        self.archive_dir = Path(archive_dir)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+
+        self.written = 0
+        self.dropped = 0
+        self.archived = 0
+
+        self._pending: queue.Queue = queue.Queue(max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+        # 先建立資料表，之後的查詢不必等寫入執行緒
+        conn = self._connect()
+        try:
+            conn.execute(_CREATE_TABLE)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ---------- 寫入 ----------
+
+    def start(self) -> "QuoteHistory":
+        """啟動寫入執行緒（重複呼叫無作用）"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="QuoteHistory", daemon=True)
+            self._thread.start()
+        return self
+
+    def append(self, quote: Quote):
+        """
+        加入一筆報價（不阻塞；寫入在背景執行緒進行）
+
+        Args:
+            quote: 報價
+        """
+        try:
+            self._pending.put_nowait((quote, time.time()))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0):
+        """寫入剩下的資料並停止寫入執行緒"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        conn = None
+        next_compact = time.monotonic()
+        # 寫入失敗（例如查詢或壓縮暫時鎖住資料庫）的批次，等 retry_at 之後重試
+        retry: List[tuple] = []
+        attempts = 0
+        retry_at = 0.0
+        try:
+            while not (self._stopping.is_set() and self._pending.empty() and not retry):
+                if retry:
+                    if time.monotonic() < retry_at and not self._stopping.is_set():
+                        self._stopping.wait(min(retry_at - time.monotonic(), self.flush_interval))
+                        continue
+                    batch, retry = retry, []
+                else:
+                    batch = self._take_batch()
+
+                try:
+                    if conn is None:
+                        conn = self._connect()
+                    if batch:
+                        rows = [to_row(quote, fetched_at) for quote, fetched_at in batch]
+                        with conn:
+                            conn.executemany(_INSERT, rows)
+                        self.written += len(rows)
+                        attempts = 0
+                except sqlite3.Error as e:
+                    attempts += 1
+                    if attempts > WRITE_RETRIES or self._stopping.is_set():
+                        print(f"✗ 報價歷史寫入失敗，丟棄 {len(batch)} 筆: {e}")
+                        self.dropped += len(batch)
+                        attempts = 0
+                    else:
+                        delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+                        print(f"⚠️ 報價歷史寫入失敗，{delay:g} 秒後重試（第 {attempts} 次）: {e}")
+                        retry, retry_at = batch, time.monotonic() + delay
+                    if conn is not None:
+                        conn.close()
+                        conn = None
+                    continue
+
+                if time.monotonic() >= next_compact:
+                    next_compact = time.monotonic() + self.compact_interval
+                    try:
+                        self._compact(conn)
+                    except Exception as e:
+                        # 壓縮失敗的資料仍留在 SQLite，下次壓縮時再搬
+                        print(f"✗ 報價歷史壓縮失敗: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _take_batch(self) -> List[tuple]:
+        """等待第一筆（最多 flush_interval 秒），再取出佇列中其餘的資料"""
+        try:
+            batch = [self._pending.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    # ---------- Parquet 壓縮 ----------
+
+    def _compact(self, conn: sqlite3.Connection):
+        """把今天以前的資料依交易日搬到 Parquet 檔（沒有 pyarrow 時略過）"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            return
+
+        today = datetime.now(TAIPEI).date()
+        cutoff = _day_start(today)
+        days = [row[0] for row in conn.execute(
+            "SELECT DISTINCT date(ts, 'unixepoch', '+8 hours') FROM quotes WHERE ts < ?", (cutoff,)
+        )]
+        for day in days:
+            start = _day_start(date.fromisoformat(day))
+            end = start + 86400
+            rows = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM quotes WHERE ts >= ? AND ts < ? ORDER BY symbol, ts",
+                (start, end)
+            ).fetchall()
+
+            target = self.archive_dir / f"{day}.parquet"
+            table = pa.Table.from_pylist([dict(zip(COLUMNS, row)) for row in rows])
+            if target.exists():
+                # 同一天較晚才寫入的資料：與既有檔案合併並去除重複
+                existing = pq.read_table(target)
+                seen = set(zip(existing.column('symbol').to_pylist(), existing.column('ts').to_pylist()))
+                extra = [dict(zip(COLUMNS, row)) for row in rows if (row[0], row[1]) not in seen]
+                table = pa.concat_tables([existing, pa.Table.from_pylist(extra, schema=existing.schema)])
+                table = table.sort_by([('symbol', 'ascending'), ('ts', 'ascending')])
+
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_suffix(".parquet.tmp")
+            pq.write_table(table, tmp)
+            os.replace(tmp, target)
+            with conn:
+                conn.execute("DELETE FROM quotes WHERE ts >= ? AND ts < ?", (start, end))
+            self.archived += len(rows)
+            print(f"🗜️ 已將 {day} 的 {len(rows)} 筆報價壓縮為 {target.name}")
+
+    # ---------- 查詢 ----------
+
+    def query(self, symbol: str, start: datetime, end: datetime) -> List[QuoteRow]:
+        """
+        查詢一支股票在時間區間內的報價（可在任何執行緒呼叫）
+
+        Args:
+            symbol: 股票代碼
+            start: 開始時間（含）
+            end: 結束時間（不含）
+
+        Returns:
+            依時間排序的 QuoteRow 列表
+        """
+        start_ts = int(to_taipei(start).timestamp())
+        end_ts = int(to_taipei(end).timestamp())
+
+        rows = self._query_archive(symbol, start_ts, end_ts)
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            rows += [QuoteRow(*row) for row in conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM quotes WHERE symbol = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (symbol, start_ts, end_ts)
+            )]
+        finally:
+            conn.close()
+        # 壓縮進行中時同一筆可能同時在兩邊
+        unique = {row.ts: row for row in rows}
+        return [unique[ts] for ts in sorted(unique)]
+
+    def _query_archive(self, symbol: str, start_ts: int, end_ts: int) -> List[QuoteRow]:
+        if not self.archive_dir.exists():
+            return []
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            return []
+
+        rows = []
+        day = datetime.fromtimestamp(start_ts, TAIPEI).date()
+        last_day = datetime.fromtimestamp(max(start_ts, end_ts - 1), TAIPEI).date()
+        while day <= last_day:
+            path = self.archive_dir / f"{day.isoformat()}.parquet"
+            if path.exists():
+                table = pq.read_table(path, filters=[
+                    ('symbol', '=', symbol), ('ts', '>=', start_ts), ('ts', '<', end_ts)
+                ])
+                rows += [QuoteRow(**record) for record in table.to_pylist()]
+            day += timedelta(days=1)
+        return rows
+
+    def summary(self) -> str:
+        """寫入統計摘要文字"""
+        return f"報價歷史：寫入 {self.written} 筆，壓縮 {self.archived} 筆，丟棄 {self.dropped} 筆"
+
+
+def _day_start(day: date) -> int:
+    """台北時間某日 00:00 的 Unix 秒數"""
+    return int(datetime.combine(day, datetime.min.time(), TAIPEI).timestamp())
+
@@ -0,0 +1,145 @@
+"""
+報價變動偵測
+
+對每筆解析後的報價（quote.Quote）計算指紋（hash），只有數值真的變動的股票才送進 GUI 佇列；
+沒變動的股票只回報「自 HH:MM:SS 起未變動」。盤中以外的時段，
+觀察清單大部分股票在兩次輪詢之間都不會變動，可省下大部分的佇列與畫面更新。
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from quote import Quote
+
+
+# 未發布的股票（未變動、失敗、快取）最多每隔幾秒送一次進度訊息
+PROGRESS_INTERVAL = 0.25
+
+
+def quote_fingerprint(quote: Quote) -> bytes:
+    """
+    計算報價內容的指紋
+
+    只看已解析的數值（Quote.values()），報價時間、爬取時間與文字格式差異不會被當成變動。
+
+    Args:
+        quote: 報價
+
+    Returns:
+        8 bytes 的指紋
+    """
+    return hashlib.blake2b(repr(quote.values()).encode('utf-8'), digest_size=8).digest()
+
+
+class QuoteChangeDetector:
+    """記錄每支股票最後一次的報價指紋（可跨執行緒使用）"""
+
+    def __init__(self):
+        # 股票代碼 -> (指紋, 該內容第一次出現的時間 HH:MM:SS)
+        self._last: Dict[str, Tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    def has_changed(self, stock_code: str, quote: Quote) -> bool:
+        """
+        比對並記錄報價指紋
+
+        Args:
+            stock_code: 股票代碼
+            quote: 最新的報價
+
+        Returns:
+            True 表示與上次不同（或第一次出現），應該發布到 GUI
+        """
+        fingerprint = quote_fingerprint(quote)
+        with self._lock:
+            previous = self._last.get(stock_code)
+            if previous is not None and previous[0] == fingerprint:
+                return False
+            self._last[stock_code] = (fingerprint, datetime.now().strftime('%H:%M:%S'))
+            return True
+
+    def unchanged_since(self, stock_code: str) -> Optional[str]:
+        """取得目前報價內容第一次出現的時間（HH:MM:SS）"""
+        with self._lock:
+            previous = self._last.get(stock_code)
+            return previous[1] if previous is not None else None
+
+    def forget(self, stock_code: str):
+        """移除股票的紀錄（重新加入觀察時會再次發布）"""
+        with self._lock:
+            self._last.pop(stock_code, None)
+
+
+class QuotePublisher:
+    """
+    一次更新工作的結果發布器：只把有變動的股票放進 GUI 佇列
+
+    佇列訊息:
+        ('stock', (股票代碼, Quote, 已完成數, 總數))      有變動的股票完成時
+        ('progress', (已完成數, 總數))                   其他股票完成時（節流）
+        ('success', (有變動的 Quote 列表, {未變動股票代碼: 'HH:MM:SS'}))  全部完成時
+        ('error', 錯誤訊息)                                             發生例外時
+    """
+
+    def __init__(
+        self,
+        result_queue,
+        total: int,
+        detector: Optional[QuoteChangeDetector] = None
+    ):
+        """
+        Args:
+            result_queue: GUI 結果佇列
+            total: 本次更新的股票總數
+            detector: 變動偵測器，None 表示每支股票都發布
+        """
+        self.result_queue = result_queue
+        self.total = total
+        self.detector = detector
+        self.done = 0
+        self.results = []
+        self.unchanged: Dict[str, str] = {}
+        self._progress_at = 0.0
+
+    def publish(self, stock_code: str, stock_data: Optional[Dict]):
+        """
+        處理一支股票的結果（失敗的股票只計入進度）
+
+        爬蟲回傳的字串字典在這裡解析成 Quote，之後不再重新解析。
+
+        Args:
+            stock_code: 股票代碼
+            stock_data: 股票資訊，失敗時為 None
+        """
+        self.done += 1
+        if stock_data is None:
+            self._progress()
+            return
+        quote = Quote.from_scraped(stock_code, stock_data)
+        if self.detector is not None and not self.detector.has_changed(stock_code, quote):
+            # 快取的結果沒有重新爬取，不能當成「報價未變動」（會讓排程誤判為冷門股）
+            if not stock_data.get('from_cache'):
+                self.unchanged[stock_code] = self.detector.unchanged_since(stock_code)
+            self._progress()
+            return
+        self.results.append(quote)
+        self._progress_at = time.monotonic()
+        self.result_queue.put(('stock', (stock_code, quote, self.done, self.total)))
+
+    def _progress(self):
+        """沒有逐筆發布的股票也要讓進度前進（每 PROGRESS_INTERVAL 秒最多一次）"""
+        now = time.monotonic()
+        if now - self._progress_at >= PROGRESS_INTERVAL:
+            self._progress_at = now
+            self.result_queue.put(('progress', (self.done, self.total)))
+
+    def finish(self):
+        """發布完成訊息"""
+        self.result_queue.put(('success', (self.results, self.unchanged)))
+
+    def fail(self, error_msg: str):
+        """發布錯誤訊息"""
+        self.result_queue.put(('error', error_msg))
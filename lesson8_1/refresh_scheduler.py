@@ -0,0 +1,201 @@
+"""
+逐支股票的更新排程器
+
+每 60 秒一次更新整個觀察清單，會造成「一陣瀏覽器忙碌 → 長時間閒置」的尖峰負載，
+而且每支股票的更新頻率都一樣。RefreshScheduler 為每支股票記錄下一次到期時間：
+
+- 新加入的股票在一個週期內平均錯開第一次到期時間，之後每次更新都加上隨機抖動（jitter），
+  各股票不會再對齊成同一波
+- 依優先等級決定週期：剛加入、畫面上可見、波動大的股票較頻繁；
+  畫面外的股票較少更新，長時間沒有變動的股票週期再乘上 quiet_factor
+  （同時符合多個等級時取最短週期）
+- 優先等級變短時，已排定的到期時間會提前，不必等舊週期走完
+"""
+
+import heapq
+import itertools
+import random
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+
+# 各優先等級的更新週期（秒）
+DEFAULT_INTERVALS = {
+    'recent': 15.0,    # 剛加入觀察清單
+    'volatile': 20.0,  # 漲跌幅絕對值達 volatile_pct
+    'visible': 30.0,   # 卡片在畫面上
+    'normal': 60.0,    # 一般（畫面外）
+}
+
+
+class RefreshScheduler:
+    """逐支股票的到期時間排程（單執行緒使用）"""
+
+    def __init__(
+        self,
+        intervals: Optional[Dict[str, float]] = None,
+        jitter: float = 0.15,
+        recent_window: float = 300.0,
+        volatile_pct: float = 2.0,
+        quiet_factor: float = 2.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            intervals: 各優先等級的更新週期（秒），未指定的等級使用 DEFAULT_INTERVALS
+            jitter: 週期的隨機抖動比例（0.15 表示 ±15%）
+            recent_window: 加入後幾秒內視為「剛加入」
+            volatile_pct: 漲跌幅絕對值達到此百分比視為「波動大」
+            quiet_factor: 報價沒有變動的股票，可見／一般週期乘上的倍數
+            clock: 取得目前時間（秒）的函式
+        """
+        self.intervals = dict(DEFAULT_INTERVALS, **(intervals or {}))
+        self.jitter = jitter
+        self.recent_window = recent_window
+        self.volatile_pct = volatile_pct
+        self.quiet_factor = quiet_factor
+        self.clock = clock
+
+        self._due: Dict[str, float] = {}
+        self._last_fetch: Dict[str, float] = {}
+        self._added_at: Dict[str, float] = {}
+        self._volatile: Set[str] = set()
+        self._quiet: Set[str] = set()
+        # None 表示沒有可見範圍的概念（所有股票都視為可見）
+        self._visible: Optional[Set[str]] = None
+        # (到期時間, 序號, 股票代碼)；到期時間與 _due 不符的項目已失效
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+
+    # ==================== 股票增減 ====================
+
+    def add(self, stock_codes: Iterable[str], recent: bool = True):
+        """
+        加入股票，第一次到期時間在各自的週期內平均錯開
+
+        Args:
+            stock_codes: 股票代碼
+            recent: 是否視為「剛加入」（啟動時載入的既有清單應傳 False）
+        """
+        now = self.clock()
+        new_codes = [code for code in stock_codes if code not in self._due]
+        for i, code in enumerate(new_codes):
+            if recent:
+                self._added_at[code] = now
+            interval = self.interval(code)
+            offset = interval * (i + random.random()) / len(new_codes)
+            self._last_fetch[code] = now + offset - interval
+            self._set_due(code, now + offset)
+
+    def remove(self, stock_code: str):
+        """移除股票"""
+        for table in (self._due, self._last_fetch, self._added_at):
+            table.pop(stock_code, None)
+        self._volatile.discard(stock_code)
+        self._quiet.discard(stock_code)
+
+    def __contains__(self, stock_code: str) -> bool:
+        return stock_code in self._due
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    # ==================== 優先等級 ====================
+
+    def interval(self, stock_code: str) -> float:
+        """取得股票目前的更新週期（所有符合等級中最短的）"""
+        if self._visible is None or stock_code in self._visible:
+            interval = self.intervals['visible']
+        else:
+            interval = self.intervals['normal']
+        if stock_code in self._quiet:
+            interval *= self.quiet_factor
+
+        added_at = self._added_at.get(stock_code)
+        if added_at is not None and self.clock() - added_at < self.recent_window:
+            interval = min(interval, self.intervals['recent'])
+        if stock_code in self._volatile:
+            interval = min(interval, self.intervals['volatile'])
+        return interval
+
+    def set_visible(self, stock_codes: Optional[Iterable[str]]):
+        """
+        設定畫面上可見的股票（None 表示全部可見）
+
+        Args:
+            stock_codes: 可見的股票代碼
+        """
+        visible = None if stock_codes is None else set(stock_codes)
+        if visible == self._visible:
+            return
+        previous, self._visible = self._visible, visible
+        changed = self._due.keys() if previous is None or visible is None else previous ^ visible
+        for code in list(changed):
+            self._reprioritize(code)
+
+    def record_quote(self, stock_code: str, change_pct: Optional[float] = None, unchanged: bool = False):
+        """
+        依最新報價更新股票的波動／靜止狀態
+
+        Args:
+            stock_code: 股票代碼
+            change_pct: 漲跌幅（百分比），None 表示未知
+            unchanged: 報價是否與上次相同
+        """
+        if stock_code not in self._due:
+            return
+        if change_pct is not None:
+            if abs(change_pct) >= self.volatile_pct:
+                self._volatile.add(stock_code)
+            else:
+                self._volatile.discard(stock_code)
+        if unchanged:
+            self._quiet.add(stock_code)
+        else:
+            self._quiet.discard(stock_code)
+        self._reprioritize(stock_code)
+
+    def _reprioritize(self, stock_code: str):
+        """週期變短時把到期時間提前"""
+        if stock_code not in self._due:
+            return
+        earliest = self._last_fetch[stock_code] + self.interval(stock_code)
+        if earliest < self._due[stock_code]:
+            self._set_due(stock_code, earliest)
+
+    # ==================== 到期 ====================
+
+    def _set_due(self, stock_code: str, due: float):
+        self._due[stock_code] = due
+        heapq.heappush(self._heap, (due, next(self._seq), stock_code))
+
+    def pop_due(self, limit: Optional[int] = None) -> List[str]:
+        """
+        取出已到期的股票，並以（加上抖動的）週期排定下一次到期時間
+
+        Args:
+            limit: 最多取出幾支，None 表示全部
+
+        Returns:
+            到期的股票代碼（最早到期的在前）
+        """
+        now = self.clock()
+        codes = []
+        while self._heap and self._heap[0][0] <= now and (limit is None or len(codes) < limit):
+            due, _, code = heapq.heappop(self._heap)
+            if self._due.get(code) != due:
+                continue  # 已失效
+            codes.append(code)
+            self._last_fetch[code] = now
+            spread = random.uniform(1 - self.jitter, 1 + self.jitter)
+            self._set_due(code, now + self.interval(code) * spread)
+        return codes
+
+    def seconds_until_next(self) -> Optional[float]:
+        """距離下一支股票到期的秒數，沒有股票時返回 None"""
+        while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self.clock())
+
@@ -0,0 +1,140 @@
+"""
+頁面渲染設定檔（render profile）
+
+- full: 目前的行為，捲動整頁（scan_full_page）並下載所有資源
+- lean: 只載入擷取報價所需的資源
+    * 中止圖片、字型、影音、樣式表等請求
+    * 中止非 wantgoo 網域（廣告、追蹤程式）的請求
+    * 不捲動整頁，DOM ready 後只等待 wait_for 條件成立
+
+透過 crawl4ai 的 on_page_context_created hook 在每個新頁面上設定 route，
+並統計每頁的請求數、被中止的請求數與實際下載的位元組數。
+"""
+
+import contextvars
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    """一組頁面載入行為的設定"""
+
+    name: str
+    scan_full_page: bool = True
+    wait_until: str = "domcontentloaded"
+    blocked_resource_types: FrozenSet[str] = frozenset()
+    # None 表示不限制網域；否則只允許這些網域（含子網域）
+    allowed_hosts: Optional[Tuple[str, ...]] = None
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """
+        判斷請求是否應該中止
+
+        Args:
+            resource_type: Playwright 的 request.resource_type
+            url: 請求網址
+
+        Returns:
+            True 表示中止這個請求
+        """
+        if resource_type in self.blocked_resource_types:
+            return True
+        if self.allowed_hosts is None or resource_type == "document":
+            return False
+        if url.startswith(("data:", "blob:")):
+            return False
+        host = urlsplit(url).hostname or ""
+        return not any(host == h or host.endswith("." + h) for h in self.allowed_hosts)
+
+
+RENDER_PROFILES: Dict[str, RenderProfile] = {
+    "full": RenderProfile(name="full", scan_full_page=True),
+    "lean": RenderProfile(
+        name="lean",
+        scan_full_page=False,
+        wait_until="domcontentloaded",
+        blocked_resource_types=frozenset({
+            "image", "media", "font", "stylesheet", "texttrack", "eventsource", "manifest", "other"
+        }),
+        allowed_hosts=("wantgoo.com",),
+    ),
+}
+
+
+def get_render_profile(name: str) -> RenderProfile:
+    """
+    依名稱取得渲染設定檔
+
+    Args:
+        name: "full" 或 "lean"
+
+    Returns:
+        RenderProfile 實例
+    """
+    try:
+        return RENDER_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"未知的渲染設定檔: {name}（可用: {', '.join(RENDER_PROFILES)}）")
+
+
+@dataclass
+class PageStats:
+    """單一頁面的資源統計"""
+
+    requests: int = 0
+    blocked: int = 0
+    bytes_received: int = 0
+    blocked_by_type: Dict[str, int] = field(default_factory=dict)
+
+
+# 目前這次 crawler.arun 對應的統計物件；hook 與 arun 在同一個 task 中執行
+current_page_stats: contextvars.ContextVar[Optional[PageStats]] = contextvars.ContextVar(
+    "current_page_stats", default=None
+)
+
+
+def install_render_profile(crawler, profile: RenderProfile):
+    """
+    在 crawler 上安裝渲染設定檔的 hook（每個 crawler 只需呼叫一次）
+
+    統計資料會寫入呼叫 arun 前以 current_page_stats.set() 設定的 PageStats。
+
+    Args:
+        crawler: AsyncWebCrawler 實例
+        profile: 渲染設定檔
+    """
+
+    async def on_page_context_created(page, context, **kwargs):
+        stats = current_page_stats.get()
+
+        if profile.blocked_resource_types or profile.allowed_hosts is not None:
+            async def handle_route(route):
+                request = route.request
+                if profile.should_block(request.resource_type, request.url):
+                    if stats is not None:
+                        stats.blocked += 1
+                        stats.blocked_by_type[request.resource_type] = (
+                            stats.blocked_by_type.get(request.resource_type, 0) + 1
+                        )
+                    await route.abort()
+                else:
+                    await route.continue_()
+
+            await page.route("**/*", handle_route)
+
+        if stats is not None:
+            async def on_request_finished(request):
+                stats.requests += 1
+                try:
+                    sizes = await request.sizes()
+                    stats.bytes_received += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+                except Exception:
+                    pass
+
+            page.on("requestfinished", on_request_finished)
+
+        return page
+
+    crawler.crawler_strategy.set_hook("on_page_context_created", on_page_context_created)
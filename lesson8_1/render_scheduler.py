@@ -0,0 +1,102 @@
+"""
+以畫面預算合併報價更新的繪製排程器
+
+結果大量湧入時，每收到一筆就立刻重繪卡片會讓 Tk 主迴圈忙於重複的 configure。
+RenderScheduler 只記錄「哪些股票需要重繪」（dirty set），
+每個畫面預算（預設 33 ms，約 30 fps）最多繪製一次；
+同一股票在同一幀內的多次更新會合併成一次繪製。
+"""
+
+import time
+from typing import Callable, Iterable, Optional, Set
+
+
+class RenderStats:
+    """繪製統計"""
+
+    __slots__ = ("marked", "coalesced", "frames", "rendered", "dropped", "max_frame_ms")
+
+    def __init__(self):
+        self.marked = 0          # mark_dirty 次數
+        self.coalesced = 0       # 併入同一幀、沒有造成額外繪製的標記次數
+        self.frames = 0          # 實際繪製的幀數
+        self.rendered = 0        # 繪製的股票（卡片）次數
+        self.dropped = 0         # 繪製超出預算而跳過的幀數
+        self.max_frame_ms = 0.0  # 單幀最長繪製時間
+
+    def summary(self) -> str:
+        """統計摘要文字"""
+        return (f"繪製 {self.frames} 幀／{self.rendered} 張卡片，"
+                f"合併 {self.coalesced} 次更新，掉幀 {self.dropped}，"
+                f"最長一幀 {self.max_frame_ms:.1f} ms")
+
+
+class RenderScheduler:
+    """收集 dirty 股票代碼，依畫面預算批次繪製"""
+
+    def __init__(
+        self,
+        widget,
+        render: Callable[[Set[str]], None],
+        budget_ms: int = 33
+    ):
+        """
+        Args:
+            widget: 用來排程 after() 的 Tk 元件
+            render: 繪製函式，參數為這一幀需要重繪的股票代碼集合
+            budget_ms: 每幀的時間預算（毫秒），兩次繪製至少間隔這麼久
+        """
+        self.widget = widget
+        self.render = render
+        self.budget_ms = budget_ms
+        self.stats = RenderStats()
+
+        self._dirty: Set[str] = set()
+        self._after_id: Optional[str] = None
+        self._last_flush = 0.0
+
+    def mark_dirty(self, stock_code: str):
+        """標記一支股票需要重繪"""
+        self.mark_dirty_many((stock_code,))
+
+    def mark_dirty_many(self, stock_codes: Iterable[str]):
+        """
+        標記多支股票需要重繪
+
+        Args:
+            stock_codes: 股票代碼
+        """
+        for stock_code in stock_codes:
+            self.stats.marked += 1
+            if stock_code in self._dirty or self._after_id is not None:
+                self.stats.coalesced += 1
+            self._dirty.add(stock_code)
+
+        if self._dirty and self._after_id is None:
+            elapsed_ms = (time.perf_counter() - self._last_flush) * 1000
+            delay_ms = max(0, int(self.budget_ms - elapsed_ms))
+            self._after_id = self.widget.after(delay_ms, self.flush)
+
+    def discard(self, stock_code: str):
+        """移除尚未繪製的標記（例如股票已移出觀察清單）"""
+        self._dirty.discard(stock_code)
+
+    def flush(self):
+        """立即繪製目前所有 dirty 的股票"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        if not self._dirty:
+            return
+
+        stock_codes, self._dirty = self._dirty, set()
+        started = time.perf_counter()
+        self.render(stock_codes)
+        finished = time.perf_counter()
+
+        frame_ms = (finished - started) * 1000
+        self.stats.frames += 1
+        self.stats.rendered += len(stock_codes)
+        self.stats.dropped += int(frame_ms // self.budget_ms)
+        self.stats.max_frame_ms = max(self.stats.max_frame_ms, frame_ms)
+        self._last_flush = finished
@@ -0,0 +1,172 @@
+"""
+由 CSS 擷取 Schema（get_stock_schema() 格式）產生在頁面內執行的 JavaScript
+
+- build_readiness_js(): 產生 wait_for 用的就緒判斷函式
+    以 MutationObserver 監聽 DOM，當所有必要欄位的節點都有非空文字時立即完成，
+    不使用輪詢間隔。欄位可設定 "required": False 排除在就緒條件之外。
+- compile_extraction_js(): 把整份 Schema 編譯成單一 JavaScript 函式，
+    在頁面內直接取值並回傳物件，取代「整頁 HTML 送回 Python → 解析 → json.dumps → json.loads」。
+"""
+
+import contextvars
+import json
+from typing import Dict, List, Optional
+
+
+def required_fields(schema: Dict) -> List[Dict]:
+    """
+    取得 Schema 中會影響就緒判斷的欄位
+
+    Args:
+        schema: CSS 擷取 Schema
+
+    Returns:
+        必要欄位列表（未設定 "required" 的欄位預設為必要）
+    """
+    return [
+        f for f in schema.get("fields", [])
+        if f.get("required", True) and f.get("type", "text") in ("text", "attribute", "html")
+    ]
+
+
+def build_readiness_js(schema: Dict, timeout_ms: int = 15000) -> str:
+    """
+    產生 crawl4ai wait_for 使用的就緒判斷 JavaScript
+
+    函式回傳 Promise：必要欄位全部有值時 resolve(true)；
+    超過 timeout_ms 仍未就緒則 resolve 當下的判斷結果。
+
+    crawl4ai 會在同一次等待中重複呼叫這個函式直到 wait_for_timeout，
+    因此截止時間記在函式的閉包裡：第一次呼叫時起算，之後的呼叫只等剩下的時間，
+    逾時後立即返回判斷結果，不會再開一個新的 timeout_ms 等待。
+    字串本身是立即執行的函式運算式，每次等待（或每次 page.evaluate）各自一個截止時間。
+
+    Args:
+        schema: CSS 擷取 Schema
+        timeout_ms: 等待上限（毫秒），應略小於 wait_for_timeout
+
+    Returns:
+        以 "js:" 開頭、可直接傳給 CrawlerRunConfig(wait_for=...) 的字串
+    """
+    fields = required_fields(schema)
+    checks = [[f["selector"], f.get("type", "text"), f.get("attribute")] for f in fields]
+    # 只有讀取屬性的欄位才需要監聽屬性變動（報價頁的 class/style 變動很頻繁）
+    attributes = sorted({f["attribute"] for f in fields if f.get("type") == "attribute" and f.get("attribute")})
+    observe_options = "childList: true, subtree: true, characterData: true"
+    if attributes:
+        observe_options += f", attributes: true, attributeFilter: {json.dumps(attributes)}"
+
+    return "js:" + f"""(() => {{
+    let deadline = null;
+    return async () => {{
+        const baseSelector = {json.dumps(schema.get("baseSelector", "body"))};
+        const checks = {json.dumps(checks, ensure_ascii=False)};
+        const isReady = () => {{
+            const base = document.querySelector(baseSelector);
+            if (!base) return false;
+            return checks.every(([selector, type, attribute]) => {{
+                const el = base.querySelector(selector);
+                if (!el) return false;
+                const value = type === 'attribute' ? el.getAttribute(attribute) : el.textContent;
+                return !!(value && value.trim());
+            }});
+        }};
+        if (isReady()) return true;
+        if (deadline === null) deadline = Date.now() + {int(timeout_ms)};
+        const remaining = deadline - Date.now();
+        if (remaining <= 0) return false;
+        return await new Promise((resolve) => {{
+            const observer = new MutationObserver(() => {{
+                if (isReady()) {{
+                    observer.disconnect();
+                    clearTimeout(timer);
+                    resolve(true);
+                }}
+            }});
+            observer.observe(document.documentElement, {{ {observe_options} }});
+            const timer = setTimeout(() => {{
+                observer.disconnect();
+                resolve(isReady());
+            }}, remaining);
+        }});
+    }};
+}})()"""
+
+
+def _field_value_js(field: Dict) -> str:
+    """產生單一欄位取值的 JavaScript 運算式（el 為已選取的節點）"""
+    field_type = field.get("type", "text")
+    if field_type == "attribute":
+        return f"el.getAttribute({json.dumps(field.get('attribute', ''))})"
+    if field_type == "html":
+        return "el.innerHTML"
+    return "(el.textContent || '').trim()"
+
+
+def compile_extraction_js(schema: Dict) -> str:
+    """
+    把 CSS 擷取 Schema 編譯成在頁面內執行的 JavaScript 函式
+
+    回傳值與 JsonCssExtractionStrategy 相同：每個 baseSelector 節點一筆物件，
+    找不到節點的欄位會略過（有設定 "default" 時使用預設值）。
+    支援的欄位類型：text、attribute、html。
+
+    Args:
+        schema: CSS 擷取 Schema
+
+    Returns:
+        JavaScript 函式運算式字串，可直接交給 page.evaluate()
+    """
+    statements = []
+    for field in schema.get("fields", []):
+        if field.get("type", "text") not in ("text", "attribute", "html"):
+            continue
+        name = json.dumps(field["name"], ensure_ascii=False)
+        selector = json.dumps(field.get("selector", ""))
+        default = json.dumps(field["default"], ensure_ascii=False) if "default" in field else "undefined"
+        statements.append(
+            f"        {{ const el = pick({selector}); "
+            f"const value = el ? {_field_value_js(field)} : {default}; "
+            f"if (value !== undefined && value !== null) record[{name}] = value; }}"
+        )
+
+    body = "\n".join(statements)
+    return f"""() => {{
+    const bases = Array.from(document.querySelectorAll({json.dumps(schema.get("baseSelector", "body"))}));
+    return bases.map((base) => {{
+        const pick = (selector) => selector ? base.querySelector(selector) : base;
+        const record = {{}};
+{body}
+        return record;
+    }}).filter((record) => Object.keys(record).length > 0);
+}}"""
+
+
+# 目前這次 crawler.arun 的頁內擷取工作：{"script": ..., "result": ...}
+current_inpage_extraction: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar(
+    "current_inpage_extraction", default=None
+)
+
+
+def install_inpage_extraction(crawler):
+    """
+    在 crawler 上安裝頁內擷取 hook（每個 crawler 只需呼叫一次）
+
+    hook 於 wait_for 條件成立後、取得 HTML 前執行：若呼叫 arun 前以
+    current_inpage_extraction.set({"script": ...}) 指定了擷取函式，
+    就在頁面內執行並把回傳的物件存到同一個字典的 "result"。
+
+    Args:
+        crawler: AsyncWebCrawler 實例
+    """
+
+    async def before_retrieve_html(page, context=None, **kwargs):
+        job = current_inpage_extraction.get()
+        if job is not None and job.get("script"):
+            try:
+                job["result"] = await page.evaluate(job["script"])
+            except Exception as e:
+                job["error"] = str(e)
+        return page
+
+    crawler.crawler_strategy.set_hook("before_retrieve_html", before_retrieve_html)
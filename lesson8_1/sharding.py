@@ -0,0 +1,357 @@
+"""
+多行程分片爬取
+
+單一 asyncio 迴圈驅動單一 Chromium，在觀察清單達數百支時會卡在 CPU
+（頁面渲染與擷取）。分片模式把股票代碼分給多個常駐的工作行程，
+每個行程各自擁有一個已啟動的瀏覽器與報價來源。
+
+- 依各股票最近的頁面耗時（EWMA）以 LPT 貪婪法分配，讓各行程的總工作量接近
+- 工作行程逐筆回傳結果，父行程透過 QuotePublisher 轉成與 submit_crawler_job
+  相同的佇列訊息（只發布有變動的股票）
+- 工作行程啟動失敗、異常結束或逾時未回應時，它負責的分片視為失敗，
+  更新仍會結束；異常的行程會重新啟動
+"""
+
+import asyncio
+import heapq
+import itertools
+import multiprocessing as mp
+import multiprocessing.connection as mp_connection
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+from quote_publisher import QuoteChangeDetector, QuotePublisher
+
+
+def default_workers() -> int:
+    """預設工作行程數：每個行程會帶一個 Chromium，取核心數的一半"""
+    return max(2, (os.cpu_count() or 4) // 2)
+
+
+class LatencyTracker:
+    """記錄每支股票最近的頁面耗時（指數移動平均）"""
+
+    def __init__(self, alpha: float = 0.3, default_ms: float = 3000.0):
+        """
+        Args:
+            alpha: EWMA 權重，越大越偏向最近一次
+            default_ms: 沒有紀錄的股票使用的預估耗時（毫秒）
+        """
+        self.alpha = alpha
+        self.default_ms = default_ms
+        self._ewma: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stock_code: str, fetch_ms: float):
+        """記錄一次耗時"""
+        with self._lock:
+            previous = self._ewma.get(stock_code)
+            if previous is None:
+                self._ewma[stock_code] = float(fetch_ms)
+            else:
+                self._ewma[stock_code] = self.alpha * fetch_ms + (1 - self.alpha) * previous
+
+    def estimate(self, stock_code: str) -> float:
+        """取得預估耗時（毫秒）"""
+        with self._lock:
+            return self._ewma.get(stock_code, self.default_ms)
+
+
+def partition_by_latency(
+    stock_codes: List[str],
+    shards: int,
+    tracker: LatencyTracker
+) -> List[List[str]]:
+    """
+    依預估耗時把股票分成 shards 組（LPT：耗時長的先分給目前最空的組）
+
+    Args:
+        stock_codes: 股票代碼列表
+        shards: 分組數
+        tracker: 耗時紀錄
+
+    Returns:
+        各組的股票代碼列表（不含空組）
+    """
+    shards = max(1, min(shards, len(stock_codes)))
+    heap = [(0.0, i) for i in range(shards)]
+    groups: List[List[str]] = [[] for _ in range(shards)]
+
+    for code in sorted(stock_codes, key=tracker.estimate, reverse=True):
+        load, index = heapq.heappop(heap)
+        groups[index].append(code)
+        heapq.heappush(heap, (load + tracker.estimate(code), index))
+
+    return [g for g in groups if g]
+
+
+def _worker_main(index, inbox, outbox):
+    """工作行程進入點：常駐一個瀏覽器，逐一處理父行程送來的分片"""
+    asyncio.run(_worker_loop(index, inbox, outbox))
+
+
+async def _worker_loop(index, inbox, outbox):
+    loop = asyncio.get_running_loop()
+    try:
+        # 只在子行程匯入爬蟲模組
+        from crawl4ai import AsyncWebCrawler
+        import main as monitor
+
+        crawler = AsyncWebCrawler(config=monitor.get_browser_config())
+        await crawler.start()
+        source = monitor.build_quote_source(crawler)
+    except Exception as e:
+        # 瀏覽器無法啟動：收到的每個分片都直接回報失敗，父行程的工作才能結束
+        startup_error = f"工作行程 {index} 啟動失敗: {e}"
+        while True:
+            job = await loop.run_in_executor(None, inbox.get)
+            if job is None:
+                return
+            outbox.send(('error', job[0], None, startup_error))
+            outbox.send(('done', job[0], None, index))
+
+    try:
+        while True:
+            job = await loop.run_in_executor(None, inbox.get)
+            if job is None:
+                break
+            job_id, stock_codes = job
+            try:
+                async for stock_code, stock_data in monitor.stream_stocks(stock_codes, source=source):
+                    outbox.send(('stock', job_id, stock_code, stock_data))
+            except Exception as e:
+                outbox.send(('error', job_id, None, str(e)))
+            outbox.send(('done', job_id, None, index))
+    finally:
+        await source.close()
+        await crawler.close()
+
+
+class _Job:
+    """一次分片更新的進度"""
+
+    def __init__(self, workers: Set[int], publisher: QuotePublisher, deadline: float):
+        # 尚未回報完成的工作行程編號
+        self.pending_workers = workers
+        self.publisher = publisher
+        self.deadline = deadline
+        self.errors: List[str] = []
+
+
+class ShardedCrawler:
+    """多行程分片爬蟲（工作行程在第一次使用時啟動，之後常駐；異常結束時自動重啟）"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        tracker: Optional[LatencyTracker] = None,
+        job_timeout: float = 300.0
+    ):
+        """
+        Args:
+            workers: 工作行程數，預設為 default_workers()
+            tracker: 頁面耗時紀錄，用來平衡各行程的工作量
+            job_timeout: 一次更新的等待上限（秒），逾時未回報的分片視為失敗
+        """
+        self.workers = workers or default_workers()
+        self.tracker = tracker or LatencyTracker()
+        self.job_timeout = job_timeout
+
+        self._ctx = mp.get_context("spawn")
+        self._processes = []
+        self._inboxes = []
+        # 每個工作行程各自一條結果管線：行程異常結束只會弄壞自己的管線
+        self._readers = []
+        self._relay: Optional[threading.Thread] = None
+        # 通知目前這一組工作行程的轉送執行緒結束（每次啟動換一個）
+        self._stop = threading.Event()
+        self._jobs: Dict[int, _Job] = {}
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        """工作行程是否已啟動"""
+        return bool(self._processes)
+
+    def start(self):
+        """啟動工作行程（例如開盤前預熱；已啟動時無作用）"""
+        with self._lock:
+            self._ensure_started()
+
+    def _start_worker(self, index: int):
+        """啟動（或重新啟動）第 index 個工作行程，使用新的收件佇列與結果管線"""
+        inbox = self._ctx.Queue()
+        reader, writer = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, inbox, writer),
+            name=f"CrawlerShard-{index}",
+            daemon=True
+        )
+        process.start()
+        # 父行程不寫入；關閉後工作行程結束時 reader 才會收到 EOF
+        writer.close()
+        if self._readers[index] is not None:
+            self._readers[index].close()
+        self._inboxes[index] = inbox
+        self._readers[index] = reader
+        self._processes[index] = process
+
+    def _ensure_started(self):
+        """啟動工作行程與轉送執行緒（需持有 _lock）"""
+        if self._processes:
+            return
+        self._stop = threading.Event()
+        self._readers = [None] * self.workers
+        self._inboxes = [None] * self.workers
+        self._processes = [None] * self.workers
+        for i in range(self.workers):
+            self._start_worker(i)
+
+        self._relay = threading.Thread(
+            target=self._relay_results, args=(self._stop,), name="ShardRelay", daemon=True
+        )
+        self._relay.start()
+        print(f"✓ 啟動 {self.workers} 個爬蟲工作行程")
+
+    def submit(
+        self,
+        stock_codes: List[str],
+        result_queue: queue.Queue,
+        detector: Optional[QuoteChangeDetector] = None
+    ):
+        """
+        把股票分片送給各工作行程（不阻塞），結果陸續放入 result_queue
+
+        Args:
+            stock_codes: 要爬取的股票代碼列表
+            result_queue: 用於傳遞結果的佇列
+            detector: 報價變動偵測器，未變動的股票不會逐筆發布
+        """
+        publisher = QuotePublisher(result_queue, len(stock_codes), detector)
+        if not stock_codes:
+            publisher.finish()
+            return
+
+        with self._lock:
+            self._ensure_started()
+            shards = partition_by_latency(stock_codes, self.workers, self.tracker)
+            job_id = next(self._job_ids)
+            self._jobs[job_id] = _Job(
+                set(range(len(shards))), publisher, time.monotonic() + self.job_timeout
+            )
+            for inbox, shard in zip(self._inboxes, shards):
+                inbox.put((job_id, shard))
+
+    def _relay_results(self, stop: threading.Event):
+        """父行程的轉送執行緒：把工作行程的結果轉成 GUI 佇列訊息（stop 設定後結束）"""
+        while True:
+            with self._lock:
+                if stop.is_set():
+                    break
+                readers = list(self._readers)
+                processes = list(self._processes)
+            for reader in mp_connection.wait(readers, timeout=1.0):
+                try:
+                    message = reader.recv()
+                except (EOFError, OSError):
+                    # 工作行程已結束（或管線已被換掉），由 _check_workers 處理
+                    processes[readers.index(reader)].join(1.0)
+                    continue
+                self._handle_message(message)
+            self._check_workers(stop)
+
+    def _handle_message(self, message):
+        kind, job_id, stock_code, payload = message
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+
+            if kind == 'stock':
+                if payload is not None and 'fetch_ms' in payload and not payload.get('from_cache'):
+                    self.tracker.record(stock_code, payload['fetch_ms'])
+                job.publisher.publish(stock_code, payload)
+            elif kind == 'error':
+                job.errors.append(payload)
+            elif kind == 'done':
+                self._shard_done(job_id, job, payload)
+
+    def _shard_done(self, job_id: int, job: _Job, index: int):
+        """一個分片結束（成功、失敗或放棄等待）；所有分片都結束時發布結果（需持有 _lock）"""
+        job.pending_workers.discard(index)
+        if job.pending_workers:
+            return
+        del self._jobs[job_id]
+        if job.errors and job.publisher.done == 0:
+            job.publisher.fail('; '.join(job.errors))
+        else:
+            job.publisher.finish()
+
+    def _check_workers(self, stop: threading.Event):
+        """
+        處理異常結束或逾時的工作行程
+
+        行程已結束或工作逾時：它負責的分片視為失敗（讓更新能夠結束），
+        並重新啟動該行程（逾時的行程先強制結束）。
+        """
+        now = time.monotonic()
+        with self._lock:
+            if stop.is_set():
+                return
+            for index, process in enumerate(self._processes):
+                dead = not process.is_alive()
+                stuck = any(
+                    index in job.pending_workers and now > job.deadline
+                    for job in self._jobs.values()
+                )
+                if not dead and not stuck:
+                    continue
+
+                reason = f"工作行程 {index} 異常結束" if dead else f"工作行程 {index} 逾時未回應"
+                print(f"✗ {reason}，重新啟動")
+                for job_id, job in list(self._jobs.items()):
+                    if index in job.pending_workers:
+                        job.errors.append(reason)
+                        self._shard_done(job_id, job, index)
+                if not dead:
+                    process.kill()
+                    process.join(5)
+                self._start_worker(index)
+
+    def shutdown(self, timeout: float = 10.0):
+        """
+        通知工作行程關閉瀏覽器並結束（之後再 submit 會重新啟動）
+
+        尚未完成的更新視為取消；可在任何執行緒呼叫（例如休市時在背景執行緒關閉）。
+
+        Args:
+            timeout: 等待每個行程結束的秒數
+        """
+        with self._lock:
+            if not self._processes:
+                return
+            self._stop.set()
+            processes, self._processes = self._processes, []
+            inboxes, self._inboxes = self._inboxes, []
+            readers, self._readers = self._readers, []
+            relay, self._relay = self._relay, None
+            jobs, self._jobs = self._jobs, {}
+
+        for job in jobs.values():
+            job.publisher.fail("更新已取消")
+        for inbox in inboxes:
+            inbox.put(None)
+        for process in processes:
+            process.join(timeout)
+            if process.is_alive():
+                # terminate() 對被暫停（SIGSTOP）的行程無效
+                process.kill()
+                process.join(timeout)
+        relay.join(timeout)
+        for reader in readers:
+            reader.close()
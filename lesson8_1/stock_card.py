@@ -0,0 +1,240 @@
+"""
+觀察清單的股票卡片
+
+卡片元件只建立一次，之後資料更新只對「內容有變」的 Label 呼叫
+configure(text=..., fg=...)。卡片可以用 bind_code() 改綁到另一支股票，
+讓虛擬化清單（card_grid.VirtualCardGrid）重複使用同一批元件。
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, Optional, Tuple
+
+from quote import MISSING, Quote
+from tick_buffer import TickRing, sparkline_coords
+
+
+# 漲跌顏色（依 Quote.color_class）
+UP_COLOR = '#d32f2f'    # 紅色（漲）
+DOWN_COLOR = '#388e3c'  # 綠色（跌）
+FLAT_COLOR = 'black'
+CLASS_COLORS = {'up': UP_COLOR, 'down': DOWN_COLOR, 'flat': FLAT_COLOR}
+
+# 走勢圖大小（像素）
+SPARKLINE_SIZE = (260, 44)
+
+# 詳細資訊區：(顯示名稱, Quote 的顯示文字屬性, 所在欄 0=左 1=右)
+INFO_ROWS = (
+    ("開盤", 'open_text', 0),
+    ("最高", 'high_text', 0),
+    ("最低", 'low_text', 0),
+    ("成交量", 'volume_text', 1),
+    ("昨收", 'prev_close_text', 1),
+)
+
+
+def format_update_time(quote: Quote) -> str:
+    """取得「更新」欄的顯示文字（未變動時顯示起始時間，舊資料加上標記）"""
+    if quote.stale:
+        return f"⚠️ 上次資料（{quote.update_time or MISSING}）"
+    if quote.unchanged_since:
+        return f"未變動（自 {quote.unchanged_since}）"
+    return quote.update_time or MISSING
+
+
+class StockCard:
+    """一支股票的資訊卡片（元件建立一次，之後就地更新）"""
+
+    def __init__(self, parent, on_remove: Callable[[str], None], stock_code: Optional[str] = None):
+        """
+        Args:
+            parent: 卡片所在的容器
+            on_remove: 按下移除按鈕時呼叫，參數為目前綁定的股票代碼
+            stock_code: 初始綁定的股票代碼
+        """
+        self.stock_code = None
+        # 元件名稱 -> 目前顯示的 (文字, 顏色)，用來跳過沒有變動的欄位
+        self._shown: Dict[str, Tuple[str, Optional[str]]] = {}
+        self._has_data = None
+
+        # 主卡片容器
+        self.frame = ttk.LabelFrame(parent, padding=15)
+        if stock_code is not None:
+            self.bind_code(stock_code)
+
+        # === 內容區（有資料時顯示） ===
+        self.content_frame = ttk.Frame(self.frame)
+        self._labels: Dict[str, tk.Widget] = {}
+
+        # 標題區（股票代碼與名稱）
+        header_frame = ttk.Frame(self.content_frame)
+        header_frame.pack(fill=tk.X, pady=(0, 10))
+        self._labels['code'] = ttk.Label(header_frame, font=('Arial', 20, 'bold'))
+        self._labels['code'].pack(side=tk.LEFT)
+        self._labels['name'] = ttk.Label(header_frame, font=('Arial', 18))
+        self._labels['name'].pack(side=tk.LEFT, padx=(10, 0))
+
+        # 即時價格區（大字體顯示）與漲跌
+        price_frame = ttk.Frame(self.content_frame)
+        price_frame.pack(fill=tk.X, pady=(0, 10))
+        self._labels['price'] = tk.Label(price_frame, font=('Arial', 36, 'bold'), fg='black')
+        self._labels['price'].pack(side=tk.LEFT)
+
+        change_frame = ttk.Frame(price_frame)
+        change_frame.pack(side=tk.LEFT, padx=(15, 0))
+        self._labels['change'] = tk.Label(change_frame, font=('Arial', 20, 'bold'))
+        self._labels['change'].pack()
+        self._labels['change_rate'] = tk.Label(change_frame, font=('Arial', 17))
+        self._labels['change_rate'].pack()
+
+        # 盤中走勢（單一 Canvas line，資料更新時只移動座標）
+        self.sparkline = tk.Canvas(
+            self.content_frame,
+            width=SPARKLINE_SIZE[0],
+            height=SPARKLINE_SIZE[1],
+            highlightthickness=0
+        )
+        self.sparkline.pack(fill=tk.X, pady=(0, 5))
+        self._spark_item = self.sparkline.create_line(0, 0, 0, 0, width=2, state='hidden')
+        # (股票代碼, 緩衝區流水號, 緩衝區累計筆數, 顏色)，相同時不重畫
+        self._spark_key = None
+
+        # 詳細資訊區（兩欄佈局）
+        info_frame = ttk.Frame(self.content_frame)
+        info_frame.pack(fill=tk.X, pady=(5, 10))
+        columns = (
+            ttk.Frame(info_frame),
+            ttk.Frame(info_frame),
+        )
+        columns[0].pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        columns[1].pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(20, 0))
+
+        for title, attribute, column in INFO_ROWS:
+            self._labels[attribute] = self._add_info_row(columns[column], title)
+        self._labels['update_time'] = self._add_info_row(columns[1], "更新", size=11)
+
+        # === 等待資料提示 ===
+        self.waiting_label = ttk.Label(
+            self.frame,
+            text="⏳ 等待更新資料...",
+            font=('Arial', 16),
+            foreground='gray'
+        )
+
+        # === 移除按鈕區 ===
+        self.btn_frame = ttk.Frame(self.frame)
+        self.btn_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(10, 0))
+
+        # 使用 tk.Button 以便自訂顏色
+        remove_btn = tk.Button(
+            self.btn_frame,
+            text="✕ 移除",
+            command=lambda: on_remove(self.stock_code),
+            font=('Arial', 13, 'bold'),
+            bg='#f44336',
+            fg='#FFFF00',  # 黃色文字
+            activebackground='#d32f2f',
+            activeforeground='#FFFF00',
+            relief=tk.FLAT,
+            cursor='hand2',
+            padx=20,
+            pady=8
+        )
+        remove_btn.pack(side=tk.RIGHT)
+
+        # 滑鼠懸停效果
+        remove_btn.bind("<Enter>", lambda e: remove_btn.config(bg='#d32f2f'))
+        remove_btn.bind("<Leave>", lambda e: remove_btn.config(bg='#f44336'))
+
+    @staticmethod
+    def _add_info_row(parent, label: str, size: int = 14) -> ttk.Label:
+        """
+        添加資訊列
+
+        Args:
+            parent: 父容器
+            label: 標籤文字
+            size: 字體大小
+
+        Returns:
+            顯示數值的 Label
+        """
+        row = ttk.Frame(parent)
+        row.pack(fill=tk.X, pady=3)
+
+        ttk.Label(
+            row,
+            text=f"{label}:",
+            font=('Arial', size),
+            foreground='#666'
+        ).pack(side=tk.LEFT)
+
+        value_label = ttk.Label(row, font=('Arial', size, 'bold'))
+        value_label.pack(side=tk.LEFT, padx=(5, 0))
+        return value_label
+
+    def _set(self, key: str, text: str, color: Optional[str] = None):
+        """只有文字或顏色改變時才 configure"""
+        if self._shown.get(key) == (text, color):
+            return
+        self._shown[key] = (text, color)
+        if color is None:
+            self._labels[key].configure(text=text)
+        else:
+            self._labels[key].configure(text=text, fg=color)
+
+    def bind_code(self, stock_code: str):
+        """把卡片改綁到另一支股票（內容在下次 update() 時更新）"""
+        if stock_code != self.stock_code:
+            self.stock_code = stock_code
+            self.frame.configure(text=f"  股票 {stock_code}  ")
+
+    def update(self, quote: Optional[Quote], ticks: Optional[TickRing] = None):
+        """
+        以最新報價更新卡片內容（顯示文字已在 Quote 建立時算好）
+
+        Args:
+            quote: 報價，None 表示尚無資料
+            ticks: 這支股票的盤中報價緩衝區（畫走勢用）
+        """
+        has_data = quote is not None
+        if has_data != self._has_data:
+            self._has_data = has_data
+            if has_data:
+                self.waiting_label.pack_forget()
+                self.content_frame.pack(fill=tk.BOTH, expand=True, before=self.btn_frame)
+            else:
+                self.content_frame.pack_forget()
+                self.waiting_label.pack(pady=20, before=self.btn_frame)
+        if not has_data:
+            return
+
+        color = CLASS_COLORS[quote.color_class]
+        self._set('code', quote.symbol)
+        self._set('name', quote.name or MISSING)
+        self._set('price', quote.price_text)
+        self._set('change', quote.change_text, color)
+        self._set('change_rate', quote.change_pct_text, color)
+        for _, attribute, _ in INFO_ROWS:
+            self._set(attribute, getattr(quote, attribute))
+        self._set('update_time', format_update_time(quote))
+        self._update_sparkline(ticks, color)
+
+    def _update_sparkline(self, ticks: Optional[TickRing], color: str):
+        """有新資料時才重算座標；永遠只有同一個 line 項目"""
+        key = (self.stock_code, None, None, color) if ticks is None else (
+            self.stock_code, ticks.ring_id, ticks.total, color
+        )
+        if key == self._spark_key:
+            return
+        self._spark_key = key
+        if ticks is None or len(ticks) < 2:
+            self.sparkline.itemconfigure(self._spark_item, state='hidden')
+            return
+        width = max(self.sparkline.winfo_width(), SPARKLINE_SIZE[0])
+        self.sparkline.coords(self._spark_item, *sparkline_coords(ticks.prices(), width, SPARKLINE_SIZE[1]))
+        self.sparkline.itemconfigure(self._spark_item, fill=color, state='normal')
+
+    def destroy(self):
+        """銷毀卡片的所有元件"""
+        self.frame.destroy()
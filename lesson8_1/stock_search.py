@@ -0,0 +1,165 @@
+"""
+股票清單搜尋索引
+
+上市櫃股票有兩千多支，每按一個鍵就線性掃描並刪除、重建 Treeview
+全部列會讓輸入卡頓。這裡預先建立索引：
+
+- 股票代碼：前綴樹（trie），每個節點保存以該前綴開頭的代碼
+- 股票名稱：字元 1-gram 與 2-gram 倒排索引（中文名稱沒有空白可斷詞）
+- 輸入是前一次查詢的延伸時，只在上一次的結果中篩選
+- Treeview 以 detach / move 顯示或隱藏既有項目，不刪除也不重新建立
+- 按鍵以 after() 去抖動，停止輸入一小段時間後才套用篩選
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+
+class StockSearchIndex:
+    """股票代碼前綴樹 + 名稱 n-gram 倒排索引"""
+
+    def __init__(self, stocks: Sequence[Tuple[str, str]]):
+        """
+        Args:
+            stocks: (股票代碼, 股票名稱) 列表，搜尋結果會保持這個順序
+        """
+        self.codes: List[str] = [code for code, _ in stocks]
+        self._order: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        self._names: Dict[str, str] = {code: name.lower() for code, name in stocks}
+
+        # 代碼前綴樹：節點為 (子節點字典, 以此前綴開頭的代碼集合)
+        self._trie: Tuple[Dict, Set[str]] = ({}, set())
+        # 名稱 n-gram -> 股票代碼集合
+        self._grams: Dict[str, Set[str]] = {}
+
+        for code, _ in stocks:
+            node = self._trie
+            for ch in code.lower():
+                node = node[0].setdefault(ch, ({}, set()))
+                node[1].add(code)
+            name = self._names[code]
+            for gram in self._ngrams(name):
+                self._grams.setdefault(gram, set()).add(code)
+
+    @staticmethod
+    def _ngrams(text: str) -> Set[str]:
+        """取得文字的 1-gram 與 2-gram"""
+        grams = set(text)
+        grams.update(text[i:i + 2] for i in range(len(text) - 1))
+        return grams
+
+    def matches(self, code: str, query: str) -> bool:
+        """
+        判斷單一股票是否符合查詢（代碼前綴或名稱包含）
+
+        Args:
+            code: 股票代碼
+            query: 已轉小寫的查詢字串
+        """
+        return code.lower().startswith(query) or query in self._names.get(code, '')
+
+    def _code_prefix(self, query: str) -> Set[str]:
+        node = self._trie
+        for ch in query:
+            node = node[0].get(ch)
+            if node is None:
+                return set()
+        return node[1]
+
+    def _name_contains(self, query: str) -> Set[str]:
+        if len(query) == 1:
+            return self._grams.get(query, set())
+        # 交集所有 2-gram 的候選，再確認整個字串確實出現在名稱中
+        candidates: Optional[Set[str]] = None
+        for i in range(len(query) - 1):
+            codes = self._grams.get(query[i:i + 2])
+            if not codes:
+                return set()
+            candidates = set(codes) if candidates is None else candidates & codes
+        return {code for code in candidates if query in self._names[code]}
+
+    def search(self, query: str, within: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        搜尋股票
+
+        Args:
+            query: 查詢字串（不分大小寫，空字串表示全部）
+            within: 只在這些代碼中篩選（通常是上一次、範圍較大的查詢結果）
+
+        Returns:
+            符合的股票代碼（依建立索引時的順序）
+        """
+        query = query.strip().lower()
+        if not query:
+            return list(self.codes)
+        if within is not None:
+            return [code for code in within if self.matches(code, query)]
+        found = self._code_prefix(query) | self._name_contains(query)
+        return sorted(found, key=self._order.__getitem__)
+
+
+class TreeviewSearch:
+    """
+    以 StockSearchIndex 篩選 Treeview（項目的 iid 必須是股票代碼）
+
+    每次輸入呼叫 schedule()，停止輸入 delay_ms 後才真正篩選。
+    """
+
+    def __init__(
+        self,
+        tree,
+        index: StockSearchIndex,
+        delay_ms: int = 150,
+        on_filtered: Optional[Callable[[int, int], None]] = None
+    ):
+        """
+        Args:
+            tree: ttk.Treeview，已插入所有股票（iid 為股票代碼）
+            index: 搜尋索引
+            delay_ms: 去抖動延遲（毫秒）
+            on_filtered: 篩選完成後的回調，參數為 (顯示數量, 總數量)
+        """
+        self.tree = tree
+        self.index = index
+        self.delay_ms = delay_ms
+        self.on_filtered = on_filtered
+
+        self._query = ''
+        self._visible: List[str] = list(index.codes)
+        self._after_id = None
+
+    def schedule(self, query: str):
+        """安排篩選（取代尚未執行的上一次安排）"""
+        if self._after_id is not None:
+            self.tree.after_cancel(self._after_id)
+        self._after_id = self.tree.after(self.delay_ms, self.apply, query)
+
+    def apply(self, query: str):
+        """
+        立即套用篩選
+
+        Args:
+            query: 查詢字串
+        """
+        self._after_id = None
+        query = query.strip().lower()
+        if query == self._query:
+            return
+
+        # 延伸上一次的查詢時，只需要在上一次的結果中篩選
+        narrowing = bool(self._query) and query.startswith(self._query)
+        within = self._visible if narrowing else None
+        visible = self.index.search(query, within=within)
+
+        keep = set(visible)
+        for code in self._visible:
+            if code not in keep:
+                self.tree.detach(code)
+        if not narrowing:
+            # 範圍變大或改變時，依原順序把項目接回（已在正確位置的也只是原地移動）
+            for position, code in enumerate(visible):
+                self.tree.move(code, '', position)
+
+        self._query = query
+        self._visible = visible
+        if self.on_filtered is not None:
+            self.on_filtered(len(visible), len(self.index.codes))
@@ -0,0 +1,271 @@
+"""
+可重複使用的分頁池（tab pool）
+
+wantgoo 的個股頁是單頁應用程式：在已載入的分頁中切換股票代碼，
+比每次開新分頁、完整載入整個頁面便宜得多。
+
+- 最多 size 個分頁，每次抓取時租用一個，用完歸還
+- 已載入過的分頁以 history.pushState + popstate 在站內切換股票，
+  並等待股票代碼變成新的代碼、且報價區塊的內容與切換前不同
+  （避免擷取到上一支股票留下的價格）；站內切換失敗時才改用完整導覽
+- 分頁已經顯示要抓的股票時（例如觀察清單只有一支股票）不切換，直接擷取；
+  此時價格可能沒變，不能等報價區塊改變
+- 每個分頁使用 max_uses 次後關閉並換新，避免記憶體持續累積
+- 擷取直接以 page.evaluate() 執行編譯後的 Schema 函式，不經過 HTML
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from render_profile import RenderProfile
+from schema_js import build_readiness_js, compile_extraction_js
+
+
+# 站內切換網址並通知前端路由，返回切換前報價區塊的內容；
+# 分頁已經顯示這支股票時不切換，返回 { same: true }
+_SWITCH_JS = """([codeSelector, code, url, quoteSelector]) => {
+    const el = document.querySelector(codeSelector);
+    if (el && el.textContent.trim() === code) return { same: true };
+    const block = document.querySelector(quoteSelector);
+    const before = block ? block.textContent : null;
+    history.pushState({}, '', url);
+    window.dispatchEvent(new PopStateEvent('popstate', { state: {} }));
+    return { same: false, before };
+}"""
+
+# 股票代碼已是新的代碼，且報價區塊的內容已經換掉
+_SWITCHED_JS = """([codeSelector, code, quoteSelector, before]) => {
+    const el = document.querySelector(codeSelector);
+    if (!el || el.textContent.trim() !== code) return false;
+    const block = document.querySelector(quoteSelector);
+    return !!block && block.textContent !== before;
+}"""
+
+
+class _Tab:
+    """分頁池中的一個分頁"""
+
+    __slots__ = ("page", "uses", "loaded")
+
+    def __init__(self, page):
+        self.page = page
+        self.uses = 0
+        # 是否已完整載入過個股頁（可以用站內切換）
+        self.loaded = False
+
+
+class TabPool:
+    """個股頁的分頁池"""
+
+    def __init__(
+        self,
+        crawler,
+        schema: Dict,
+        url_template: str,
+        code_selector: str,
+        quote_selector: str,
+        size: int = 3,
+        warm: int = 3,
+        max_uses: int = 50,
+        profile: Optional[RenderProfile] = None,
+        ready_timeout_ms: int = 14000,
+        page_timeout_ms: int = 30000
+    ):
+        """
+        Args:
+            crawler: 已啟動的 AsyncWebCrawler（共用它的瀏覽器）
+            schema: CSS 擷取 Schema
+            url_template: 個股頁網址樣板，例如 'https://.../stock/{code}/technical-chart'
+            code_selector: 頁面上顯示目前股票代碼的元素，用來確認站內切換完成
+            quote_selector: 報價區塊，站內切換後要等它的內容與切換前不同
+            size: 分頁數量上限
+            warm: 啟動時預先開啟的分頁數量
+            max_uses: 每個分頁使用幾次後換新
+            profile: 渲染設定檔（中止不必要的資源請求）
+            ready_timeout_ms: 等待報價區塊就緒的上限（毫秒）
+            page_timeout_ms: 完整導覽的逾時（毫秒）
+        """
+        self.crawler = crawler
+        self.url_template = url_template
+        self.code_selector = code_selector
+        self.quote_selector = quote_selector
+        self.size = max(1, size)
+        self.warm = min(warm, self.size)
+        self.max_uses = max_uses
+        self.profile = profile
+        self.ready_timeout_ms = ready_timeout_ms
+        self.page_timeout_ms = page_timeout_ms
+
+        self._ready_js = build_readiness_js(schema, timeout_ms=ready_timeout_ms)[len("js:"):]
+        self._extract_js = compile_extraction_js(schema)
+
+        self._context = None
+        self._owns_context = False
+        self._idle: List[_Tab] = []
+        self._total = 0
+        self._available: Optional[asyncio.Condition] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._closed = False
+
+    async def start(self):
+        """建立瀏覽器 context 並預先開啟 warm 個分頁（重複呼叫無作用）"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+            self._available = asyncio.Condition()
+
+        async with self._start_lock:
+            if self._context is not None:
+                return
+
+            browser_manager = self.crawler.crawler_strategy.browser_manager
+            if getattr(browser_manager, "browser", None) is not None:
+                self._context = await browser_manager.browser.new_context(**self._context_options())
+                self._owns_context = True
+            else:
+                # 持久化 context 模式沒有獨立的 browser 物件
+                self._context = browser_manager.default_context
+
+            if self.profile is not None and (
+                self.profile.blocked_resource_types or self.profile.allowed_hosts is not None
+            ):
+                await self._context.route("**/*", self._handle_route)
+
+            for _ in range(self.warm):
+                self._idle.append(_Tab(await self._context.new_page()))
+                self._total += 1
+
+    def _context_options(self) -> Dict:
+        """與一般爬取頁面相同的 User-Agent、視窗大小與額外標頭（取自 BrowserConfig）"""
+        config = getattr(self.crawler, "browser_config", None)
+        options = {}
+        if config is None:
+            return options
+        if getattr(config, "user_agent", None):
+            options["user_agent"] = config.user_agent
+        width = getattr(config, "viewport_width", None)
+        height = getattr(config, "viewport_height", None)
+        if width and height:
+            options["viewport"] = {"width": width, "height": height}
+        if getattr(config, "headers", None):
+            options["extra_http_headers"] = dict(config.headers)
+        return options
+
+    async def _handle_route(self, route):
+        request = route.request
+        if self.profile.should_block(request.resource_type, request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    @asynccontextmanager
+    async def lease(self):
+        """
+        租用一個分頁，區塊結束後歸還（發生例外時關閉該分頁）
+
+        Yields:
+            _Tab 實例
+        """
+        await self.start()
+
+        async with self._available:
+            await self._available.wait_for(lambda: self._idle or self._total < self.size)
+            if self._idle:
+                tab = self._idle.pop()
+            else:
+                self._total += 1
+                tab = None
+
+        if tab is None:
+            try:
+                tab = _Tab(await self._context.new_page())
+            except Exception:
+                await self._discard(None)
+                raise
+
+        try:
+            yield tab
+        except BaseException:
+            await self._discard(tab)
+            raise
+
+        tab.uses += 1
+        if tab.uses >= self.max_uses or self._closed:
+            await self._discard(tab)
+        else:
+            async with self._available:
+                self._idle.append(tab)
+                self._available.notify()
+
+    async def _discard(self, tab: Optional[_Tab]):
+        """關閉分頁並釋放名額（下次租用時再開新分頁）"""
+        if tab is not None:
+            try:
+                await tab.page.close()
+            except Exception:
+                pass
+        async with self._available:
+            self._total -= 1
+            self._available.notify()
+
+    async def _navigate(self, tab: _Tab, stock_code: str):
+        """把分頁切換到指定股票：優先站內切換，失敗時完整導覽"""
+        page = tab.page
+        url = self.url_template.format(code=stock_code)
+
+        if tab.loaded:
+            try:
+                switch = await page.evaluate(
+                    _SWITCH_JS, [self.code_selector, stock_code, url, self.quote_selector]
+                )
+                if switch["same"]:
+                    # 已經是這支股票：報價區塊不一定會變（價格沒動），直接擷取
+                    return
+                await page.wait_for_function(
+                    _SWITCHED_JS,
+                    arg=[self.code_selector, stock_code, self.quote_selector, switch["before"]],
+                    timeout=self.ready_timeout_ms / 2
+                )
+                return
+            except Exception:
+                # 前端路由沒有反應，改用完整導覽
+                pass
+
+        wait_until = self.profile.wait_until if self.profile is not None else "domcontentloaded"
+        await page.goto(url, wait_until=wait_until, timeout=self.page_timeout_ms)
+        tab.loaded = True
+
+    async def fetch(self, stock_code: str) -> Optional[List[Dict]]:
+        """
+        在池中的分頁擷取一支股票
+
+        Args:
+            stock_code: 股票代碼
+
+        Returns:
+            擷取結果列表（格式同 JsonCssExtractionStrategy），未就緒時返回 None
+        """
+        async with self.lease() as tab:
+            await self._navigate(tab, stock_code)
+            if not await tab.page.evaluate(f"({self._ready_js})()"):
+                # 頁面狀態不明，下次改用完整導覽
+                tab.loaded = False
+                return None
+            return await tab.page.evaluate(self._extract_js)
+
+    async def close(self):
+        """關閉所有分頁與自行建立的 context"""
+        self._closed = True
+        for tab in self._idle:
+            try:
+                await tab.page.close()
+            except Exception:
+                pass
+        self._idle.clear()
+        self._total = 0
+        if self._owns_context and self._context is not None:
+            try:
+                await self._context.close()
+            except Exception:
+                pass
+        self._context = None
@@ -0,0 +1,142 @@
+"""
+每支股票固定容量的盤中報價環形緩衝區
+
+卡片只顯示最新價格；要畫走勢（sparkline）需要保留近期的報價，
+但觀察清單有數百支股票時不能讓歷史無限累積在記憶體中。
+
+- TickRing：以 NumPy 陣列實作的環形緩衝區，容量固定、append 為 O(1)，
+  寫滿後覆蓋最舊的資料
+- TickStore：股票代碼 -> TickRing；每支股票的記憶體上限為 capacity × 16 bytes，
+  整個觀察清單的上限即為 股票數 × 該值
+"""
+
+import itertools
+from typing import Dict, Optional
+
+import numpy as np
+
+from quote import Quote
+
+
+# 每個 TickRing 的流水號（id() 在物件回收後可能被重複使用）
+_ring_ids = itertools.count(1)
+
+
+class TickRing:
+    """固定容量的 (時間, 價格) 環形緩衝區"""
+
+    __slots__ = ("capacity", "total", "ring_id", "_ts", "_price", "_next")
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Args:
+            capacity: 最多保留的筆數
+        """
+        self.capacity = capacity
+        # 累計 append 次數；與 ring_id 一起用來判斷 sparkline 是否需要重畫
+        # （股票移除後重新加入會建立新的緩衝區，total 從 0 重新計算）
+        self.total = 0
+        self.ring_id = next(_ring_ids)
+        self._ts = np.zeros(capacity, dtype=np.int64)
+        self._price = np.zeros(capacity, dtype=np.float64)
+        self._next = 0
+
+    def append(self, ts: int, price: float):
+        """加入一筆報價（寫滿時覆蓋最舊的一筆）"""
+        self._ts[self._next] = ts
+        self._price[self._next] = price
+        self._next = (self._next + 1) % self.capacity
+        self.total += 1
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        """最新一筆的報價時間，沒有資料時返回 None"""
+        return int(self._ts[self._next - 1]) if self.total else None
+
+    def _ordered(self, array: np.ndarray) -> np.ndarray:
+        if self.total <= self.capacity:
+            return array[:self.total]
+        return np.concatenate((array[self._next:], array[:self._next]))
+
+    def prices(self) -> np.ndarray:
+        """由舊到新的價格"""
+        return self._ordered(self._price)
+
+    def timestamps(self) -> np.ndarray:
+        """由舊到新的報價時間（Unix 秒數）"""
+        return self._ordered(self._ts)
+
+    @property
+    def nbytes(self) -> int:
+        """緩衝區佔用的位元組數（固定）"""
+        return self._ts.nbytes + self._price.nbytes
+
+
+def sparkline_coords(prices: np.ndarray, width: int, height: int, pad: int = 2) -> list:
+    """
+    把價格序列轉成 Canvas line 的座標（點數多於寬度時等距取樣）
+
+    Args:
+        prices: 由舊到新的價格
+        width: 畫布寬度（像素）
+        height: 畫布高度（像素）
+        pad: 上下左右留白
+
+    Returns:
+        [x0, y0, x1, y1, ...]
+    """
+    if len(prices) > width:
+        prices = prices[np.linspace(0, len(prices) - 1, width).astype(np.intp)]
+    x = np.linspace(pad, width - pad, len(prices))
+    low, high = prices.min(), prices.max()
+    if high > low:
+        y = (height - pad) - (prices - low) * ((height - 2 * pad) / (high - low))
+    else:
+        y = np.full(len(prices), height / 2)
+    return np.column_stack((x, y)).ravel().tolist()
+
+
+class TickStore:
+    """觀察清單所有股票的報價環形緩衝區"""
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Args:
+            capacity: 每支股票最多保留的筆數
+                （自動更新最快 15 秒一次，1024 筆約可涵蓋整個交易日）
+        """
+        self.capacity = capacity
+        self._rings: Dict[str, TickRing] = {}
+
+    def append(self, quote: Quote):
+        """
+        記錄一筆報價（沒有價格或時間與上一筆相同時略過）
+
+        Args:
+            quote: 報價
+        """
+        if quote.price is None:
+            return
+        ring = self._rings.get(quote.symbol)
+        if ring is None:
+            ring = self._rings[quote.symbol] = TickRing(self.capacity)
+        ts = quote.ts or 0
+        if ts and ring.last_ts == ts:
+            return
+        ring.append(ts, quote.price)
+
+    def get(self, stock_code: str) -> Optional[TickRing]:
+        """取得股票的緩衝區，沒有資料時返回 None"""
+        return self._rings.get(stock_code)
+
+    def discard(self, stock_code: str):
+        """移除股票的緩衝區"""
+        self._rings.pop(stock_code, None)
+
+    @property
+    def nbytes(self) -> int:
+        """所有緩衝區佔用的位元組數（≤ 股票數 × capacity × 16）"""
+        return sum(ring.nbytes for ring in self._rings.values())
@@ -0,0 +1,106 @@
+"""
+事件驅動的背景執行緒 → Tk 主迴圈交接
+
+以 root.after() 每 100 / 200 ms 輪詢佇列，閒置時仍會不斷喚醒主迴圈，
+結果也要多等最多一個輪詢間隔。NotifyingQueue 在 put() 時直接以虛擬事件
+（event_generate(..., when="tail")）喚醒 Tk；同一批尚未處理的訊息只送一次事件，
+主執行緒收到事件後一次取出佇列中的所有訊息。閒置時完全沒有定時喚醒。
+
+背景執行緒的 event_generate() 會交給 Tk 執行緒處理並等待完成。Tk 執行緒若在等待
+背景執行緒（例如關閉視窗時等待爬蟲迴圈結束），兩邊會互相等待；因此關閉前先呼叫
+detach()：之後背景執行緒不再呼叫 Tcl，已送出的呼叫也會在 detach() 返回前處理完。
+"""
+
+import queue
+import threading
+import time
+import tkinter as tk
+from typing import Callable, List, Optional
+
+
+class NotifyingQueue(queue.Queue):
+    """put() 時喚醒 Tk 主迴圈的佇列"""
+
+    EVENT = "<<ResultQueueReady>>"
+
+    def __init__(self, maxsize: int = 0):
+        super().__init__(maxsize)
+        self._widget: Optional[tk.Misc] = None
+        # 已送出事件、但主執行緒還沒取出訊息
+        self._wakeup_pending = False
+        # 正在呼叫 event_generate() 的背景執行緒數
+        self._generating = 0
+        self._wakeup_lock = threading.Lock()
+
+    def attach(self, widget: tk.Misc, on_batch: Callable[[List], None]):
+        """
+        綁定接收事件的元件與批次處理函式（在主執行緒呼叫）
+
+        Args:
+            widget: 接收虛擬事件的 Tk 元件（通常是 root）
+            on_batch: 收到事件後以「目前佇列中所有訊息」的列表呼叫
+        """
+        self._widget = widget
+        widget.bind(self.EVENT, lambda e: self._deliver(on_batch))
+        # 主迴圈開始後補處理綁定前就放入的訊息
+        widget.after_idle(self._wakeup)
+
+    def detach(self):
+        """停止送出事件（關閉視窗、等待背景執行緒結束之前在主執行緒呼叫）"""
+        with self._wakeup_lock:
+            widget, self._widget = self._widget, None
+        if widget is None:
+            return
+        # 處理背景執行緒已送出的 event_generate()，讓它們返回
+        while True:
+            with self._wakeup_lock:
+                if self._generating == 0:
+                    break
+            try:
+                widget.update()
+            except tk.TclError:
+                # 視窗已銷毀：背景執行緒的呼叫會以例外返回
+                return
+            time.sleep(0.005)
+        widget.unbind(self.EVENT)
+
+    def put(self, item, block: bool = True, timeout: Optional[float] = None):
+        super().put(item, block, timeout)
+        self._wakeup()
+
+    def drain(self) -> List:
+        """取出目前佇列中的所有訊息（不等待）"""
+        with self._wakeup_lock:
+            # 先清除旗標再取出：之後才放入的訊息會再送一次事件
+            self._wakeup_pending = False
+        items = []
+        try:
+            while True:
+                items.append(self.get_nowait())
+        except queue.Empty:
+            pass
+        return items
+
+    def _deliver(self, on_batch: Callable[[List], None]):
+        items = self.drain()
+        if items:
+            on_batch(items)
+
+    def _wakeup(self):
+        if self.empty():
+            return
+        with self._wakeup_lock:
+            widget = self._widget
+            if widget is None or self._wakeup_pending:
+                return
+            self._wakeup_pending = True
+            self._generating += 1
+        try:
+            widget.event_generate(self.EVENT, when="tail")
+        except (tk.TclError, RuntimeError):
+            # 視窗已關閉，或主迴圈尚未開始（attach 時排定的 after_idle 會補送）
+            with self._wakeup_lock:
+                self._wakeup_pending = False
+        finally:
+            with self._wakeup_lock:
+                self._generating -= 1
@@ -0,0 +1,248 @@
+"""
+台股代碼清單快照
+
+啟動時 import twstock、走訪整個 twstock.codes 再排序，會拖慢視窗出現的時間。
+這裡把 (代碼, 名稱, 類型, 市場) 預先存成精簡的二進位檔，啟動時以 mmap 讀取；
+twstock 的代碼表（codes/*.csv）有變動時，才在背景執行緒重建快照。
+
+檔案格式（little-endian）:
+    標頭   magic(4s) 格式版本(H) 保留(H) 來源指紋(16s) 筆數(I)
+    位移表 (筆數 + 1) 個 I，指向字串區的每筆起點
+    字串區 每筆為 UTF-8 的「代碼 \\x1f 名稱 \\x1f 類型 \\x1f 市場」
+
+執行本檔可比較兩種方式的冷啟動時間：python universe_snapshot.py
+"""
+
+import hashlib
+import importlib.util
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+SNAPSHOT_PATH = Path(__file__).with_name("tw_universe.bin")
+
+_MAGIC = b"TWUS"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHH16sI")
+_SEP = "\x1f"
+
+
+class UniverseEntry(NamedTuple):
+    """一筆證券資料"""
+    code: str
+    name: str
+    type: str
+    market: str
+
+
+def source_fingerprint() -> Optional[bytes]:
+    """
+    計算 twstock 代碼表的指紋（不 import twstock）
+
+    Returns:
+        16 bytes 指紋，找不到 twstock 時返回 None
+    """
+    spec = importlib.util.find_spec("twstock")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    package_dir = Path(list(spec.submodule_search_locations)[0])
+
+    digest = hashlib.blake2b(digest_size=16)
+    for csv_path in sorted(package_dir.glob("codes/*.csv")):
+        stat = csv_path.stat()
+        digest.update(f"{csv_path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.digest()
+
+
+def build_universe() -> List[UniverseEntry]:
+    """
+    從 twstock 建立完整的證券清單（依代碼排序）
+
+    Returns:
+        UniverseEntry 列表
+    """
+    import twstock
+
+    entries = [
+        UniverseEntry(code, info.name, info.type or '', getattr(info, 'market', '') or '')
+        for code, info in twstock.codes.items()
+    ]
+    entries.sort(key=lambda e: e.code)
+    return entries
+
+
+def write_snapshot(entries: Sequence[UniverseEntry], fingerprint: bytes, path: Path = SNAPSHOT_PATH):
+    """
+    寫入快照（先寫暫存檔再取代，讀取端不會看到寫到一半的檔案）
+
+    Args:
+        entries: 證券清單
+        fingerprint: 來源指紋
+        path: 快照路徑
+    """
+    blobs = [_SEP.join(entry).encode("utf-8") for entry in entries]
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, 0, fingerprint, len(blobs)))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(b"".join(blobs))
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: Path = SNAPSHOT_PATH) -> Optional[Tuple[bytes, List[UniverseEntry]]]:
+    """
+    以 mmap 讀取快照
+
+    Args:
+        path: 快照路徑
+
+    Returns:
+        (來源指紋, 證券清單)；檔案不存在、格式版本不符或損毀時返回 None
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, _, fingerprint, count = _HEADER.unpack_from(mm, 0)
+            if magic != _MAGIC or version != _FORMAT_VERSION:
+                return None
+            offsets = struct.unpack_from(f"<{count + 1}I", mm, _HEADER.size)
+            base = _HEADER.size + 4 * (count + 1)
+            entries = [
+                UniverseEntry(*mm[base + offsets[i]:base + offsets[i + 1]].decode("utf-8").split(_SEP))
+                for i in range(count)
+            ]
+            return fingerprint, entries
+    except (OSError, ValueError, struct.error, TypeError):
+        return None
+
+
+def refresh_in_background(
+    on_refreshed: Callable[[List[UniverseEntry]], None],
+    path: Path = SNAPSHOT_PATH,
+    on_failed: Optional[Callable[[str], None]] = None
+) -> threading.Thread:
+    """
+    在背景執行緒檢查 twstock 代碼表是否變動，有變動（或沒有快照）時重建
+
+    Args:
+        on_refreshed: 重建完成後以新清單呼叫（在背景執行緒中呼叫，
+                      GUI 端應透過佇列轉交給主執行緒）
+        path: 快照路徑
+        on_failed: 找不到 twstock 或重建失敗時以錯誤訊息呼叫（同樣在背景執行緒中呼叫）
+
+    Returns:
+        背景執行緒
+    """
+
+    def fail(message: str):
+        print(f"⚠️ 更新股票清單快照失敗: {message}")
+        if on_failed is not None:
+            on_failed(message)
+
+    def run():
+        try:
+            fingerprint = source_fingerprint()
+            if fingerprint is None:
+                fail("找不到 twstock 模組")
+                return
+            current = read_snapshot(path)
+            if current is not None and current[0] == fingerprint:
+                return
+            entries = build_universe()
+            write_snapshot(entries, fingerprint, path)
+            print(f"✓ 已更新股票清單快照（{len(entries)} 筆）")
+            on_refreshed(entries)
+        except Exception as e:
+            fail(str(e))
+
+    thread = threading.Thread(target=run, name="UniverseRefresh", daemon=True)
+    thread.start()
+    return thread
+
+
+class ChunkedTreeFill:
+    """分批把項目插入 Treeview，每批之間讓出事件迴圈，視窗可以先繪製"""
+
+    def __init__(
+        self,
+        tree,
+        items: Sequence[Tuple[str, Dict]],
+        chunk_size: int = 300,
+        on_done: Optional[Callable[[], None]] = None
+    ):
+        """
+        Args:
+            tree: ttk.Treeview
+            items: (iid, insert 參數) 列表
+            chunk_size: 每批插入的數量
+            on_done: 全部插入後呼叫
+        """
+        self.tree = tree
+        self.items = items
+        self.chunk_size = chunk_size
+        self.on_done = on_done
+        self._position = 0
+        self._cancelled = False
+
+    def start(self):
+        """開始分批插入（第一批在事件迴圈閒置時執行）"""
+        self.tree.after_idle(self._step)
+
+    def cancel(self):
+        """停止插入（已插入的項目保留）"""
+        self._cancelled = True
+
+    def _step(self):
+        if self._cancelled:
+            return
+        end = min(self._position + self.chunk_size, len(self.items))
+        for iid, options in self.items[self._position:end]:
+            self.tree.insert('', 'end', iid=iid, **options)
+        self._position = end
+        if end < len(self.items):
+            self.tree.after_idle(self._step)
+        elif self.on_done is not None:
+            self.on_done()
+
+
+def _measure_cold_start():
+    """以全新的子行程比較 twstock 走訪與讀取快照的冷啟動時間"""
+    import subprocess
+    import sys
+    import time
+
+    if source_fingerprint() is None:
+        print("✗ 找不到 twstock，無法比較")
+        return
+    if read_snapshot() is None:
+        write_snapshot(build_universe(), source_fingerprint())
+
+    here = Path(__file__).parent
+    scripts = {
+        "twstock": (
+            "import twstock\n"
+            "s = sorted((c, i.name) for c, i in twstock.codes.items() if i.type == '股票')"
+        ),
+        "snapshot": (
+            "from universe_snapshot import read_snapshot\n"
+            "s = [(e.code, e.name) for e in read_snapshot()[1] if e.type == '股票']"
+        ),
+    }
+    for label, script in scripts.items():
+        runs = []
+        for _ in range(5):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", script], cwd=here, check=True)
+            runs.append(time.perf_counter() - start)
+        print(f"{label:<10} 最佳 {min(runs) * 1000:7.1f} ms  平均 {sum(runs) / len(runs) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    _measure_cold_start()
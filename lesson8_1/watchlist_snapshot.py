@@ -0,0 +1,139 @@
+"""
+觀察清單與最新報價的快照（熱啟動）
+
+程式啟動時所有卡片都要等第一次完整爬取（清單大時要數十秒）才有內容。
+每次更新完成與關閉視窗時，把觀察清單與 stock_data_cache 寫成快照；
+下次啟動先從快照還原（標記為舊資料），畫面立即有內容，再於背景更新。
+
+- 寫入：先寫暫存檔再 os.replace，讀取端不會看到寫到一半的檔案
+- SnapshotWriter：更新頻繁時只寫最新的一份，寫檔在背景執行緒進行
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from quote import Quote
+
+
+SNAPSHOT_PATH = Path(__file__).with_name("watchlist_snapshot.json")
+
+_FORMAT_VERSION = 1
+
+# 快照保存的 Quote 欄位（顯示文字在還原時重新產生）
+_QUOTE_FIELDS = (
+    'name', 'ts', 'price', 'change', 'change_pct', 'open', 'high', 'low',
+    'prev_close', 'volume', 'update_time',
+)
+
+
+def build_payload(watchlist: Iterable[str], quotes: Dict[str, Quote]) -> Dict:
+    """
+    建立快照內容（在主執行緒呼叫，取得一致的當下狀態）
+
+    Args:
+        watchlist: 觀察清單
+        quotes: 股票代碼 -> 最新報價
+
+    Returns:
+        可 JSON 序列化的字典
+    """
+    codes = sorted(watchlist)
+    return {
+        'version': _FORMAT_VERSION,
+        'saved_at': time.time(),
+        'watchlist': codes,
+        'quotes': {
+            code: [getattr(quotes[code], field) for field in _QUOTE_FIELDS]
+            for code in codes if code in quotes
+        },
+    }
+
+
+def write_snapshot(payload: Dict, path: Path = SNAPSHOT_PATH):
+    """
+    寫入快照（先寫暫存檔再取代）
+
+    Args:
+        payload: build_payload() 的結果
+        path: 快照路徑
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=path.name, suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path: Path = SNAPSHOT_PATH) -> Optional[Tuple[float, List[str], Dict[str, Quote]]]:
+    """
+    讀取快照，還原的報價都標記為舊資料（Quote.stale）
+
+    Args:
+        path: 快照路徑
+
+    Returns:
+        (儲存時間, 觀察清單, 股票代碼 -> 報價)；檔案不存在、版本不符或損毀時返回 None
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get('version') != _FORMAT_VERSION:
+            return None
+        quotes = {}
+        for code, values in payload['quotes'].items():
+            quote = Quote(code, **dict(zip(_QUOTE_FIELDS, values)))
+            quote.stale = True
+            quotes[code] = quote
+        return payload['saved_at'], list(payload['watchlist']), quotes
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+class SnapshotWriter:
+    """在背景執行緒寫入快照；尚未寫入時又有新的快照，只寫最新的一份"""
+
+    def __init__(self, path: Path = SNAPSHOT_PATH):
+        """
+        Args:
+            path: 快照路徑
+        """
+        self.path = path
+        self._pending: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def save(self, payload: Dict):
+        """排入一份快照（不阻塞）"""
+        with self._lock:
+            self._pending = payload
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="SnapshotWriter", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def flush(self):
+        """立即寫入尚未寫入的快照（關閉視窗時在主執行緒呼叫）"""
+        with self._write_lock:
+            with self._lock:
+                payload, self._pending = self._pending, None
+            if payload is not None:
+                try:
+                    write_snapshot(payload, self.path)
+                except OSError as e:
+                    print(f"✗ 寫入觀察清單快照失敗: {e}")
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.flush()